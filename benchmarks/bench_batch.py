@@ -0,0 +1,84 @@
+"""
+バッチパーサーベンチマーク
+
+レコードごとに辞書を生成する RecordParser.parse と、
+NumPy構造化配列にまとめて変換する RecordParser.parse_batch を比較する。
+O2〜O6は組番ごとに辞書を作る方式と、列ごとの配列に変換する方式を比較する。
+
+実行方法:
+    python benchmarks/bench_batch.py
+    python benchmarks/bench_batch.py --count 1000000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_parser import make_record
+from jravan.layouts import LAYOUTS, Repeat
+from jravan.parser import LayoutCompiler, RecordParser
+
+
+def run(record_type: str, size: int, count: int) -> None:
+    """1レコード種別のベンチマーク"""
+    rng = random.Random(0)
+    pool = [make_record(LAYOUTS[record_type], size, rng) for _ in range(1000)]
+    records = [pool[i % len(pool)] for i in range(count)]
+    
+    start = time.perf_counter()
+    for r in records:
+        RecordParser.parse(r)
+    per_record = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    RecordParser.parse_batch(record_type, records)
+    batched = time.perf_counter() - start
+    
+    print(f"{record_type}: parse {count / per_record:>12,.0f} rec/s  "
+          f"parse_batch {count / batched:>12,.0f} rec/s  ({per_record / batched:.1f}倍)")
+
+
+def run_odds(record_type: str, size: int, count: int) -> None:
+    """組番オッズのベンチマーク（組番ごとの辞書 / 列ごとの配列）"""
+    layout = LAYOUTS[record_type]
+    rng = random.Random(0)
+    pool = [make_record(layout, size, rng) for _ in range(10)]
+    records = [pool[i % len(pool)] for i in range(count)]
+    
+    per_item = LayoutCompiler.compile(layout._replace(fields=tuple(
+        item._replace(columnar=False) if isinstance(item, Repeat) else item
+        for item in layout.fields
+    )))
+    
+    start = time.perf_counter()
+    for r in records:
+        per_item(r)
+    dicts = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for r in records:
+        RecordParser.parse(r)
+    columnar = time.perf_counter() - start
+    
+    print(f"{record_type}: 組番ごとの辞書 {count / dicts:>10,.0f} rec/s  "
+          f"列ごとの配列 {count / columnar:>10,.0f} rec/s  ({dicts / columnar:.1f}倍)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='バッチパーサーベンチマーク')
+    parser.add_argument('--count', type=int, default=100000, help='レコード件数')
+    args = parser.parse_args()
+    
+    run('SE', 555, args.count)
+    run('RA', 409, args.count)
+    run_odds('O2', 2042, args.count // 100)
+    run_odds('O6', 83285, args.count // 100)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+JVLinkClient.gets のベンチマーク
+
+JV-Link（COM）の代わりに JVGets の戻り値を再現するオブジェクトを使い、
+従来の gets（VARIANTのバッファ全体を bytes に変換）と、レコード長分だけを
+コピーする gets、事前確保したバッファを再利用する gets_view を比較する。
+JV-Linkは不要（Linuxでも実行できる）。
+
+COMの戻り値の形式（--mode）:
+    variant : value 属性にバッファ全体（110000バイト）の memoryview を持つオブジェクト
+    buffer  : バッファ全体（110000バイト）の memoryview
+    exact   : レコード長ちょうどの bytes
+
+COMの戻り値は事前に生成して使い回すため、計測値はクライアント側の処理のみ。
+1件あたりの処理時間と、1件あたりに一時的に確保したメモリ（tracemalloc のピーク）を表示する。
+従来の gets は buffer 形式を変換せずに返すため、レコード長が不正になる。
+
+実行方法:
+    python benchmarks/bench_client.py
+    python benchmarks/bench_client.py --mode exact --count 1000000
+"""
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_parser import make_record
+from jravan.client import JVLinkClient
+from jravan.layouts import LAYOUTS
+
+
+class Variant:
+    """JVGets のバッファ（VARIANT）"""
+    
+    def __init__(self, value: bytes):
+        self.value = value
+
+
+class FakeJVLink:
+    """JVGets の戻り値を再現するCOMオブジェクトの代替（戻り値は事前に生成して使い回す）"""
+    
+    def __init__(self, records, mode: str):
+        self.results = []
+        for data in records:
+            buffer = memoryview(data + bytes(JVLinkClient.BUFFER_SIZE - len(data)))
+            if mode == 'variant':
+                payload = Variant(buffer)
+            elif mode == 'buffer':
+                payload = buffer
+            else:
+                payload = data
+            self.results.append((len(data), payload, 'SEVM2024.jvd'))
+        self.index = 0
+    
+    def JVGets(self, buff, size, filename):
+        result = self.results[self.index % len(self.results)]
+        self.index += 1
+        return result
+    
+    def JVClose(self):
+        return 0
+
+
+def legacy_gets(client: JVLinkClient, buffer_size: int = 110000):
+    """従来の gets（VARIANTのバッファ全体を bytes に変換）"""
+    result = client.jvlink.JVGets(None, buffer_size, "")
+    ret_code, data, filename = result[0], result[1], result[2]
+    if data is not None:
+        if hasattr(data, 'value'):
+            data = bytes(data.value)
+        elif isinstance(data, str):
+            data = data.encode('shift-jis', errors='ignore')
+    else:
+        data = b""
+    return (ret_code, data, filename)
+
+
+def measure(name: str, gets, count: int) -> None:
+    """処理時間と1件あたりの確保メモリを表示"""
+    start = time.perf_counter()
+    for _ in range(count):
+        gets()
+    elapsed = time.perf_counter() - start
+    ret, data, _ = gets()
+    
+    samples = min(count, 1000)
+    allocated = 0
+    tracemalloc.start()
+    for _ in range(samples):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        result = gets()
+        allocated += tracemalloc.get_traced_memory()[1] - base
+        del result
+    tracemalloc.stop()
+    
+    note = '' if len(data) == ret else f'  （戻り値のデータ長 {len(data):,}バイト）'
+    print(f"  {name:10} {elapsed / count * 1e9:8,.0f} ns/件  確保 {allocated / samples:10,.0f} バイト/件{note}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JVLinkClient.gets のベンチマーク')
+    parser.add_argument('--count', type=int, default=200000, help='読み込み件数')
+    parser.add_argument('--mode', choices=['variant', 'buffer', 'exact'], default='variant',
+                        help='COMの戻り値の形式')
+    args = parser.parse_args()
+    
+    rng = random.Random(0)
+    layout = LAYOUTS['SE']
+    records = [make_record(layout, layout.length, rng) for _ in range(100)]
+    
+    client = JVLinkClient()
+    client.jvlink = FakeJVLink(records, args.mode)
+    client.is_open = True
+    
+    print(f"SE {layout.length}バイト, {args.count:,}件 (mode={args.mode})")
+    measure('従来', lambda: legacy_gets(client), args.count)
+    measure('gets', client.gets, args.count)
+    measure('gets_view', client.gets_view, args.count)
+
+
+if __name__ == '__main__':
+    main()
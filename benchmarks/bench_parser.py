@@ -0,0 +1,173 @@
+"""
+パーサーベンチマーク
+
+レイアウトからコンパイルしたパーサーと、フィールドごとに
+JVDataParser.mid_b2s を呼び出す従来方式（数値もデコード後にint変換）を比較する。
+計測の前に、どちらの方式も tests/golden/parser.json（レイアウト定義を導入する前の
+パーサーの解析結果）と同じ結果になることを確認する。
+あわせて遅延ビューで場コードだけを参照する場合と、
+列の射影（fields 指定）でレースキーとデータ区分だけを解析する場合の速度も計測する。
+
+実行方法:
+    python benchmarks/bench_parser.py
+    python benchmarks/bench_parser.py --count 1000000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from jravan.layouts import LAYOUTS, Field, Group, Repeat
+from jravan.parser import JVDataParser, RecordParser
+
+
+GOLDEN = Path(__file__).parent.parent / 'tests' / 'golden' / 'parser.json'
+
+NAMES = ['ディープインパクト', 'オルフェーヴル', 'キタサンブラック', 'イクイノックス',
+         '武豊', 'ルメール', '川田将雅', '池江泰郎', '友道康夫', '金子真人ホールディングス']
+
+
+def legacy_parse(layout, data: bytes) -> dict:
+    """従来方式（フィールドごとにmid_b2sを呼び出す）"""
+    parser = JVDataParser()
+    
+    def value(field, base=0):
+        start = base + field.start
+        if field.type == 'int':
+            text = parser.mid_b2s(data, start, field.length)
+            try:
+                return int(text) if text else None
+            except ValueError:
+                return None
+        if field.type == 'ymd':
+            return parser.parse_ymd(data, start)
+        if field.type == 'hms':
+            return parser.parse_hms(data, start)
+        if field.type == 'time':
+            return parser.parse_time(data, start)
+        return parser.mid_b2s(data, start, field.length)
+    
+    record = {'record_type': layout.record_type, 'description': layout.description}
+    for item in layout.fields:
+        if isinstance(item, Group):
+            record[item.name] = {f.name: value(f) for f in item.fields}
+        elif isinstance(item, Repeat):
+            values = []
+            for i in range(item.count):
+                base = item.start - 1 + i * item.size
+                if item.bounded and base + 1 + item.size > len(data):
+                    break
+                if isinstance(item.item, Field):
+                    v = value(item.item, base)
+                    if v and v != '0' * item.item.length:
+                        values.append(v)
+                else:
+                    entry = {f.name: value(f, base) for f in item.item}
+                    key = next(f for f in item.item if f.name == item.key)
+                    v = entry[item.key]
+                    if v and (v > 0 if key.type == 'int' else v != '0' * key.length):
+                        values.append(entry)
+            record[item.name] = values
+        else:
+            record[item.name] = value(item)
+    return record
+
+
+def check_golden() -> None:
+    """コンパイル済みパーサーと従来方式が基準の解析結果と一致することを確認"""
+    golden = json.loads(GOLDEN.read_text(encoding='utf-8'))
+    for record_type, cases in golden.items():
+        for case in cases:
+            record = bytes.fromhex(case['record'])
+            assert RecordParser.parse(record) == case['expected'], (record_type, case['case'])
+            assert legacy_parse(LAYOUTS[record_type], record) == case['expected'], \
+                (record_type, case['case'])
+
+
+def make_record(layout, size: int, rng: random.Random) -> bytes:
+    """レイアウトに沿った合成レコードを生成（名称欄は全角文字）"""
+    buf = bytearray(b' ' * size)
+    buf[0:2] = layout.record_type.encode('ascii')
+    buf[2:3] = b'7'
+    
+    def fill(field, base=0):
+        start = base + field.start - 1
+        if field.type == 'str' and field.length >= 8:
+            text = rng.choice(NAMES).encode('shift-jis')[:field.length]
+        else:
+            text = str(rng.randrange(10 ** field.length)).zfill(field.length).encode('ascii')
+        buf[start:start + len(text)] = text
+    
+    for item in layout.fields:
+        if isinstance(item, Group):
+            for f in item.fields:
+                fill(f)
+        elif isinstance(item, Repeat):
+            items = (item.item,) if isinstance(item.item, Field) else item.item
+            for i in range(item.count):
+                for f in items:
+                    fill(f, item.start - 1 + i * item.size)
+        else:
+            fill(item)
+    buf[-2:] = b'\r\n'
+    return bytes(buf[:size])
+
+
+def run(record_type: str, size: int, count: int) -> None:
+    """1レコード種別のベンチマーク"""
+    layout = LAYOUTS[record_type]
+    rng = random.Random(0)
+    pool = [make_record(layout, size, rng) for _ in range(1000)]
+    records = [pool[i % len(pool)] for i in range(count)]
+    
+    parse = RecordParser.PARSERS[record_type]
+    assert all(parse(r) == legacy_parse(layout, r) for r in pool)
+    
+    start = time.perf_counter()
+    for r in records:
+        legacy_parse(layout, r)
+    legacy = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for r in records:
+        parse(r)
+    compiled = time.perf_counter() - start
+    
+    # 遅延ビューでレースキーの場コードだけを参照する場合
+    start = time.perf_counter()
+    for r in records:
+        RecordParser.view(r)['race_key']['jyo_code']
+    viewed = time.perf_counter() - start
+    
+    # 列の射影でレースキーとデータ区分だけを解析する場合
+    fields = ['race_key', 'data_kubun']
+    start = time.perf_counter()
+    for r in records:
+        RecordParser.parse(r, fields)
+    projected = time.perf_counter() - start
+    
+    print(f"{record_type}: 従来 {count / legacy:>10,.0f} rec/s  "
+          f"コンパイル済 {count / compiled:>10,.0f} rec/s  ({legacy / compiled:.1f}倍)  "
+          f"ビュー(場コードのみ) {count / viewed:>10,.0f} rec/s  "
+          f"射影(レースキー・データ区分) {count / projected:>10,.0f} rec/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='パーサーベンチマーク')
+    parser.add_argument('--count', type=int, default=100000, help='レコード件数')
+    args = parser.parse_args()
+    
+    check_golden()
+    run('SE', 555, args.count)
+    run('RA', 409, args.count)
+    run('O1', 522, args.count)
+    run('WF', 226, args.count)
+
+
+if __name__ == '__main__':
+    main()
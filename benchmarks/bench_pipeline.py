@@ -0,0 +1,97 @@
+"""
+取り込みパイプラインのベンチマーク
+
+合成レコード（1レースあたり RA 1件・SE 16件・O1 1件・WF 1件と UM 16件）を
+JV-Dataファイルとして書き出し、ReplayJVLinkClient で再生して
+JVDataManager.download_setup_data の所要時間と段ごとの計測値を表示する。
+JV-Linkは不要（Linuxでも実行できる）。
+
+--read-delay でJV-Link（COM）の1回の読み込み時間を模擬できる。
+パイプラインが有効に働いていれば、実時間は各段の処理時間の合計ではなく
+最も遅い段の処理時間に近くなる。
+
+実行方法:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --races 5000 --read-delay 0.00005 --workers 2
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_parser import make_record
+from jravan.batch import _extent
+from jravan.layouts import LAYOUTS
+from jravan.manager import JVDataManager
+from jravan.replay import ReplayJVLinkClient
+
+
+# 1レースあたりのレコード数
+RACE_RECORDS = {'RA': 1, 'SE': 16, 'O1': 1, 'WF': 1, 'UM': 16}
+
+# 1ファイルあたりのレース数
+RACES_PER_FILE = 500
+
+
+def record_size(record_type: str) -> int:
+    """レコード長（長さ可変の種別は参照範囲 + 改行コード）"""
+    layout = LAYOUTS[record_type]
+    return layout.length or _extent(layout) + 2
+
+
+def write_capture(path: str, races: int) -> int:
+    """合成レコードのJV-Dataファイルを書き出す"""
+    rng = random.Random(0)
+    pools = {rt: [make_record(LAYOUTS[rt], record_size(rt), rng) for _ in range(200)]
+             for rt in RACE_RECORDS}
+    count = 0
+    for start in range(0, races, RACES_PER_FILE):
+        with open(os.path.join(path, f'RACE{start // RACES_PER_FILE:05d}.jvd'), 'wb') as f:
+            for _ in range(start, min(start + RACES_PER_FILE, races)):
+                for record_type, n in RACE_RECORDS.items():
+                    for _ in range(n):
+                        f.write(rng.choice(pools[record_type]))
+                        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='取り込みパイプラインのベンチマーク')
+    parser.add_argument('--races', type=int, default=2000, help='レース数')
+    parser.add_argument('--workers', type=int, default=0, help='解析ワーカープロセス数')
+    parser.add_argument('--read-delay', type=float, default=0.0,
+                        help='1回の読み込みごとの待ち時間（秒。JV-Linkの読み込みを模擬）')
+    args = parser.parse_args()
+    
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp:
+        capture = os.path.join(tmp, 'capture')
+        os.makedirs(capture)
+        count = write_capture(capture, args.races)
+        
+        client = ReplayJVLinkClient(capture, read_delay=args.read_delay)
+        with JVDataManager(os.path.join(tmp, 'bench.db'), os.path.join(tmp, 'jvdata'),
+                           parse_workers=args.workers, client=client) as manager:
+            start = time.perf_counter()
+            manager.download_setup_data('RACE')
+            elapsed = time.perf_counter() - start
+            stats = manager.pipeline_stats.values()
+    
+    total = sum(stage.busy for stage in stats)
+    slowest = max(stats, key=lambda stage: stage.busy)
+    print(f"{count:,}件  実時間 {elapsed:.1f}秒 ({count / elapsed:,.0f} rec/s)")
+    for stage in stats:
+        print(f"  {stage}")
+    print(f"  各段の処理時間の合計 {total:.1f}秒 / 最も遅い段（{slowest.name}） {slowest.busy:.1f}秒")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+スキーマ生成テーブルのベンチマーク
+
+schema.TABLES の各レコード種別について、パース（コンパイル済み関数）と
+インメモリSQLiteへの一括登録（executemany）のスループットを計測する。
+
+実行方法:
+    python benchmarks/bench_schema.py
+    python benchmarks/bench_schema.py --count 100000
+"""
+
+import argparse
+import random
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_parser import make_record
+from jravan.layouts import LAYOUTS
+from jravan.schema import SCHEMAS
+
+
+# レコード長（改行コード含む）
+RECORD_SIZES = {
+    'KS': 4173,
+    'CH': 3862,
+    'BR': 545,
+    'BN': 477,
+    'HN': 251,
+    'SK': 208,
+    'HC': 60,
+    'CS': 6829,
+    'DM': 303,
+    'TM': 141,
+}
+
+
+def run(record_type: str, count: int) -> None:
+    """1レコード種別のベンチマーク"""
+    schema = SCHEMAS[record_type]
+    rng = random.Random(0)
+    pool = [make_record(LAYOUTS[record_type], RECORD_SIZES[record_type], rng)
+            for _ in range(1000)]
+    records = [pool[i % len(pool)] for i in range(count)]
+    
+    start = time.perf_counter()
+    parsed = [schema.parse(r) for r in records]
+    parse_time = time.perf_counter() - start
+    
+    conn = sqlite3.connect(':memory:')
+    for ddl in schema.ddl:
+        conn.execute(ddl)
+    start = time.perf_counter()
+    with conn:
+        schema.insert(conn.cursor(), parsed)
+    insert_time = time.perf_counter() - start
+    conn.close()
+    
+    print(f"{record_type} ({schema.name:<16}): パース {count / parse_time:>10,.0f} rec/s  "
+          f"登録 {count / insert_time:>10,.0f} rec/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='スキーマ生成テーブルのベンチマーク')
+    parser.add_argument('--count', type=int, default=50000, help='レコード件数')
+    args = parser.parse_args()
+    
+    for record_type in SCHEMAS:
+        run(record_type, args.count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+保存処理（JVDataManager._save_batch_records）のベンチマーク
+
+解析済みレコードを一時ファイルのSQLiteに保存し、テーブルごとの
+登録速度（行/秒）を従来の保存方法と比較する。JV-Linkは不要（Linuxでも実行できる）。
+    
+    従来   : レコードごと・行ごとに cursor.execute（100件ごとにコミット）
+    一括   : バッチをテーブルごとにまとめて executemany（100件ごとにコミット）
+    自動   : 一括 + バッチ件数の自動調整（process_data の既定）
+
+レコードは合成レコード（1レースあたり RA 1件・SE 16件・O1 1件・WF 1件）を使う。
+--replay で保存済みJV-Data（キャプチャ）のディレクトリを指定すると、
+そのファイルのレコードを使う（ReplayJVLinkClient で再生するセットアップと同じデータ）。
+
+実行方法:
+    python benchmarks/bench_writer.py
+    python benchmarks/bench_writer.py --races 5000
+    python benchmarks/bench_writer.py --replay capture/
+"""
+
+import argparse
+import glob
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_parser import make_record
+from bench_pipeline import RACE_RECORDS, record_size
+from jravan.files import open_mmap, records as file_records
+from jravan.layouts import LAYOUTS
+from jravan.manager import JVDataManager
+from jravan.parser import parse_chunk
+from jravan.pipeline import BatchSizer
+
+
+# 比較するテーブル（レコード種別 → テーブル名）
+TABLES = {'RA': 'races', 'SE': 'results', 'O1': 'odds', 'WF': 'weights', 'YS': 'schedules'}
+
+
+def synthetic_records(races: int) -> list:
+    """合成レコード（1レース分ずつ並べる）"""
+    rng = random.Random(0)
+    pools = {rt: [make_record(LAYOUTS[rt], record_size(rt), rng) for _ in range(200)]
+             for rt in RACE_RECORDS if rt != 'UM'}
+    raw = []
+    for i in range(races):
+        for record_type, pool in pools.items():
+            for _ in range(RACE_RECORDS[record_type]):
+                raw.append(pool[i % len(pool)])
+    return raw
+
+
+def replay_records(path: str) -> list:
+    """キャプチャのディレクトリ内のレコード"""
+    raw = []
+    for filename in sorted(glob.glob(os.path.join(path, '**', '*.jvd'), recursive=True)):
+        with open_mmap(filename) as buf:
+            raw.extend(bytes(record) for record in file_records(buf))
+    return raw
+
+
+def legacy_save(manager: JVDataManager, records: list, conn) -> None:
+    """従来の保存方法（レコードごと・行ごとに execute）"""
+    conn.execute('BEGIN')
+    cursor = conn.cursor()
+    for record in records:
+        rows = manager._row_builders.get(record['record_type'])
+        if rows:
+            sql, values = rows(record)
+            for value in values:
+                cursor.execute(sql, value)
+    conn.commit()
+
+
+def save_all(save, records: list, sizer=None) -> None:
+    """バッチに分けて保存"""
+    start = 0
+    while start < len(records):
+        size = sizer.size if sizer else 100
+        began = time.perf_counter()
+        save(records[start:start + size])
+        if sizer:
+            sizer.update(min(size, len(records) - start), time.perf_counter() - began)
+        start += size
+
+
+def run(records: list, mode: str) -> dict:
+    """1つの保存方法で保存し、テーブルごとの所要時間を返す（テーブルごとに新しいデータベース）"""
+    elapsed = {}
+    for record_type in list(TABLES) + ['ALL']:
+        group = [r for r in records if record_type in ('ALL', r['record_type'])]
+        if not group:
+            continue
+        with tempfile.TemporaryDirectory() as tmp:
+            manager = JVDataManager(os.path.join(tmp, 'bench.db'), tmp, journal=False)
+            with manager.get_db_connection() as conn:
+                if mode == 'legacy':
+                    save = lambda batch: legacy_save(manager, batch, conn)
+                else:
+                    save = lambda batch: manager._save_batch_records(batch, conn)
+                sizer = BatchSizer(target=manager.WRITE_BATCH_SECONDS) if mode == 'auto' else None
+                start = time.perf_counter()
+                save_all(save, group, sizer)
+                elapsed[record_type] = time.perf_counter() - start
+            manager.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='保存処理のベンチマーク')
+    parser.add_argument('--races', type=int, default=2000, help='合成レコードのレース数')
+    parser.add_argument('--replay', metavar='DIR', help='保存済みJV-Data（キャプチャ）のディレクトリ')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    
+    raw = replay_records(args.replay) if args.replay else synthetic_records(args.races)
+    records, _, _ = parse_chunk(raw, JVDataManager.STORED_FIELDS)
+    
+    # テーブルごとの行数（登録値タプルの数。全体は組番オッズなども含む）
+    rows = dict.fromkeys(list(TABLES) + ['ALL'], 0)
+    with tempfile.TemporaryDirectory() as tmp:
+        probe = JVDataManager(os.path.join(tmp, 'probe.db'), tmp, journal=False)
+        for record in records:
+            builder = probe._row_builders.get(record['record_type'])
+            if builder:
+                count = len(builder(record)[1])
+                rows['ALL'] += count
+                if record['record_type'] in rows:
+                    rows[record['record_type']] += count
+        probe.close()
+    
+    print(f"{len(records):,}件 ({args.replay or f'合成 {args.races:,}レース'})")
+    results = {mode: run(records, mode) for mode in ('legacy', 'executemany', 'auto')}
+    
+    print(f"  {'テーブル':12} {'行数':>10} {'従来':>14} {'一括':>14} {'自動':>14}")
+    for record_type in list(TABLES) + ['ALL']:
+        if record_type not in results['legacy']:
+            continue
+        table = TABLES.get(record_type, '(全体)')
+        cells = [f"{rows[record_type] / results[mode][record_type]:10,.0f}行/秒"
+                 for mode in ('legacy', 'executemany', 'auto')]
+        print(f"  {table:12} {rows[record_type]:10,} {' '.join(cells)}")
+
+
+if __name__ == '__main__':
+    main()
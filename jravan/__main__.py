@@ -8,6 +8,7 @@ JRA-VAN Client メインエントリーポイント
 
 import sys
 import argparse
+from functools import partial
 from pathlib import Path
 
 # プロジェクトルートをパスに追加（開発時用）
@@ -15,6 +16,44 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from jravan.manager import JVDataManager
 from jravan.client import JVLinkClient
+from jravan.replay import ReplayJVLinkClient, RecordingJVLinkClient, spec_client
+from jravan.orchestrator import FetchOrchestrator, FetchTask
+
+
+def create_client(args) -> JVLinkClient:
+    """引数に応じたJV-Linkクライアントを生成"""
+    if args.replay:
+        client = ReplayJVLinkClient(args.replay, download_interval=args.replay_interval)
+    else:
+        client = JVLinkClient()
+    if args.capture:
+        client = RecordingJVLinkClient(client, args.capture)
+    return client
+
+
+def parse_specs(text: str, mode: str) -> list:
+    """'RACE:2,BLOD,MING:1' 形式（データ種別[:優先度]）を FetchTask のリストにする"""
+    tasks = []
+    for item in text.split(','):
+        spec, _, priority = item.strip().partition(':')
+        tasks.append(FetchTask(spec.upper(), int(priority or 0), mode))
+    return tasks
+
+
+def run_specs(manager: JVDataManager, args, mode: str) -> int:
+    """--specs の複数データ種別を並列に取得"""
+    factory = partial(spec_client, args.replay, args.replay_interval) if args.replay else None
+    if args.capture:
+        print("※ --specs ではキャプチャを記録しません")
+    orchestrator = FetchOrchestrator(manager, args.max_concurrent, factory)
+    try:
+        results = orchestrator.run(parse_specs(args.specs, mode))
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return 1
+    for task, success in results.items():
+        print(f"{task.data_spec}: {'完了' if success else 'エラー'}")
+    return 0 if all(results.values()) else 1
 
 
 def main():
@@ -30,9 +69,33 @@ def main():
   # 初期データ取得（セットアップ）
   jravan --setup
   
+  # 初期データ取得（解析を4プロセスで並列化）
+  jravan --setup --workers 4
+  
+  # 初期データ取得（一括取り込みモード。インデックスは最後にまとめて作成）
+  jravan --setup --bulk
+  
+  # 中断したセットアップを最初から取り込み直す（通常は完了済みファイルから再開）
+  jravan --setup --no-resume
+  
   # データ更新
   jravan --update
   
+  # 複数のデータ種別を並列に更新（優先度の高い順に最大2種別ずつ）
+  jravan --update --specs RACE:2,BLOD:1,MING,YSCH,HOSE --max-concurrent 2
+  
+  # 保存済みJV-Dataファイルを再生して取り込み（JV-Link不要）
+  jravan --setup --replay jvdata/capture
+  
+  # 取得したレコードを再生用に記録
+  jravan --setup --capture jvdata/capture
+  
+  # 保存済みJV-Dataファイル（.jvd）を直接読み込んで取り込み（JV-Link不要）
+  jravan --load jvdata/capture --workers 4
+  
+  # ジャーナルからレース結果（SE）を作り直す（2015〜2024年分。JV-Link不要）
+  jravan --reparse --record-types SE --race-key-from 2015 --race-key-to 2024
+  
   # 統計情報表示
   jravan --stats
         """
@@ -50,12 +113,32 @@ def main():
         help='初期データ取得（初回実行時）'
     )
     
+    parser.add_argument(
+        '--bulk',
+        action='store_true',
+        help='--setup を一括取り込みモードで実行（インデックスを後からまとめて作成・同期を省略して高速化）'
+    )
+    
     parser.add_argument(
         '--update',
         action='store_true',
         help='差分データ更新'
     )
     
+    parser.add_argument(
+        '--load',
+        nargs='?',
+        const='',
+        metavar='DIR',
+        help='保存済みJV-Dataファイル（.jvd）を直接読み込んで取り込み（DIR省略時は--save-path）'
+    )
+    
+    parser.add_argument(
+        '--reparse',
+        action='store_true',
+        help='ジャーナルに記録した生レコードからテーブルを作り直す'
+    )
+    
     parser.add_argument(
         '--stats',
         action='store_true',
@@ -69,6 +152,20 @@ def main():
         help='取得するデータ種別（デフォルト: RACE）'
     )
     
+    parser.add_argument(
+        '--specs',
+        metavar='SPEC[:PRIORITY],...',
+        help='複数のデータ種別を並列に取得（--setup / --update と併用。例: RACE:2,BLOD,MING）'
+    )
+    
+    parser.add_argument(
+        '--max-concurrent',
+        type=int,
+        default=2,
+        metavar='N',
+        help='--specs で同時に取得するデータ種別の数（デフォルト: 2）'
+    )
+    
     parser.add_argument(
         '--db',
         default='jravan.db',
@@ -81,10 +178,68 @@ def main():
         help='JV-Dataファイル保存先（デフォルト: jvdata）'
     )
     
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=0,
+        help='レコード解析のワーカープロセス数（デフォルト: 0 = 使用しない）'
+    )
+    
+    parser.add_argument(
+        '--replay',
+        metavar='DIR',
+        help='JV-Linkの代わりに保存済みJV-Dataファイル（キャプチャ）を再生'
+    )
+    
+    parser.add_argument(
+        '--replay-interval',
+        type=float,
+        default=0.0,
+        metavar='SEC',
+        help='再生時の1ファイルあたりのダウンロード時間（秒、デフォルト: 0 = 待ちなし）'
+    )
+    
+    parser.add_argument(
+        '--capture',
+        metavar='DIR',
+        help='取得したレコードを再生用のキャプチャとして記録'
+    )
+    
+    parser.add_argument(
+        '--no-resume',
+        action='store_true',
+        help='チェックポイントを無視して全ファイルを取り込み直す'
+    )
+    
+    parser.add_argument(
+        '--no-journal',
+        action='store_true',
+        help='取得した生レコードをジャーナルに記録しない'
+    )
+    
+    parser.add_argument(
+        '--record-types',
+        metavar='TYPES',
+        help='再解析するレコード種別（カンマ区切り。例: RA,SE。デフォルト: すべて）'
+    )
+    
+    parser.add_argument(
+        '--race-key-from',
+        metavar='KEY',
+        help='再解析するレースキーの下限（前方一致。例: 2015）'
+    )
+    
+    parser.add_argument(
+        '--race-key-to',
+        metavar='KEY',
+        help='再解析するレースキーの上限（前方一致。例: 2024）'
+    )
+    
     args = parser.parse_args()
     
     # 引数が何もない場合はヘルプ表示
-    if not any([args.test, args.setup, args.update, args.stats]):
+    if not any([args.test, args.setup, args.update, args.load is not None, args.reparse,
+                args.stats]):
         parser.print_help()
         return 0
     
@@ -93,7 +248,7 @@ def main():
         print("JRA-VAN接続テスト開始...")
         print("="*50)
         
-        client = JVLinkClient()
+        client = create_client(args)
         ret = client.initialize("TEST")
         
         if ret == 0:
@@ -108,21 +263,45 @@ def main():
         return 0 if ret == 0 else 1
     
     # データマネージャー初期化
-    with JVDataManager(args.db, args.save_path) as manager:
+    with JVDataManager(args.db, args.save_path, parse_workers=args.workers,
+                       client=create_client(args), resume=not args.no_resume,
+                       journal=not args.no_journal) as manager:
         
         # セットアップ
         if args.setup:
-            print(f"初期データ取得開始: {args.data_spec}")
+            print(f"初期データ取得開始: {args.specs or args.data_spec}")
             print("※数時間かかる場合があります")
-            success = manager.download_setup_data(args.data_spec)
+            if args.specs:
+                if args.bulk:
+                    print("※ --specs では一括取り込みモードを使用しません")
+                return run_specs(manager, args, 'setup')
+            if args.bulk:
+                print("一括取り込みモード: インデックスは取り込み後にまとめて作成します"
+                      "（中断した場合は次回起動時に作り直します）")
+            success = manager.download_setup_data(args.data_spec, bulk=args.bulk)
             return 0 if success else 1
         
         # 更新
         if args.update:
             print("差分データ更新開始...")
+            if args.specs:
+                return run_specs(manager, args, 'update')
             success = manager.update_data(data_spec=args.data_spec)
             return 0 if success else 1
         
+        # ファイル取り込み
+        if args.load is not None:
+            print(f"ファイル取り込み開始: {args.load or args.save_path}")
+            success = manager.load_files(args.load or None)
+            return 0 if success else 1
+        
+        # 再解析
+        if args.reparse:
+            print("ジャーナルから再解析開始...")
+            record_types = args.record_types.split(',') if args.record_types else None
+            success = manager.reparse(record_types, args.race_key_from, args.race_key_to)
+            return 0 if success else 1
+        
         # 統計情報
         if args.stats:
             print("データベース統計情報:")
@@ -0,0 +1,256 @@
+"""
+JV-Data Async Module
+asyncio から JVDataManager を使うためのラッパー
+
+JV-Link（COM）の呼び出しはすべて専用のスレッド1本（COMスレッド）で行い、
+イベントループはブロックしない。データベースへの書き込みも専用の
+スレッド1本で行う。
+    
+    async with AsyncJVDataManager('jravan.db') as manager:
+        # 取得したレコードを順に受け取る（save=True で保存も行う）
+        async for record in manager.stream('RACE', '20240101000000'):
+            ...
+        
+        # JVDataManager の取り込み処理をCOMスレッドで実行
+        await manager.update_data()
+
+stream ではダウンロード待ち（gets() が -3）を asyncio.sleep で待つため、
+待っている間も同じイベントループで他の処理（Webリクエストなど）を実行できる。
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .manager import JVDataManager
+from .parser import InternTable, parse_chunk
+from .pipeline import DownloadWaiter, StageFailure
+
+logger = logging.getLogger(__name__)
+
+
+def _com_initialize() -> None:
+    """COMスレッドの初期化（pywin32がない場合は何もしない）"""
+    try:
+        import pythoncom
+    except ImportError:
+        return
+    pythoncom.CoInitialize()
+
+
+class AsyncJVDataManager:
+    """JVDataManager の asyncio 版"""
+    
+    def __init__(self, db_path: str = "jravan.db", save_path: str = "jvdata", **kwargs: Any):
+        """
+        初期化
+        
+        Args:
+            db_path: SQLiteデータベースパス
+            save_path: JV-Dataファイル保存先パス
+            **kwargs: JVDataManager のその他の引数（parse_workers, client など）
+        """
+        self._com = ThreadPoolExecutor(max_workers=1, thread_name_prefix='jravan-com',
+                                       initializer=_com_initialize)
+        self._db = ThreadPoolExecutor(max_workers=1, thread_name_prefix='jravan-db')
+        self.manager = JVDataManager(db_path, save_path, **kwargs)
+    
+    async def _call(self, func: Callable, *args: Any) -> Any:
+        """COMスレッドで実行"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._com, partial(func, *args))
+    
+    async def download_setup_data(self, data_spec: str = "RACE") -> bool:
+        """セットアップデータ取得（JVDataManager.download_setup_data をCOMスレッドで実行）"""
+        return await self._call(self.manager.download_setup_data, data_spec)
+    
+    async def update_data(self, from_date: str = None, data_spec: str = "DIFF") -> bool:
+        """差分データ更新（JVDataManager.update_data をCOMスレッドで実行）"""
+        return await self._call(self.manager.update_data, from_date, data_spec)
+    
+    async def get_realtime_data(self, data_spec: str, race_key: str = "") -> bool:
+        """リアルタイムデータ取得（JVDataManager.get_realtime_data をCOMスレッドで実行）"""
+        return await self._call(self.manager.get_realtime_data, data_spec, race_key)
+    
+    def stream(self, data_spec: str, from_time: str = "", option: int = 1,
+                     save: bool = False,
+                     fields: Optional[Mapping[str, Iterable[str]]] = None
+                     ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        蓄積系データを取得し、解析したレコードを順に返す
+        
+        gets() は PARSE_CHUNK_SIZE 件ずつまとめてCOMスレッドで呼び出し、
+        解析はイベントループの既定のエグゼキュータで行う。
+        
+        Args:
+            data_spec: データ種別
+            from_time: 取得開始日時（YYYYMMDDhhmmss）
+            option: オプション（1: 通常, 2: 今週, 3: セットアップ）
+            save: レコードをデータベースにも保存する（書き込みタスク経由。保存に失敗した
+                  場合は読み込みを止めて例外を送出する）
+            fields: レコード種別 → 解析するフィールド（None の場合は全フィールド）
+        
+        Returns:
+            解析結果辞書の非同期イテレータ（async for で受け取る）
+        """
+        async def open_data() -> int:
+            ret, read_count, download_count, _ = await self._call(
+                self.manager.jvlink.open, data_spec, from_time, option)
+            if ret >= 0:
+                logger.info(f"読込対象: {read_count}ファイル, ダウンロード: {download_count}ファイル")
+            return ret
+        
+        return self._stream(open_data, save, fields)
+    
+    def stream_realtime(self, data_spec: str, race_key: str = "", save: bool = False,
+                              fields: Optional[Mapping[str, Iterable[str]]] = None
+                              ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        速報系データを取得し、解析したレコードを順に返す
+        
+        Args:
+            data_spec: データ種別（JVLinkClient.REALTIME_SPEC参照）
+            race_key: レースキー（空文字で当日全レース）
+            save: レコードをデータベースにも保存する（書き込みタスク経由。保存に失敗した
+                  場合は読み込みを止めて例外を送出する）
+            fields: レコード種別 → 解析するフィールド（None の場合は全フィールド）
+        
+        Returns:
+            解析結果辞書の非同期イテレータ（async for で受け取る）
+        """
+        async def open_data() -> int:
+            return await self._call(self.manager.jvlink.open_realtime, data_spec, race_key)
+        
+        return self._stream(open_data, save, fields)
+    
+    async def _stream(self, open_data: Callable, save: bool,
+                      fields: Optional[Mapping[str, Iterable[str]]]
+                      ) -> AsyncIterator[Dict[str, Any]]:
+        """JVOpen / JVRTOpen 後の読み込み・解析（・保存）"""
+        jvlink = self.manager.jvlink
+        if not await self._call(self.manager.initialize_jvlink):
+            raise RuntimeError("JV-Link初期化エラー")
+        
+        ret = await open_data()
+        if ret < 0:
+            raise RuntimeError(f"JVOpenエラー: {jvlink.get_error_message(ret)}")
+        
+        # 名称のインターン表はストリームごと
+        table = InternTable()
+        loop = asyncio.get_running_loop()
+        waiter = DownloadWaiter(self.manager.DOWNLOAD_POLL_INITIAL, self.manager.DOWNLOAD_POLL_MAX)
+        errors = 0
+        
+        writer = None
+        failure = StageFailure()
+        if save:
+            pending: asyncio.Queue = asyncio.Queue(maxsize=self.manager.PIPELINE_QUEUE_SIZE)
+            writer = asyncio.create_task(self._write(pending, failure))
+        
+        try:
+            while True:
+                ret, chunk = await self._call(self._read_chunk)
+                if chunk:
+                    records, _, _ = await loop.run_in_executor(None, parse_chunk, chunk, fields,
+                                                               table)
+                    if writer:
+                        # 変更検出のハッシュも記録する（省く判定はしない）
+                        _, hashes = self.manager._detect_changes(chunk)
+                        await pending.put((records, hashes))
+                        # 保存に失敗した場合は読み込みを止めて例外を送出する
+                        failure.raise_error()
+                    for record in records:
+                        yield record
+                
+                if ret == 0:
+                    logger.info("全データ読み込み完了")
+                    break
+                elif ret == -3:
+                    # ダウンロード中（イベントループを止めずに待つ）
+                    start = loop.time()
+                    downloaded = await self._call(jvlink.status)
+                    delay = waiter.next_delay(downloaded)
+                    if delay:
+                        await asyncio.sleep(delay)
+                    waiter.waited += loop.time() - start
+                elif ret < 0:
+                    logger.error(f"JVReadエラー: {jvlink.get_error_message(ret)}")
+                    errors += 1
+                    if errors > 10:
+                        logger.error("エラーが多いため処理を中断")
+                        break
+        finally:
+            await self._call(jvlink.close)
+            if writer:
+                await pending.put(None)
+                await writer
+            self.manager.download_wait = waiter.waited
+            if waiter.polls:
+                logger.info(f"ダウンロード待ち: {waiter.waited:.1f}秒 (進捗確認 {waiter.polls}回)")
+        
+        # 最後のバッチの保存エラー
+        failure.raise_error()
+    
+    def _read_chunk(self) -> Tuple[int, List[bytes]]:
+        """
+        gets() を PARSE_CHUNK_SIZE 件まで続けて呼び出す（COMスレッドで実行）
+        
+        Returns:
+            (最後の戻り値コード, レコードのリスト)。上限まで読んだ場合の戻り値コードは1
+        """
+        chunk = []
+        gets = self.manager.jvlink.gets
+        while len(chunk) < self.manager.PARSE_CHUNK_SIZE:
+            ret, data, filename = gets()
+            if ret > 0:
+                chunk.append(data)
+            elif ret == -1:
+                # ファイル切り替わり
+                logger.info(f"ファイル処理中: {filename}")
+            else:
+                return ret, chunk
+        return 1, chunk
+    
+    async def _write(self, pending: asyncio.Queue, failure: StageFailure) -> None:
+        """
+        書き込みタスク（保存はデータベース用のスレッドで行う）
+        
+        例外は failure に記録し（stream が次のバッチで送出する）、以降は保存せずに
+        終端まで読み捨てる（stream がキューで待たないようにするため）。
+        """
+        loop = asyncio.get_running_loop()
+        processed = 0
+        while True:
+            item = await pending.get()
+            if item is None:
+                break
+            if failure.failed:
+                continue
+            records, hashes = item
+            try:
+                await loop.run_in_executor(self._db, self._save, records, hashes)
+            except Exception as e:
+                failure.record('保存', e)
+                continue
+            processed += len(records)
+        logger.info(f"処理済: {processed}件")
+    
+    def _save(self, records: List[Dict[str, Any]], hashes: List[tuple]) -> None:
+        """レコードをまとめて保存（データベース用のスレッドで実行）"""
+        self.manager._save_batch_records(records, hashes=hashes)
+    
+    async def close(self) -> None:
+        """JV-Link・データベース接続を閉じてスレッドを終了"""
+        # 実行中の保存が終わってからデータベース接続を閉じる
+        await self._call(self._db.shutdown)
+        await self._call(self.manager.close)
+        self._com.shutdown()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+        return False
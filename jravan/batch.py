@@ -0,0 +1,351 @@
+"""
+JV-Data Batch Parser Module
+固定長レコードをまとめてNumPy構造化配列に変換するモジュール
+
+同一種別のレコードN件は N×L のバイト行列とみなせるため、
+layouts.py のフィールド位置ごとに列単位で一括変換する。
+
+変換規則:
+    'int'  : 整数（数字以外を含む・空白のみの場合は MISSING）
+    'ymd'  : YYYYMMDD の整数
+    'hms'  : HHMMSS の整数
+    'time' : 1/10秒単位の整数（M:SS.f → 分×600 + 秒×10 + f）
+    'str'  : 固定長バイト列（Shift-JISのまま。decode_text で必要な列だけデコード）
+             dictionary=True の場合、名称などの長い文字列はインターン表
+             （parser.InternTable）で採番した整数コード
+
+繰り返し項目は固定長の部分配列となり、空き要素も除外せずに残る
+（キーが MISSING または空文字の要素が空き）。
+
+NumPyはオプション依存（pip install jra-van-client[analysis]）。
+"""
+
+from array import array
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .layouts import LAYOUTS, Field, Group, Layout, Repeat, project
+
+
+# 数値に変換できない項目の値
+MISSING = -1
+
+# dictionary=True の場合に辞書コード化する文字列フィールドの最小長（名称など）
+DICTIONARY_MIN_LENGTH = 8
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("numpy is required: pip install jra-van-client[analysis]")
+
+
+def _encoded(field: Field, dictionary: bool) -> bool:
+    """辞書コード化するフィールドか"""
+    return dictionary and field.type == 'str' and field.length >= DICTIONARY_MIN_LENGTH
+
+
+def _field_dtype(field: Field, dictionary: bool = False):
+    """フィールド1つ分の型"""
+    if _encoded(field, dictionary):
+        return 'i4'
+    if field.type == 'str':
+        return f'S{field.length}'
+    # 10桁以上はint32に収まらない
+    return 'i8' if field.length > 9 else 'i4'
+
+
+def _item_dtype(items, dictionary: bool) -> list:
+    return [(f.name, _field_dtype(f, dictionary)) for f in items]
+
+
+def batch_dtype(record_type: str, dictionary: bool = False,
+                fields: Optional[Iterable[str]] = None) -> 'np.dtype':
+    """
+    レコード種別の構造化配列の型
+    
+    グループは入れ子の構造体、繰り返し項目は部分配列になる。
+    
+    Args:
+        record_type: レコード種別
+        dictionary: 名称などの長い文字列フィールドを整数コードにする
+        fields: 対象フィールド（layouts.project と同じ指定。None の場合は全フィールド）
+    
+    Returns:
+        構造化配列の型
+    """
+    _require_numpy()
+    return _layout_dtype(_layout(record_type, fields), dictionary)
+
+
+def _layout(record_type: str, fields: Optional[Iterable[str]]) -> Layout:
+    if fields is None:
+        return LAYOUTS[record_type]
+    return _projected(record_type, tuple(fields))
+
+
+@lru_cache(maxsize=None)
+def _projected(record_type: str, fields: tuple) -> Layout:
+    return project(LAYOUTS[record_type], fields)
+
+
+@lru_cache(maxsize=None)
+def _layout_dtype(layout: Layout, dictionary: bool) -> 'np.dtype':
+    descr = []
+    for item in layout.fields:
+        if isinstance(item, Group):
+            descr.append((item.name, _item_dtype(item.fields, dictionary)))
+        elif isinstance(item, Repeat):
+            if isinstance(item.item, Field):
+                descr.append((item.name, _field_dtype(item.item, dictionary), (item.count,)))
+            else:
+                descr.append((item.name, _item_dtype(item.item, dictionary), (item.count,)))
+        else:
+            descr.append((item.name, _field_dtype(item, dictionary)))
+    return np.dtype(descr)
+
+
+@lru_cache(maxsize=None)
+def _extent(layout: Layout) -> int:
+    """レイアウトが参照する最終バイト位置"""
+    end = 0
+    for item in layout.fields:
+        if isinstance(item, Group):
+            end = max([end] + [f.start + f.length - 1 for f in item.fields])
+        elif isinstance(item, Repeat):
+            items = (item.item,) if isinstance(item.item, Field) else item.item
+            overhang = max(f.start + f.length - 1 for f in items) - item.size
+            end = max(end, item.start - 1 + item.count * item.size + max(overhang, 0))
+        else:
+            end = max(end, item.start + item.length - 1)
+    return end
+
+
+def _matrix(records: List[bytes], width: int) -> 'np.ndarray':
+    """
+    レコードのリストを N×width のバイト行列に変換
+    
+    全レコードが同じ長さなら連結したバッファをそのまま行列として扱う。
+    長さが異なる場合は不足分を空白で埋め、超過分は切り捨てる。
+    """
+    lengths = {len(r) for r in records}
+    if len(lengths) == 1:
+        length = lengths.pop()
+        if length >= width:
+            matrix = np.frombuffer(b''.join(records), dtype=np.uint8)
+            return matrix.reshape(len(records), length)[:, :width]
+    
+    matrix = np.full((len(records), width), 0x20, dtype=np.uint8)
+    for i, r in enumerate(records):
+        row = np.frombuffer(r[:width], dtype=np.uint8)
+        matrix[i, :len(row)] = row
+    return matrix
+
+
+def _digits(cols: 'np.ndarray', dtype) -> 'np.ndarray':
+    """
+    ASCII数字の列（最終軸がバイト位置）を整数に一括変換
+    
+    int() と同様に前後の空白は無視し、途中の空白・数字以外の文字・
+    空白のみの場合は MISSING とする。
+    """
+    # 全桁が数字の要素は桁の重みとの内積で求める
+    digit = (cols >= 0x30) & (cols <= 0x39)
+    full = digit.all(axis=-1)
+    weights = 10 ** np.arange(cols.shape[-1] - 1, -1, -1, dtype=np.int64)
+    value = (cols.astype(np.int64) - 0x30) @ weights
+    if full.all():
+        return value.astype(dtype)
+    
+    # 空白を含む要素は1桁ずつ走査する
+    rest = cols[~full]
+    shape = rest.shape[:-1]
+    partial = np.zeros(shape, dtype=np.int64)
+    seen = np.zeros(shape, dtype=bool)
+    ended = np.zeros(shape, dtype=bool)
+    bad = np.zeros(shape, dtype=bool)
+    for j in range(rest.shape[-1]):
+        c = rest[..., j]
+        is_digit = (c >= 0x30) & (c <= 0x39)
+        space = c == 0x20
+        bad |= ~(is_digit | space) | (is_digit & ended)
+        ended |= space & seen
+        seen |= is_digit
+        partial = np.where(is_digit, partial * 10 + (c - 0x30), partial)
+    partial[bad | ~seen] = MISSING
+    value[~full] = partial
+    return value.astype(dtype)
+
+
+def _tenths(cols: 'np.ndarray') -> 'np.ndarray':
+    """タイム（M SS f の4桁）を1/10秒単位に変換"""
+    minutes = _digits(cols[..., 0:1], 'i4')
+    seconds = _digits(cols[..., 1:3], 'i4')
+    fraction = _digits(cols[..., 3:4], 'i4')
+    value = minutes * 600 + seconds * 10 + fraction
+    value[(minutes < 0) | (seconds < 0) | (fraction < 0)] = MISSING
+    return value
+
+
+def _blocks(matrix: 'np.ndarray', repeat: Repeat) -> 'np.ndarray':
+    """
+    繰り返し領域を N×count×幅 のビューに変換（コピーなし）
+    
+    ブロック長を超えて次のブロックにかかる項目があるため、
+    幅はブロック内で参照する最終位置までとする。
+    """
+    items = (repeat.item,) if isinstance(repeat.item, Field) else repeat.item
+    width = max(repeat.size, max(f.start + f.length - 1 for f in items))
+    region = matrix[:, repeat.start - 1:]
+    row, col = region.strides
+    return np.lib.stride_tricks.as_strided(
+        region, shape=(len(matrix), repeat.count, width),
+        strides=(row, repeat.size * col, col), writeable=False)
+
+
+def _column(block: 'np.ndarray', field: Field) -> 'np.ndarray':
+    """
+    フィールド1つ分の列を変換
+    
+    block の最終軸がバイト位置（繰り返し項目の場合はブロック内の相対位置）。
+    """
+    cols = block[..., field.start - 1:field.start - 1 + field.length]
+    if field.type == 'str':
+        cols = np.ascontiguousarray(cols)
+        return cols.view(f'S{field.length}').reshape(cols.shape[:-1])
+    if field.type == 'time':
+        return _tenths(cols)
+    return _digits(cols, _field_dtype(field))
+
+
+def parse_batch(record_type: str, records: Iterable[bytes], dictionary: bool = False,
+                fields: Optional[Iterable[str]] = None, table=None):
+    """
+    同一種別のレコードをまとめて構造化配列に変換
+    
+    dictionary=True の場合、名称などの長い文字列フィールドは固定長バイト列の
+    代わりに整数コード（int32）で格納し、コード → 値（デコード済みの文字列）の
+    リストを併せて返す。騎手名・馬主名のように同じ値が繰り返し現れる列のメモリを
+    大きく削減できる。コードはインターン表 table で採番するため、同じ表を渡す限り
+    バッチ・列をまたいで同じ値は同じコードになる（リストは表と共有され、後の
+    バッチで採番した値も追加される）。
+    
+    fields を指定した場合は指定したフィールドの列だけを変換する
+    （参照範囲外のバイトは行列にも取り込まない）。
+    
+    Args:
+        record_type: レコード種別（layouts.LAYOUTS に定義された種別）
+        records: レコードデータのリスト
+        dictionary: 長い文字列フィールドを整数コードにする
+        fields: 対象フィールド（'race_key'、'result.kakutei_jyuni' など。
+                None の場合は全フィールド）
+        table: 辞書コードを採番するインターン表（parser.InternTable。
+               None の場合は RecordParser.intern_table）
+    
+    Returns:
+        レコード件数分の構造化配列
+        （dictionary=True の場合は (構造化配列, コード → 値のリスト) のタプル）
+    
+    Examples:
+        >>> arr = parse_batch('SE', se_records)
+        >>> winners = arr[arr['result']['kakutei_jyuni'] == 1]
+        >>> names = decode_text(winners['bamei'])
+        
+        >>> table = InternTable()
+        >>> arr, names = parse_batch('SE', se_records[:3000], dictionary=True, table=table)
+        >>> more, names = parse_batch('SE', se_records[3000:], dictionary=True, table=table)
+        >>> jockeys = np.array(names, dtype=object)[more['jockey']['name']]
+        
+        >>> arr = parse_batch('SE', se_records, fields=['race_key', 'umaban', 'result.time'])
+    """
+    _require_numpy()
+    if dictionary and table is None:
+        # parser は batch をインポートするため実行時に参照する
+        from .parser import RecordParser
+        table = RecordParser.intern_table
+    layout = _layout(record_type, fields)
+    records = list(records)
+    out = np.empty(len(records), dtype=_layout_dtype(layout, dictionary))
+    if not records:
+        return (out, table.names) if dictionary else out
+    
+    def column(block, field):
+        value = _column(block, field)
+        if _encoded(field, dictionary):
+            # 列内の異なる値ごとに1回だけ表を引く
+            values, inverse = np.unique(value, return_inverse=True)
+            codes = np.fromiter((table.code(bytes(v)) for v in values), dtype=np.int32,
+                                count=len(values))
+            value = codes[inverse].reshape(value.shape)
+        return value
+    
+    matrix = _matrix(records, _extent(layout))
+    for item in layout.fields:
+        if isinstance(item, Group):
+            for f in item.fields:
+                out[item.name][f.name] = column(matrix, f)
+        elif isinstance(item, Repeat):
+            blocks = _blocks(matrix, item)
+            if isinstance(item.item, Field):
+                out[item.name] = column(blocks, item.item)
+            else:
+                for f in item.item:
+                    out[item.name][f.name] = column(blocks, f)
+        else:
+            out[item.name] = column(matrix, item)
+    return (out, table.names) if dictionary else out
+
+
+def decode_text(column: 'np.ndarray', encoding: str = 'shift-jis') -> 'np.ndarray':
+    """
+    固定長バイト列の列を文字列にデコード（前後の空白削除）
+    
+    Args:
+        column: parse_batch の結果の文字列フィールド列
+        encoding: 文字コード
+    
+    Returns:
+        文字列の配列
+    """
+    _require_numpy()
+    return np.char.strip(np.char.decode(column, encoding, 'ignore'))
+
+
+def _int(raw: bytes) -> int:
+    """_digits と同じ規則で1項目を整数に変換（NumPyがない場合用）"""
+    raw = bytes(raw).strip(b' ')
+    return int(raw) if raw.isdigit() else MISSING
+
+
+def parse_columns(data: bytes, repeat: Repeat) -> Dict[str, Any]:
+    """
+    1レコード分の繰り返し項目を項目ごとの配列に一括変換
+    
+    Repeat.columnar が指定された項目（O2〜O6の組番オッズなど）で使用する。
+    キーが0以下・変換できない要素は除外する。
+    NumPyがない場合は array.array('q') で返す。
+    
+    Args:
+        data: レコードデータ
+        repeat: 繰り返し項目（数値項目のみ）
+    
+    Returns:
+        項目名 → 値の配列
+    """
+    key = next(f for f in repeat.item if f.name == repeat.key)
+    if np is None:
+        values = {f.name: array('q') for f in repeat.item}
+        start = repeat.start - 1
+        for o in range(start, start + repeat.count * repeat.size, repeat.size):
+            if _int(data[o + key.start - 1:o + key.start - 1 + key.length]) > 0:
+                for f in repeat.item:
+                    values[f.name].append(_int(data[o + f.start - 1:o + f.start - 1 + f.length]))
+        return values
+    
+    blocks = _blocks(_matrix([data], _extent(Layout('', '', (repeat,)))), repeat)[0]
+    keys = _column(blocks, key)
+    keep = keys > 0
+    return {f.name: (keys if f is key else _column(blocks, f))[keep] for f in repeat.item}
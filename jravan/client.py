@@ -11,7 +11,7 @@ Date: 2025-08-28
 import sys
 import time
 import os
-from typing import Tuple, Optional, Dict, Any
+from typing import Tuple, Optional, Dict, Any, Union
 from datetime import datetime
 import logging
 
@@ -22,13 +22,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# win32comのインポート（必須）
+# win32comのインポート（JV-Link接続時のみ必須。ReplayJVLinkClient は不要）
 try:
     import win32com.client
 except ImportError:
-    logger.error("win32comがインストールされていません")
-    logger.error("pip install pywin32 を実行してください")
-    raise ImportError("pywin32 is required")
+    win32com = None
 
 
 class JVLinkClient:
@@ -107,11 +105,17 @@ class JVLinkClient:
         -504: "スタートキットダウンロードエラー",
     }
     
+    # JVGets / JVRead のバッファサイズ（最大レコード長）
+    BUFFER_SIZE = 110000
+    
     def __init__(self) -> None:
         """コンストラクタ"""
         self.jvlink: Optional[Any] = None
         self.is_initialized: bool = False
         self.is_open: bool = False
+        # gets_view が返すバッファ（呼び出しのたびに上書きして再利用する）
+        self._buffer = bytearray(self.BUFFER_SIZE)
+        self._view = memoryview(self._buffer)
         
     def initialize(self, sid: str = "UNKNOWN") -> int:
         """
@@ -124,6 +128,11 @@ class JVLinkClient:
             0: 正常終了
             その他: エラーコード
         """
+        if win32com is None:
+            logger.error("win32comがインストールされていません")
+            logger.error("pip install pywin32 を実行してください")
+            return -100
+        
         try:
             logger.info(f"JV-Link初期化開始 (SID: {sid})")
             
@@ -295,17 +304,15 @@ class JVLinkClient:
         else:
             return (-100, b"", "")
         
-        # 文字列をバイト列に変換
-        if isinstance(data, str):
-            data = data.encode('shift-jis', errors='ignore')
-        
-        return (ret_code, data, filename)
+        return (ret_code, bytes(self._payload(data, ret_code)), filename)
     
     def gets(self, buffer_size: int = 110000) -> Tuple[int, bytes, str]:
         """
         データ読み込み（JVGets版）
         バイナリデータ対応版
         
+        COMが返したバイト配列から戻り値コード（バイト数）分だけを1回コピーする。
+        
         Args:
             buffer_size: バッファサイズ（最大110000）
             
@@ -318,28 +325,83 @@ class JVLinkClient:
         try:
             # JVGets呼び出し（バイナリ対応）
             result = self.jvlink.JVGets(None, buffer_size, "")
-            
-            if isinstance(result, tuple) and len(result) >= 3:
-                ret_code = result[0]
-                data = result[1]
-                filename = result[2] if len(result) > 2 else ""
-                
-                # VARIANTからバイト配列に変換
-                if data is not None:
-                    if hasattr(data, 'value'):
-                        data = bytes(data.value)
-                    elif isinstance(data, str):
-                        data = data.encode('shift-jis', errors='ignore')
-                else:
-                    data = b""
-                    
-                return (ret_code, data, filename)
-            else:
-                return (-100, b"", "")
-                
         except AttributeError:
             # JVGetsが存在しない場合はJVReadを使用
             return self.read(buffer_size)
+        
+        if not (isinstance(result, tuple) and len(result) >= 3):
+            return (-100, b"", "")
+        
+        ret_code, data, filename = result[0], result[1], result[2]
+        if type(data) is not bytes or len(data) != ret_code:
+            data = bytes(self._payload(data, ret_code))
+        return (ret_code, data, filename)
+    
+    def gets_view(self, buffer_size: int = 110000) -> Tuple[int, memoryview, str]:
+        """
+        データ読み込み（JVGets版・バッファ再利用）
+        
+        レコードを事前に確保したバッファ（BUFFER_SIZE バイト）の先頭へ上書きし、
+        バッファ全体の memoryview を返す。レコードは先頭から戻り値コード
+        （バイト数）分で、レコードごとのオブジェクトを生成しない。読み込んだ
+        直後に解析・集計して捨てる処理（RecordParser.view(data[:ret]) など）に使う。
+        バッファの内容は次の呼び出しで上書きされるため、保持する場合は
+        bytes(data[:ret]) でコピーすること。
+        
+        Args:
+            buffer_size: バッファサイズ（最大110000）
+            
+        Returns:
+            (戻り値コード, データ（バッファ全体の memoryview）, ファイル名)
+        """
+        if not self.is_open:
+            return (-401, self._view, "")
+        
+        ret_code, data, filename = self._gets_raw(buffer_size)
+        if ret_code > 0:
+            data = self._payload(data, ret_code)
+            ret_code = len(data)
+            self._buffer[:ret_code] = data
+        return (ret_code, self._view, filename)
+    
+    def _gets_raw(self, buffer_size: int) -> Tuple[int, Any, str]:
+        """
+        JVGets呼び出し（COMが返したデータを変換せずに返す）
+        
+        Returns:
+            (戻り値コード, COMが返したデータ, ファイル名)
+        """
+        try:
+            # JVGets呼び出し（バイナリ対応）
+            result = self.jvlink.JVGets(None, buffer_size, "")
+        except AttributeError:
+            # JVGetsが存在しない場合はJVReadを使用
+            result = self.jvlink.JVRead(buffer_size, "")
+        
+        if isinstance(result, tuple) and len(result) >= 3:
+            return result[0], result[1], result[2]
+        return (-100, None, "")
+    
+    @staticmethod
+    def _payload(data: Any, ret_code: int) -> Union[bytes, memoryview]:
+        """
+        COMが返したデータからレコード部分を取り出す
+        
+        バイト配列は先頭 ret_code バイト（レコード長）の memoryview を返し、
+        バッファの残りはコピーしない。長さがちょうどの bytes はそのまま返す。
+        JVRead の文字列はShift-JISに戻す（cp932 は機種依存文字も元のバイト列に戻せる）。
+        """
+        if data is None or ret_code <= 0:
+            return b""
+        
+        # VARIANTからバイト配列を取り出す
+        if hasattr(data, 'value'):
+            data = data.value
+        if isinstance(data, str):
+            return data.encode('cp932', errors='replace')
+        if isinstance(data, bytes) and len(data) == ret_code:
+            return data
+        return memoryview(data)[:ret_code]
     
     def status(self) -> int:
         """
@@ -352,6 +414,11 @@ class JVLinkClient:
             return self.jvlink.JVStatus()
         return -1
     
+    def skip(self) -> None:
+        """読み込み中のファイルの残りを読み飛ばす（JVSkip）"""
+        if self.jvlink and self.is_open:
+            self.jvlink.JVSkip()
+    
     def cancel(self) -> None:
         """ダウンロードキャンセル"""
         if self.jvlink:
@@ -0,0 +1,141 @@
+"""
+JV-Data File Module
+保存済みのJV-Dataファイルを mmap で直接読み込むモジュール
+
+JV-Link（COM）の gets() を1レコードずつ呼び出す代わりに、ディスク上の
+JV-Dataファイルを mmap し、レコードの区切り（レコード長・CRLF）を
+memoryview のスライスとして取り出す。大量の蓄積データを取り込む場合は
+JVDataManager.load_files がファイルを PARSE_CHUNK_SIZE 件ごとの範囲に分け、
+範囲ごとにワーカープロセスで解析する。
+
+対象はレコードをそのまま連結したファイル（1行1レコード、CRLF区切り）で、
+RecordingJVLinkClient で記録したキャプチャと同じ形式。先頭が既知の
+レコード種別でないファイル（圧縮されたファイルなど）は読み込まない。
+"""
+
+import hashlib
+import mmap
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from .parser import InternTable, RecordParser, parse_chunk
+
+
+CRLF = b'\r\n'
+
+
+@contextmanager
+def open_mmap(path: str) -> Iterator[memoryview]:
+    """ファイルを読み取り専用で mmap し、memoryview を返す（空のファイルは空の memoryview）"""
+    with open(path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空のファイルは mmap できない
+            yield memoryview(b'')
+            return
+    buf = memoryview(mm)
+    try:
+        yield buf
+    finally:
+        buf.release()
+        mm.close()
+
+
+def is_record_file(buf: memoryview) -> bool:
+    """先頭が既知のレコード種別か（レコードを連結したファイルか）"""
+    return bytes(buf[:2]) in RecordParser.DISPATCH
+
+
+def record_spans(buf: memoryview, start: int = 0,
+                 stop: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+    """
+    レコードの範囲を順に返す
+    
+    レコード長が決まっている種別は長さで区切り（末尾がCRLFであることを確認）、
+    それ以外はCRLFを探して区切る。最後のレコードは末尾にCRLFがなくてもよい。
+    
+    Args:
+        buf: ファイル全体の memoryview
+        start: 開始位置（レコードの先頭）
+        stop: 終了位置（None の場合はファイル末尾）
+    
+    Yields:
+        (開始位置, 終了位置)（終了位置はCRLFの直後）
+    """
+    if stop is None:
+        stop = len(buf)
+    obj = buf.obj
+    dispatch = RecordParser.DISPATCH
+    pos = start
+    while pos < stop:
+        entry = dispatch.get(bytes(buf[pos:pos + 2]))
+        end = pos + entry[1] if entry is not None and entry[1] else 0
+        if not (end and end <= stop and buf[end - 2:end] == CRLF):
+            end = obj.find(CRLF, pos, stop)
+            end = stop if end < 0 else end + 2
+        yield pos, end
+        pos = end
+
+
+def records(buf: memoryview, start: int = 0, stop: Optional[int] = None) -> Iterator[memoryview]:
+    """レコードを memoryview のスライス（コピーなし）として順に返す"""
+    for begin, end in record_spans(buf, start, stop):
+        yield buf[begin:end]
+
+
+def scan_file(path: str, chunk_size: int) -> Tuple[Optional[List[Tuple[int, int]]], int, str]:
+    """
+    ファイルを chunk_size 件ごとの範囲に分ける
+    
+    Args:
+        path: JV-Dataファイルのパス
+        chunk_size: 1範囲のレコード数
+    
+    Returns:
+        (範囲 (開始位置, 終了位置) のリスト, レコード数, ハッシュ)。
+        ハッシュはファイル全体（= レコードの連結）の BLAKE2b で、
+        JVDataManager のファイル単位のチェックポイントと同じ値になる。
+        レコードを連結したファイルでない場合は範囲・ハッシュなしで (None, 0, '')
+    """
+    with open_mmap(path) as buf:
+        if len(buf) and not is_record_file(buf):
+            return None, 0, ''
+        
+        spans = []
+        count = 0
+        chunk_start = 0
+        for _, end in record_spans(buf):
+            count += 1
+            if count % chunk_size == 0:
+                spans.append((chunk_start, end))
+                chunk_start = end
+        if chunk_start < len(buf) or not spans:
+            # 空のファイルもチェックポイントを記録できるよう範囲を1つ返す
+            spans.append((chunk_start, len(buf)))
+        
+        return spans, count, hashlib.blake2b(buf, digest_size=16).hexdigest()
+
+
+def parse_file(path: str, start: int, stop: int,
+               fields: Optional[Mapping[str, Iterable[str]]] = None,
+               table: Optional[InternTable] = None) -> tuple:
+    """
+    ファイルの範囲内のレコードを解析（ProcessPoolExecutor のワーカー用）
+    
+    ワーカーはファイルを自分で mmap するため、プロセス間で受け渡すのは
+    パスと範囲だけになる。レコードは memoryview のスライスのまま（コピーせずに）
+    パーサーに渡す。
+    
+    Args:
+        path: JV-Dataファイルのパス
+        start: 開始位置（scan_file の範囲）
+        stop: 終了位置
+        fields: レコード種別 → 解析するフィールド（RecordParser.parse と同じ）
+        table: インターン表（parse_chunk と同じ）
+    
+    Returns:
+        parse_chunk と同じ (解析結果辞書のリスト, エラー件数, レコード長不正で除外した件数)
+    """
+    with open_mmap(path) as buf:
+        return parse_chunk(list(records(buf, start, stop)), fields, table)
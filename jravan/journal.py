@@ -0,0 +1,393 @@
+"""
+JV-Data Journal Module
+gets() で取得した生レコードを保存する追記専用のジャーナル
+
+解析済みのテーブルとは別に生レコードを圧縮して残しておき、
+パーサーの修正や列の追加の際に JRA-VAN から再取得せずに
+テーブルを作り直せるようにする（JVDataManager.reparse）。
+
+構成（ジャーナルのディレクトリ）:
+    {番号:06d}.seg : セグメント（ブロックを追記。SEGMENT_SIZE を超えると次のセグメント）
+    index.db       : ブロックの索引（SQLite）
+
+ブロック:
+    ヘッダ（BLOCK_HEADER）: マジック 'JVJ' + 圧縮方式（'z': zlib / 'x': lzma）+ 圧縮後の長さ
+    本体: レコードごとに (長さ uint32 + レコード) を連結して圧縮したもの
+
+索引はブロックごとのファイル名・バイト位置と、レコード種別ごとの件数・
+レースキーの範囲を持つ。読み込み時はセグメントを mmap し、索引から
+対象のブロックだけを展開する。
+
+中断後に取り込み直したファイルは、中断前に記録した分と重複して記録される。
+同じレコードを重ねて保存しても行は変わらないため、再解析の結果は変わらない。
+"""
+
+import lzma
+import mmap
+import os
+import sqlite3
+import struct
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .client import JVLinkClient
+from .layouts import LAYOUTS, Group
+
+
+# セグメントの最大サイズ（バイト）
+SEGMENT_SIZE = 256 * 1024 * 1024
+
+# ブロックヘッダ: マジック, 圧縮方式, 圧縮後の長さ
+BLOCK_HEADER = struct.Struct('<3scI')
+BLOCK_MAGIC = b'JVJ'
+
+# レコード長の接頭辞
+RECORD_LENGTH = struct.Struct('<I')
+
+CODECS = {
+    'zlib': (b'z', zlib.compress, zlib.decompress),
+    'lzma': (b'x', lzma.compress, lzma.decompress),
+}
+DECOMPRESS = {code: decompress for code, _, decompress in CODECS.values()}
+
+
+def _race_key_spans() -> Dict[bytes, Tuple[int, int]]:
+    """レコード種別の先頭2バイト → レースキーのスライス位置"""
+    spans = {}
+    for record_type, layout in LAYOUTS.items():
+        for item in layout.fields:
+            if isinstance(item, Group) and item.name == 'race_key':
+                start = item.fields[0].start - 1
+                stop = item.fields[-1].start - 1 + item.fields[-1].length
+                spans[record_type.encode('ascii')] = (start, stop)
+    return spans
+
+
+RACE_KEY_SPANS = _race_key_spans()
+
+
+def race_key(data: bytes) -> Optional[bytes]:
+    """レコードのレースキー（16桁。レースキーを持たない種別はNone）"""
+    span = RACE_KEY_SPANS.get(bytes(data[:2]))
+    if span is None:
+        return None
+    return bytes(data[span[0]:span[1]])
+
+
+class Journal:
+    """生レコードの追記専用ジャーナル"""
+    
+    def __init__(self, path: str, compression: str = 'zlib',
+                 segment_size: int = SEGMENT_SIZE):
+        """
+        ジャーナルを開く（なければ作成）
+        
+        Args:
+            path: ジャーナルのディレクトリ
+            compression: 圧縮方式（'zlib' / 'lzma'）
+            segment_size: セグメントの最大サイズ（バイト）
+        """
+        if compression not in CODECS:
+            raise ValueError(f"不明な圧縮方式: {compression}")
+        
+        self.path = path
+        self.codec, self._compress, _ = CODECS[compression]
+        self.segment_size = segment_size
+        os.makedirs(path, exist_ok=True)
+        
+        self.index = sqlite3.connect(os.path.join(path, 'index.db'), check_same_thread=False)
+        self.index.execute('PRAGMA journal_mode=WAL')
+        self.index.execute("""
+            CREATE TABLE IF NOT EXISTS blocks (
+                id INTEGER PRIMARY KEY,
+                segment INTEGER,
+                offset INTEGER,
+                length INTEGER,
+                filename TEXT,
+                record_count INTEGER,
+                written_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self.index.execute("""
+            CREATE TABLE IF NOT EXISTS block_records (
+                block_id INTEGER,
+                record_type TEXT,
+                record_count INTEGER,
+                min_race_key TEXT,
+                max_race_key TEXT,
+                PRIMARY KEY (block_id, record_type)
+            ) WITHOUT ROWID
+        """)
+        self.index.execute("CREATE INDEX IF NOT EXISTS idx_blocks_filename ON blocks(filename)")
+        self.index.execute(
+            "CREATE INDEX IF NOT EXISTS idx_block_records_type ON block_records(record_type)")
+        self.index.commit()
+        
+        self._segment, self._offset = self._tail()
+        self._file = None
+    
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, f'{segment:06d}.seg')
+    
+    def _tail(self) -> Tuple[int, int]:
+        """
+        追記位置（最後に索引へ記録したブロックの直後）
+        
+        索引の記録前に中断したブロックの残骸は切り詰める。セグメントを切り替えた
+        直後に中断した場合は次のセグメントに残骸だけが残るため、最後に索引へ
+        記録したセグメントより後のセグメントは削除する（残したまま追記すると
+        索引のバイト位置とずれる）。
+        """
+        row = self.index.execute(
+            "SELECT segment, offset + length FROM blocks ORDER BY id DESC LIMIT 1").fetchone()
+        segment, offset = row if row else (1, 0)
+        path = self._segment_path(segment)
+        if os.path.exists(path) and os.path.getsize(path) > offset:
+            with open(path, 'r+b') as f:
+                f.truncate(offset)
+        for name in os.listdir(self.path):
+            stem, ext = os.path.splitext(name)
+            if ext == '.seg' and stem.isdigit() and int(stem) > segment:
+                os.remove(os.path.join(self.path, name))
+        return segment, offset
+    
+    def append(self, records: List[bytes], filename: str = '') -> None:
+        """
+        レコードを1ブロックとして追記
+        
+        Args:
+            records: 生レコードのリスト
+            filename: JV-Dataファイル名
+        """
+        if not records:
+            return
+        
+        payload = bytearray()
+        summary: Dict[str, list] = {}  # レコード種別 → [件数, 最小レースキー, 最大レースキー]
+        for data in records:
+            payload += RECORD_LENGTH.pack(len(data))
+            payload += data
+            record_type = bytes(data[:2]).decode('ascii', errors='replace')
+            key = race_key(data)
+            key = key.decode('ascii', errors='replace') if key else None
+            entry = summary.get(record_type)
+            if entry is None:
+                summary[record_type] = [1, key, key]
+            else:
+                entry[0] += 1
+                if key is not None:
+                    entry[1] = key if entry[1] is None else min(entry[1], key)
+                    entry[2] = key if entry[2] is None else max(entry[2], key)
+        
+        compressed = self._compress(bytes(payload))
+        block = BLOCK_HEADER.pack(BLOCK_MAGIC, self.codec, len(compressed)) + compressed
+        
+        if self._offset and self._offset + len(block) > self.segment_size:
+            self._close_segment()
+            self._segment += 1
+            self._offset = 0
+        if self._file is None:
+            self._file = open(self._segment_path(self._segment), 'ab')
+        self._file.write(block)
+        self._file.flush()
+        
+        # 索引はブロックを書き込んでから記録する（索引にあるブロックは必ず完全）
+        cursor = self.index.execute("""
+            INSERT INTO blocks (segment, offset, length, filename, record_count)
+            VALUES (?, ?, ?, ?, ?)
+        """, (self._segment, self._offset, len(block), filename, len(records)))
+        block_id = cursor.lastrowid
+        self.index.executemany("""
+            INSERT INTO block_records (block_id, record_type, record_count, min_race_key, max_race_key)
+            VALUES (?, ?, ?, ?, ?)
+        """, [(block_id, rt, count, low, high) for rt, (count, low, high) in summary.items()])
+        self.index.commit()
+        self._offset += len(block)
+    
+    def blocks(self, record_types: Optional[Iterable[str]] = None,
+               race_key_from: Optional[str] = None, race_key_to: Optional[str] = None,
+               filename: Optional[str] = None) -> List[Tuple[int, int, int, str]]:
+        """
+        条件に合うレコードを含むブロック（追記順）
+        
+        Args:
+            record_types: レコード種別（None の場合はすべて）
+            race_key_from: レースキーの下限（前方一致の比較。'2015' で2015年以降）
+            race_key_to: レースキーの上限（'2024' で2024年まで）
+            filename: JV-Dataファイル名
+        
+        Returns:
+            (セグメント番号, バイト位置, ブロック長, ファイル名) のリスト
+        """
+        where = []
+        params = []
+        if record_types is not None:
+            record_types = list(record_types)
+            where.append(f"r.record_type IN ({', '.join(['?'] * len(record_types))})")
+            params += record_types
+        if race_key_from is not None:
+            where.append("(r.max_race_key IS NULL OR r.max_race_key >= ?)")
+            params.append(race_key_from)
+        if race_key_to is not None:
+            where.append("(r.min_race_key IS NULL OR r.min_race_key <= ?)")
+            params.append(race_key_to + '\uffff')
+        if filename is not None:
+            where.append("b.filename = ?")
+            params.append(filename)
+        
+        sql = """
+            SELECT DISTINCT b.id, b.segment, b.offset, b.length, b.filename
+            FROM blocks b JOIN block_records r ON r.block_id = b.id
+        """
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY b.id"
+        return [row[1:] for row in self.index.execute(sql, params)]
+    
+    def records(self, record_types: Optional[Iterable[str]] = None,
+                race_key_from: Optional[str] = None, race_key_to: Optional[str] = None,
+                filename: Optional[str] = None) -> Iterator[Tuple[bytes, str]]:
+        """
+        条件に合うレコードを追記順に取得（セグメントは mmap で読み込む）
+        
+        引数は blocks と同じ。ブロック内の他の種別・範囲外のレコードは除外する。
+        
+        Yields:
+            (レコード, ファイル名)
+        """
+        types = None
+        if record_types is not None:
+            record_types = list(record_types)
+            types = {rt.encode('ascii') for rt in record_types}
+        low = race_key_from.encode('ascii') if race_key_from else None
+        high = race_key_to.encode('ascii') if race_key_to else None
+        
+        self.flush()
+        maps = {}
+        try:
+            for segment, offset, length, name in self.blocks(
+                    record_types, race_key_from, race_key_to, filename):
+                view = maps.get(segment)
+                if view is None:
+                    with open(self._segment_path(segment), 'rb') as f:
+                        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    view = maps[segment] = (mm, memoryview(mm))
+                for data in self._decode(view[1][offset:offset + length]):
+                    if types is not None and data[:2] not in types:
+                        continue
+                    if low or high:
+                        key = race_key(data)
+                        if key is not None and ((low and key[:len(low)] < low)
+                                                or (high and key[:len(high)] > high)):
+                            continue
+                    yield data, name
+        finally:
+            for mm, view in maps.values():
+                view.release()
+                mm.close()
+    
+    @staticmethod
+    def _decode(block: memoryview) -> Iterator[bytes]:
+        """ブロックを展開してレコードを順に返す"""
+        magic, codec, length = BLOCK_HEADER.unpack_from(block)
+        if magic != BLOCK_MAGIC:
+            raise ValueError("ジャーナルのブロックが壊れています")
+        payload = DECOMPRESS[codec](block[BLOCK_HEADER.size:BLOCK_HEADER.size + length])
+        offset = 0
+        while offset < len(payload):
+            (size,) = RECORD_LENGTH.unpack_from(payload, offset)
+            offset += RECORD_LENGTH.size
+            yield payload[offset:offset + size]
+            offset += size
+    
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+    
+    def _close_segment(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def close(self) -> None:
+        """ジャーナルを閉じる"""
+        self._close_segment()
+        self.index.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+
+class JournalClient(JVLinkClient):
+    """
+    ジャーナルのレコードを JVLinkClient と同じインターフェースで返すクライアント
+    
+    JVDataManager.reparse が取り込み処理（process_data）の読み込み元に使う。
+    ファイル名が変わるたびに -1（ファイル切り替わり）、最後に 0 を返す。
+    """
+    
+    def __init__(self, journal: Journal, record_types: Optional[Iterable[str]] = None,
+                 race_key_from: Optional[str] = None, race_key_to: Optional[str] = None):
+        super().__init__()
+        self.journal = journal
+        self.conditions = (record_types, race_key_from, race_key_to)
+        self._records: Optional[Iterator[Tuple[bytes, str]]] = None
+        self._pending: Optional[Tuple[bytes, str]] = None
+        self._filename: Optional[str] = None
+        self._skipping = False
+    
+    def initialize(self, sid: str = "UNKNOWN") -> int:
+        self.is_initialized = True
+        return 0
+    
+    def open(self, data_spec: str = "", from_time: str = "", option: int = 1) -> Tuple[int, int, int, str]:
+        self.close()
+        self._records = self.journal.records(*self.conditions)
+        self._filename = None
+        self.is_open = True
+        return (0, 0, 0, "")
+    
+    def read(self, buffer_size: int = 110000) -> Tuple[int, bytes, str]:
+        if not self.is_open:
+            return (-401, b"", "")
+        
+        while True:
+            item = self._pending or next(self._records, None)
+            self._pending = None
+            if item is None:
+                return (0, b"", "")
+            
+            data, filename = item
+            if filename != self._filename:
+                # ファイル切り替わり（次の呼び出しでこのレコードを返す）
+                self._filename = filename
+                self._skipping = False
+                self._pending = item
+                return (-1, b"", filename)
+            if not self._skipping:
+                return (len(data), data, filename)
+    
+    def gets(self, buffer_size: int = 110000) -> Tuple[int, bytes, str]:
+        return self.read(buffer_size)
+    
+    def _gets_raw(self, buffer_size: int) -> Tuple[int, bytes, str]:
+        return self.read(buffer_size)
+    
+    def skip(self) -> None:
+        """読み込み中のファイルの残りを読み飛ばす"""
+        self._skipping = True
+    
+    def status(self) -> int:
+        return 0
+    
+    def close(self) -> int:
+        if self._records is not None:
+            self._records.close()
+            self._records = None
+        self._pending = None
+        self.is_open = False
+        return 0
@@ -0,0 +1,637 @@
+"""
+JV-Data Layout Module
+レコード種別ごとの固定長レイアウト定義
+
+位置はSDK仕様に合わせて1から始まるバイト位置で記述する。
+ここで定義したレイアウトは parser.LayoutCompiler によって
+インポート時に専用のパース関数へコンパイルされる。
+
+Based on JRA-VAN SDK Ver4.9.0.2
+"""
+
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple, Union
+
+
+class Field(NamedTuple):
+    """
+    固定長フィールド
+    
+    type:
+        'str'  : 文字列（前後の空白削除）
+        'int'  : 整数（変換できない場合はNone）
+        'ymd'  : 年月日辞書（8バイト）
+        'hms'  : 時分秒辞書（6バイト）
+        'time' : タイム（4バイト → M:SS.f形式）
+    """
+    name: str
+    start: int
+    length: int
+    type: str = 'str'
+
+
+class Group(NamedTuple):
+    """入れ子の辞書としてまとめるフィールド群"""
+    name: str
+    fields: Tuple[Field, ...]
+
+
+class Repeat(NamedTuple):
+    """
+    繰り返し項目（リスト）
+    
+    item が Field の場合は値のリスト、タプルの場合は辞書のリストになる。
+    item のフィールド位置はブロック先頭を1とする相対位置。
+    key（辞書の場合）または値（値リストの場合）が空・ゼロ埋めの要素は除外する。
+    bounded がTrueの場合、ブロックがデータ末尾を超えた時点で打ち切る。
+    columnar がTrueの場合、辞書のリストではなく項目ごとの配列の辞書
+    （NumPyがない場合は array.array）に一括変換する。数値項目のみ対応し、
+    変換できない値は None ではなく -1 になる。
+    """
+    name: str
+    start: int
+    count: int
+    size: int
+    item: Union[Field, Tuple[Field, ...]]
+    key: Optional[str] = None
+    bounded: bool = False
+    columnar: bool = False
+
+
+class Layout(NamedTuple):
+    """
+    レコード種別ごとのレイアウト
+    
+    length は仕様書上のレコード長（改行コード含む）。Noneの場合は長さを検査しない。
+    Noneでない場合、解析はフィールドが収まる長さ以上で末尾がCRLFのレコードを
+    受け付ける（実データのレコード長は length と異なる場合がある）。
+    """
+    record_type: str
+    description: str
+    fields: Tuple[Union[Field, Group, Repeat], ...]
+    length: Optional[int] = None
+
+
+def project(layout: Layout, fields: Iterable[str]) -> Layout:
+    """
+    指定したフィールドだけのレイアウトを作る（列の射影）
+    
+    Args:
+        layout: 元のレイアウト
+        fields: フィールド名（グループ内のフィールドは 'グループ名.フィールド名'、
+                グループ名・繰り返し項目名のみの場合は全体）
+    
+    Returns:
+        指定したフィールドのみを元の順序で含むレイアウト
+    """
+    selected = {}
+    for name in fields:
+        top, _, sub = name.partition('.')
+        selected.setdefault(top, set()).add(sub)
+    
+    items = []
+    for item in layout.fields:
+        subs = selected.pop(item.name, None)
+        if subs is None:
+            continue
+        if isinstance(item, Group) and '' not in subs:
+            group_fields = tuple(f for f in item.fields if f.name in subs)
+            unknown = subs - {f.name for f in group_fields}
+            if unknown:
+                raise ValueError(f"{layout.record_type}: 不明なフィールド: "
+                                 f"{sorted(item.name + '.' + f for f in unknown)}")
+            item = item._replace(fields=group_fields)
+        items.append(item)
+    if selected:
+        raise ValueError(f"{layout.record_type}: 不明なフィールド: {sorted(selected)}")
+    return layout._replace(fields=tuple(items))
+
+
+def race_key(start: int) -> Group:
+    """レースキー（16バイト）"""
+    return Group('race_key', (
+        Field('year', start, 4),
+        Field('monthday', start + 4, 4),
+        Field('jyo_code', start + 8, 2),
+        Field('kaiji', start + 10, 2),
+        Field('nichiji', start + 12, 2),
+        Field('race_num', start + 14, 2),
+    ))
+
+
+# RAレコード（レース詳細）
+RA = Layout('RA', 'レース詳細', (
+    Field('data_kubun', 3, 1),
+    Field('make_date', 4, 8, 'ymd'),
+    Field('make_time', 12, 6, 'hms'),
+    
+    # レースキー情報
+    race_key(18),
+    
+    # レース情報
+    Group('race_info', (
+        Field('youbi', 34, 2),
+        Field('race_name', 36, 60),
+        Field('fukusho_name', 96, 60),
+        Field('kakutei_jyuni', 156, 100),
+        Field('grade_cd', 256, 1),
+        Field('syubetsu_cd', 257, 2),
+        Field('kigo_cd', 259, 3),
+        Field('jyuryo_cd', 262, 1),
+        Field('jyoken_cd', 263, 2),
+        Field('kyori', 266, 4, 'int'),
+        Field('track_cd', 270, 2),
+        Field('course_kbn', 272, 1),
+    )),
+    
+    # 発走時刻
+    Field('hassotime', 273, 4),
+    
+    # 頭数
+    Field('toroku_tosu', 277, 2, 'int'),
+    Field('syusso_tosu', 279, 2, 'int'),
+    Field('nyusen_tosu', 281, 2, 'int'),
+    
+    # 天候・馬場状態
+    Group('condition', (
+        Field('tenko_cd', 283, 1),
+        Field('shiba_baba_cd', 284, 1),
+        Field('dirt_baba_cd', 285, 1),
+    )),
+    
+    # ラップタイム（3バイト × 25）
+    Repeat('lap_time', 286, 25, 3, Field('lap', 1, 3)),
+    
+    # ハロンタイム（3バイト × 4 / 3バイト × 3）
+    Repeat('haron_time_s', 361, 4, 3, Field('haron', 1, 3)),
+    Repeat('haron_time_l', 373, 3, 3, Field('haron', 1, 3)),
+), length=409)
+
+# SEレコード（馬毎レース情報）
+SE = Layout('SE', '馬毎レース情報', (
+    Field('data_kubun', 3, 1),
+    Field('make_date', 4, 8, 'ymd'),
+    
+    # レースキー
+    race_key(12),
+    
+    # 馬番・血統登録番号
+    Field('umaban', 28, 2, 'int'),
+    Field('ketto_num', 30, 10),
+    
+    # 馬名
+    Field('bamei', 40, 36),
+    
+    # 馬情報
+    Group('horse_info', (
+        Field('seibetsu_cd', 76, 1),
+        Field('barei', 77, 2, 'int'),
+        Field('tozai_cd', 79, 1),
+        Field('hinsyu_cd', 80, 1),
+        Field('keiro_cd', 81, 2),
+    )),
+    
+    # 馬主
+    Group('owner', (
+        Field('code', 83, 6),
+        Field('name', 89, 64),
+    )),
+    
+    # 負担重量
+    Field('futan', 153, 3, 'int'),
+    
+    # ブリンカー
+    Field('blinker', 156, 1),
+    
+    # 騎手
+    Group('jockey', (
+        Field('code', 157, 5),
+        Field('name', 162, 34),
+        Field('name_ryaku', 196, 8),
+    )),
+    
+    # 馬体重
+    Field('bataijyu', 204, 3, 'int'),
+    Field('zogen', 207, 3),
+    
+    # 異常区分
+    Field('ijyo_cd', 210, 1),
+    
+    # 調教師
+    Group('trainer', (
+        Field('code', 211, 5),
+        Field('name', 216, 34),
+        Field('name_ryaku', 250, 8),
+        Field('syozoku', 258, 4),
+    )),
+    
+    # 馬主情報
+    Group('banushi', (
+        Field('code', 262, 6),
+        Field('name', 268, 64),
+    )),
+    
+    # 賞金
+    Group('prize', (
+        Field('honsyo', 332, 8, 'int'),
+        Field('fukasyo', 340, 8, 'int'),
+        Field('shutokujyo', 348, 8, 'int'),
+        Field('shutoku', 356, 8, 'int'),
+    )),
+    
+    # レース結果
+    Group('result', (
+        Field('kakutei_jyuni', 364, 2, 'int'),
+        Field('time', 366, 4, 'time'),
+        Field('chakusa_cd', 370, 1),
+        Field('chakusa', 371, 3),
+        Field('jyuni_fuka', 374, 1),
+        Field('tansho_odds', 375, 4, 'int'),
+        Field('ninsiki', 379, 2, 'int'),
+    )),
+), length=555)
+
+# UMレコード（競走馬マスタ）
+UM = Layout('UM', '競走馬マスタ', (
+    Field('data_kubun', 3, 1),
+    Field('make_date', 4, 8, 'ymd'),
+    
+    # 血統登録番号
+    Field('ketto_num', 12, 10),
+    
+    # 削除区分
+    Field('del_kubun', 22, 1),
+    
+    # 登録・抹消日
+    Field('touroku_date', 23, 8, 'ymd'),
+    Field('massyo_date', 31, 8, 'ymd'),
+    
+    # 馬名
+    Field('bamei', 39, 36),
+    
+    # 生年月日
+    Field('birth_date', 75, 8, 'ymd'),
+    
+    # 馬情報
+    Group('horse_info', (
+        Field('seibetsu_cd', 83, 1),
+        Field('hinsyu_cd', 84, 1),
+        Field('keiro_cd', 85, 2),
+    )),
+    
+    # 系統
+    Field('keito', 87, 60),
+    
+    # 3代血統
+    Group('blood', (
+        Field('father', 147, 10),
+        Field('mother', 157, 10),
+        Field('bms', 167, 10),  # 母父
+    )),
+    
+    # 東西所属
+    Field('tozai_cd', 177, 1),
+    
+    # 調教師
+    Group('trainer', (
+        Field('code', 178, 5),
+        Field('name', 183, 34),
+    )),
+    
+    # 馬主
+    Group('banushi', (
+        Field('code', 217, 6),
+        Field('name', 223, 64),
+    )),
+    
+    # 生産者
+    Group('breeder', (
+        Field('code', 287, 6),
+        Field('name', 293, 42),
+    )),
+    
+    # 産地名
+    Field('sanchi_name', 335, 20),
+), length=1889)
+
+# O1レコード（単複オッズ）
+O1 = Layout('O1', '単複オッズ', (
+    Field('data_kubun', 3, 1),
+    Field('make_date', 4, 8, 'ymd'),
+    
+    # レースキー
+    race_key(12),
+    
+    # 発売票数合計
+    Group('total_sale', (
+        Field('tansho', 28, 11),
+        Field('fukusho', 39, 11),
+    )),
+    
+    # 返還総額
+    Group('henkan', (
+        Field('tansho', 50, 11),
+        Field('fukusho', 61, 11),
+    )),
+    
+    # オッズ（16バイト × 28頭）
+    Repeat('odds', 72, 28, 16, (
+        Field('umaban', 1, 2, 'int'),
+        Field('tansho_odds', 3, 4, 'int'),
+        Field('fukusho_odds_low', 7, 4, 'int'),
+        Field('fukusho_odds_high', 11, 4, 'int'),
+        Field('tansho_ninki', 15, 1, 'int'),
+        Field('fukusho_ninki', 16, 1, 'int'),
+    ), key='umaban'),
+))
+
+def odds_header() -> Tuple[Union[Field, Group], ...]:
+    """O2〜O6レコード共通のヘッダ部"""
+    return (
+        Field('data_kubun', 3, 1),
+        Field('make_date', 4, 8, 'ymd'),
+        race_key(12),
+        Field('happyo_time', 28, 8),  # 発表月日時分
+        Field('toroku_tosu', 36, 2, 'int'),
+        Field('syusso_tosu', 38, 2, 'int'),
+        Field('hatubai_flag', 40, 1),
+    )
+
+
+def combination_odds(count: int, kumi: int, odds: Tuple[Field, ...], ninki: int) -> Repeat:
+    """
+    組番オッズの繰り返し項目（41バイト目から）
+    
+    組番は馬番2桁を連結した整数（3-12 → 312、1-2-3 → 10203）。
+    """
+    item = (Field('kumi', 1, kumi, 'int'),) + odds
+    odds_end = max(f.start + f.length for f in odds)
+    item += (Field('ninki', odds_end, ninki, 'int'),)
+    return Repeat('odds', 41, count, odds_end - 1 + ninki, item, key='kumi', columnar=True)
+
+
+# O2レコード（馬連オッズ 13バイト × 153組）
+O2 = Layout('O2', '馬連オッズ', odds_header() + (
+    combination_odds(153, 4, (Field('odds', 5, 6, 'int'),), 3),
+    Field('total_hyosu', 2030, 11, 'int'),
+), length=2042)
+
+# O3レコード（ワイドオッズ 17バイト × 153組）
+O3 = Layout('O3', 'ワイドオッズ', odds_header() + (
+    combination_odds(153, 4, (Field('odds_low', 5, 5, 'int'),
+                              Field('odds_high', 10, 5, 'int')), 3),
+    Field('total_hyosu', 2642, 11, 'int'),
+), length=2654)
+
+# O4レコード（馬単オッズ 13バイト × 306組）
+O4 = Layout('O4', '馬単オッズ', odds_header() + (
+    combination_odds(306, 4, (Field('odds', 5, 6, 'int'),), 3),
+    Field('total_hyosu', 4019, 11, 'int'),
+), length=4031)
+
+# O5レコード（3連複オッズ 15バイト × 816組）
+O5 = Layout('O5', '3連複オッズ', odds_header() + (
+    combination_odds(816, 6, (Field('odds', 7, 6, 'int'),), 3),
+    Field('total_hyosu', 12281, 11, 'int'),
+), length=12293)
+
+# O6レコード（3連単オッズ 17バイト × 4896組）
+O6 = Layout('O6', '3連単オッズ', odds_header() + (
+    combination_odds(4896, 6, (Field('odds', 7, 7, 'int'),), 4),
+    Field('total_hyosu', 83273, 11, 'int'),
+), length=83285)
+
+# WFレコード（馬体重）
+WF = Layout('WF', '馬体重', (
+    Field('data_kubun', 3, 1),
+    Field('make_date', 4, 8, 'ymd'),
+    
+    # レースキー
+    race_key(12),
+    
+    # 馬体重情報（7バイト × 28頭）
+    Repeat('weights', 28, 28, 7, (
+        Field('umaban', 1, 2, 'int'),
+        Field('bataijyu', 3, 3, 'int'),
+        Field('zogen_fuka', 6, 1),
+        Field('zogen', 7, 3),
+    ), key='umaban'),
+))
+
+# YSレコード（年間スケジュール）
+YS = Layout('YS', '年間スケジュール', (
+    Field('data_kubun', 3, 1),
+    Field('make_date', 4, 8, 'ymd'),
+    
+    # 年
+    Field('year', 12, 4),
+    
+    # 変更識別
+    Field('henko_id', 16, 1),
+    
+    # 開催情報（16バイト × 最大397開催）
+    Repeat('kaisai_info', 17, 397, 16, (
+        Field('kaiji_date', 1, 8),
+        Field('jyo_code', 9, 2),
+        Field('kaiji', 11, 2),
+        Field('nichiji', 13, 2),
+        Field('youbi', 15, 2),
+    ), key='kaiji_date', bounded=True),
+))
+
+
+# KSレコード（騎手マスタ）
+KS = Layout('KS', '騎手マスタ', (
+    Field('data_kubun', 3, 1),
+    Field('make_date', 4, 8, 'ymd'),
+    Field('kisyu_code', 12, 5),
+    Field('del_kubun', 17, 1),
+    Field('issue_date', 18, 8, 'ymd'),  # 騎手免許交付年月日
+    Field('del_date', 26, 8, 'ymd'),  # 騎手免許抹消年月日
+    Field('birth_date', 34, 8, 'ymd'),
+    
+    # 騎手名
+    Field('kisyu_name', 42, 34),
+    Field('kisyu_name_kana', 110, 30),
+    Field('kisyu_ryakusyo', 140, 8),
+    Field('kisyu_name_eng', 148, 80),
+    
+    Field('sex_cd', 228, 1),
+    Field('sikaku_cd', 229, 1),  # 騎乗資格コード
+    Field('minarai_cd', 230, 1),  # 騎手見習コード
+    Field('tozai_cd', 231, 1),
+    Field('syotai', 232, 20),  # 招待地域名
+    
+    # 所属調教師
+    Group('chokyosi', (
+        Field('code', 252, 5),
+        Field('ryakusyo', 257, 8),
+    )),
+), length=4173)
+
+# CHレコード（調教師マスタ）
+CH = Layout('CH', '調教師マスタ', (
+    Field('data_kubun', 3, 1),
+    Field('make_date', 4, 8, 'ymd'),
+    Field('chokyosi_code', 12, 5),
+    Field('del_kubun', 17, 1),
+    Field('issue_date', 18, 8, 'ymd'),  # 調教師免許交付年月日
+    Field('del_date', 26, 8, 'ymd'),  # 調教師免許抹消年月日
+    Field('birth_date', 34, 8, 'ymd'),
+    
+    # 調教師名
+    Field('chokyosi_name', 42, 34),
+    Field('chokyosi_name_kana', 76, 30),
+    Field('chokyosi_ryakusyo', 106, 8),
+    Field('chokyosi_name_eng', 114, 80),
+    
+    Field('sex_cd', 194, 1),
+    Field('tozai_cd', 195, 1),
+    Field('syotai', 196, 20),  # 招待地域名
+), length=3862)
+
+# BRレコード（生産者マスタ）
+BR = Layout('BR', '生産者マスタ', (
+    Field('data_kubun', 3, 1),
+    Field('make_date', 4, 8, 'ymd'),
+    Field('breeder_code', 12, 8),
+    Field('breeder_name_co', 20, 72),  # 法人格有
+    Field('breeder_name', 92, 72),  # 法人格無
+    Field('breeder_name_kana', 164, 72),
+    Field('breeder_name_eng', 236, 168),
+    Field('address', 404, 20),  # 生産者住所自治省名
+), length=545)
+
+# BNレコード（馬主マスタ）
+BN = Layout('BN', '馬主マスタ', (
+    Field('data_kubun', 3, 1),
+    Field('make_date', 4, 8, 'ymd'),
+    Field('banusi_code', 12, 6),
+    Field('banusi_name_co', 18, 64),  # 法人格有
+    Field('banusi_name', 82, 64),  # 法人格無
+    Field('banusi_name_kana', 146, 50),
+    Field('banusi_name_eng', 196, 100),
+    Field('fukusyoku', 296, 60),  # 服色標示
+), length=477)
+
+# HNレコード（繁殖馬マスタ）
+HN = Layout('HN', '繁殖馬マスタ', (
+    Field('data_kubun', 3, 1),
+    Field('make_date', 4, 8, 'ymd'),
+    Field('hansyoku_num', 12, 10),  # 繁殖登録番号（22〜29バイト目は予備）
+    Field('ketto_num', 30, 10),  # 40バイト目は予備
+    
+    # 馬名
+    Field('bamei', 41, 36),
+    Field('bamei_kana', 77, 40),
+    Field('bamei_eng', 117, 80),
+    
+    Field('birth_year', 197, 4, 'int'),
+    Field('sex_cd', 201, 1),
+    Field('hinsyu_cd', 202, 1),
+    Field('keiro_cd', 203, 2),
+    Field('hansyoku_mochi_kubun', 205, 1),  # 繁殖馬持込区分
+    Field('import_year', 206, 4, 'int'),
+    Field('sanchi_name', 210, 20),
+    Field('hansyoku_f_num', 230, 10),  # 父馬繁殖登録番号
+    Field('hansyoku_m_num', 240, 10),  # 母馬繁殖登録番号
+), length=251)
+
+# SKレコード（産駒マスタ）
+SK = Layout('SK', '産駒マスタ', (
+    Field('data_kubun', 3, 1),
+    Field('make_date', 4, 8, 'ymd'),
+    Field('ketto_num', 12, 10),
+    Field('birth_date', 22, 8, 'ymd'),
+    Field('sex_cd', 30, 1),
+    Field('hinsyu_cd', 31, 1),
+    Field('keiro_cd', 32, 2),
+    Field('sanku_mochi_kubun', 34, 1),  # 産駒持込区分
+    Field('import_year', 35, 4, 'int'),
+    Field('breeder_code', 39, 8),
+    Field('sanchi_name', 47, 20),
+    
+    # 3代血統（繁殖登録番号 10バイト × 14）
+    Group('blood', (
+        Field('f', 67, 10),
+        Field('m', 77, 10),
+        Field('ff', 87, 10),
+        Field('fm', 97, 10),
+        Field('mf', 107, 10),
+        Field('mm', 117, 10),
+        Field('fff', 127, 10),
+        Field('ffm', 137, 10),
+        Field('fmf', 147, 10),
+        Field('fmm', 157, 10),
+        Field('mff', 167, 10),
+        Field('mfm', 177, 10),
+        Field('mmf', 187, 10),
+        Field('mmm', 197, 10),
+    )),
+), length=208)
+
+# HCレコード（坂路調教）
+HC = Layout('HC', '坂路調教', (
+    Field('data_kubun', 3, 1),
+    Field('make_date', 4, 8, 'ymd'),
+    Field('tresen_kubun', 12, 1),  # 0:美浦 1:栗東
+    Field('chokyo_date', 13, 8, 'ymd'),
+    Field('chokyo_time', 21, 4),  # 調教時刻（HHMM）
+    Field('ketto_num', 25, 10),
+    
+    # 4ハロン〜1ハロンのタイム・ラップ（1/10秒単位）
+    Field('haron_time_4', 35, 4, 'int'),
+    Field('lap_time_4', 39, 3, 'int'),
+    Field('haron_time_3', 42, 4, 'int'),
+    Field('lap_time_3', 46, 3, 'int'),
+    Field('haron_time_2', 49, 4, 'int'),
+    Field('lap_time_2', 53, 3, 'int'),
+    Field('lap_time_1', 56, 3, 'int'),
+), length=60)
+
+# CSレコード（コース情報）
+CS = Layout('CS', 'コース情報', (
+    Field('data_kubun', 3, 1),
+    Field('make_date', 4, 8, 'ymd'),
+    Field('jyo_code', 12, 2),
+    Field('kyori', 14, 4, 'int'),
+    Field('track_cd', 18, 2),
+    Field('kaishu_date', 20, 8, 'ymd'),  # コース改修年月日
+    Field('course_ex', 28, 6800),  # コース説明
+), length=6829)
+
+# DMレコード（タイム型データマイニング予想）
+DM = Layout('DM', 'タイム型データマイニング予想', (
+    Field('data_kubun', 3, 1),
+    Field('make_date', 4, 8, 'ymd'),
+    race_key(12),
+    Field('make_hm', 28, 4),  # データ作成時分
+    
+    # マイニング予想（15バイト × 18頭）
+    Repeat('predictions', 32, 18, 15, (
+        Field('umaban', 1, 2, 'int'),
+        Field('dm_time', 3, 5, 'int'),  # 予想走破タイム
+        Field('dm_gosa_plus', 8, 4, 'int'),  # 予想誤差（信頼度）＋
+        Field('dm_gosa_minus', 12, 4, 'int'),  # 予想誤差（信頼度）－
+    ), key='umaban'),
+), length=303)
+
+# TMレコード（対戦型データマイニング予想）
+TM = Layout('TM', '対戦型データマイニング予想', (
+    Field('data_kubun', 3, 1),
+    Field('make_date', 4, 8, 'ymd'),
+    race_key(12),
+    Field('make_hm', 28, 4),  # データ作成時分
+    
+    # マイニング予想（6バイト × 18頭）
+    Repeat('predictions', 32, 18, 6, (
+        Field('umaban', 1, 2, 'int'),
+        Field('tm_score', 3, 4, 'int'),  # 予測スコア
+    ), key='umaban'),
+), length=141)
+
+# レコード種別 → レイアウト
+LAYOUTS: Dict[str, Layout] = {
+    layout.record_type: layout
+    for layout in (RA, SE, UM, O1, O2, O3, O4, O5, O6, WF, YS,
+                   KS, CH, BR, BN, HN, SK, HC, CS, DM, TM)
+}
@@ -5,37 +5,189 @@ JV-Data Manager Module
 Based on JRA-VAN SDK Ver4.9.0.2
 """
 
+import glob
+import hashlib
 import sqlite3
 import time
 import os
-from typing import List, Dict, Any, Optional, Iterator
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Mapping, Tuple, Union
 from datetime import datetime, timedelta
 import logging
-from contextlib import contextmanager, closing
+from contextlib import ExitStack, contextmanager, closing, nullcontext
+from functools import lru_cache
+from itertools import repeat
 
 from .client import JVLinkClient
-from .parser import RecordParser, CodeMaster
+from .files import open_mmap, parse_file, record_spans, scan_file
+from .journal import Journal, JournalClient
+from .parser import RecordParser, CodeMaster, InternTable, parse_chunk
+from .pipeline import BatchSizer, DownloadWaiter, StageFailure, StageStats
+from .schema import SCHEMAS, _upsert_sql
 
 # ロギング設定
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def _combination_odds_sql(table: str, columns: Tuple[str, ...]) -> str:
+    """組番オッズテーブルの保存SQL（テーブルごとに1回だけ生成）"""
+    return _upsert_sql(table, ('race_key',) + columns + ('data_kubun',), ('race_key', 'kumi'),
+                       values=('?',) + ('NULLIF(?, -1)',) * len(columns) + ('?',))
+
+
 class JVDataManager:
     """JV-Dataの取得と保存を管理するクラス"""
     
-    def __init__(self, db_path: str = "jravan.db", save_path: str = "jvdata"):
+    # 組番オッズ（O2〜O6）のレコード種別 → テーブル名
+    COMBINATION_ODDS_TABLES = {
+        'O2': 'odds_umaren',
+        'O3': 'odds_wide',
+        'O4': 'odds_umatan',
+        'O5': 'odds_sanrenpuku',
+        'O6': 'odds_sanrentan',
+    }
+    
+    # テーブル名 → オッズ列（ワイドは下限・上限）
+    COMBINATION_ODDS_COLUMNS = {
+        'odds_umaren': ('odds',),
+        'odds_wide': ('odds_low', 'odds_high'),
+        'odds_umatan': ('odds',),
+        'odds_sanrenpuku': ('odds',),
+        'odds_sanrentan': ('odds',),
+    }
+    
+    # レコード種別 → 保存するフィールド（save_*_record が参照する列のみ解析する）
+    # 保存処理で参照するフィールドを増やした場合はここにも追加すること。
+    # ここにない種別（生成テーブルの種別など）は全フィールドを解析する。
+    STORED_FIELDS = {
+        'RA': ('data_kubun', 'race_key',
+               'race_info.race_name', 'race_info.fukusho_name', 'race_info.grade_cd',
+               'race_info.syubetsu_cd', 'race_info.kyori', 'race_info.track_cd',
+               'hassotime', 'toroku_tosu', 'syusso_tosu', 'condition'),
+        'SE': ('data_kubun', 'race_key', 'umaban', 'ketto_num', 'bamei',
+               'horse_info.seibetsu_cd', 'horse_info.barei', 'horse_info.keiro_cd',
+               'futan', 'jockey', 'bataijyu', 'zogen',
+               'trainer.code', 'trainer.name', 'trainer.syozoku',
+               'prize.honsyo', 'prize.fukasyo',
+               'result.kakutei_jyuni', 'result.time', 'result.chakusa',
+               'result.tansho_odds', 'result.ninsiki'),
+        'UM': ('data_kubun', 'ketto_num', 'del_kubun', 'bamei', 'birth_date', 'horse_info',
+               'keito', 'blood', 'tozai_cd', 'trainer', 'banushi', 'breeder', 'sanchi_name'),
+        'O1': ('data_kubun', 'race_key', 'odds'),
+        'O2': ('data_kubun', 'race_key', 'odds'),
+        'O3': ('data_kubun', 'race_key', 'odds'),
+        'O4': ('data_kubun', 'race_key', 'odds'),
+        'O5': ('data_kubun', 'race_key', 'odds'),
+        'O6': ('data_kubun', 'race_key', 'odds'),
+        'WF': ('data_kubun', 'race_key', 'weights'),
+        'YS': ('year', 'henko_id', 'kaisai_info'),
+    }
+    
+    # データ区分 → 優先度（レース詳細・レース結果。大きいほど後の段階）
+    # 優先度が既存の行より低いレコードでは上書きしない（表にない区分は0）
+    DATA_KUBUN_PRIORITY = {
+        '1': 0,  # 出走馬名表（木曜）
+        '2': 1,  # 出馬表（金・土曜）
+        '3': 2,  # 速報成績（3着まで）
+        '4': 3,  # 速報成績（5着まで）
+        '5': 4,  # 速報成績（全馬着順確定）
+        '6': 5,  # 速報成績（全馬着順＋コーナー通過順）
+        '7': 6,  # 成績（月曜）
+        '9': 6,  # レース中止（出走前の区分より後。成績とは同じ段階）
+        'A': 6,  # 地方競馬（JRAの段階とは別系統のため成績と同じ）
+        'B': 6,  # 海外国際レース（同上）
+    }
+    
+    # 該当レコードを削除するデータ区分（レース詳細・レース結果。提供ミスなどによる削除）
+    DELETE_DATA_KUBUN = '0'
+    
+    # 変更検出の対象（レコード種別 → 主キーのバイト位置 (開始, 終了)。layouts.py の位置 - 1）
+    # 前回保存したレコードとバイト列が同じレコードは、更新時に解析・保存を省く
+    CHANGE_KEYS = {
+        'RA': (17, 33),  # レースキー
+        'SE': (11, 29),  # レースキー・馬番
+    }
+    
+    # 読み込み段から解析段へ1回に渡すレコード数（マルチプロセス解析時は1ワーカー分）
+    PARSE_CHUNK_SIZE = 1000
+    
+    # パイプラインの段の間のキューに滞留できるチャンク数
+    PIPELINE_QUEUE_SIZE = 8
+    
+    # 保存バッチの件数を自動調整する場合の1トランザクションの目安（秒）
+    WRITE_BATCH_SECONDS = 0.2
+    
+    # 副次インデックス（名前, 対象）。一括取り込み（bulk）では削除し、取り込み後にまとめて作成する
+    SECONDARY_INDEXES = (
+        ('idx_race_date', 'races(year, monthday)'),
+        ('idx_race_jyo', 'races(jyo_code)'),
+        ('idx_result_ketto', 'results(ketto_num)'),
+        ('idx_result_jockey', 'results(jockey_code)'),
+        ('idx_result_trainer', 'results(trainer_code)'),
+        ('idx_horse_father', 'horses(father)'),
+        ('idx_horse_mother', 'horses(mother)'),
+    )
+    
+    # 一括取り込みのページキャッシュ（KiB）と1トランザクションの目安（秒。チャンクをまたいでまとめる）
+    BULK_CACHE_KIB = 512 * 1024
+    BULK_WRITE_BATCH_SECONDS = 2.0
+    
+    # 日本時間とUTCの差（JV-Link の日時は日本時間、処理履歴の CURRENT_TIMESTAMP はUTC）
+    JST_OFFSET = timedelta(hours=9)
+    
+    # ダウンロード待ちの進捗確認間隔（秒。初回から倍々に伸ばし、上限で打ち止め）
+    DOWNLOAD_POLL_INITIAL = 0.005
+    DOWNLOAD_POLL_MAX = 1.0
+    
+    def __init__(self, db_path: str = "jravan.db", save_path: str = "jvdata",
+                 parse_workers: int = 0, client: Optional[JVLinkClient] = None,
+                 resume: bool = True, journal: bool = True):
         """
         初期化
         
         Args:
             db_path: SQLiteデータベースパス
             save_path: JV-Dataファイル保存先パス
+            parse_workers: レコード解析のワーカープロセス数（0: 使用しない）
+            client: JV-Linkクライアント（None の場合は JVLinkClient。
+                    保存済みファイルの再生には replay.ReplayJVLinkClient を指定）
+            resume: チェックポイント済みのファイルを読み飛ばす（False の場合は全ファイルを取り込み直す）
+            journal: 取得した生レコードをジャーナル（{save_path}/journal）に記録する
         """
         self.db_path = db_path
         self.save_path = save_path
-        self.jvlink = JVLinkClient()
-        self.conn = None
+        self.parse_workers = parse_workers
+        self.resume = resume
+        self.journal_path = os.path.join(save_path, 'journal') if journal else None
+        self.jvlink = client if client is not None else JVLinkClient()
+        self.conn = None  # 書き込み用の接続（get_db_connection で接続し close まで使い回す）
+        self._write_lock = threading.RLock()
+        self._read_pool: List[sqlite3.Connection] = []  # 読み込み用の接続（read_connection）
+        self._pool_lock = threading.Lock()
         self._connection_pool_size = 5  # パフォーマンス向上のため
+        self.pipeline_stats: Dict[str, StageStats] = {}  # 直近の process_data の段ごとの計測値
+        self.download_wait = 0.0  # 直近の process_data のダウンロード待ち時間（秒）
+        self.record_changes: Dict[str, int] = {}  # 直近の process_data の変更検出の件数
+        self._failure = StageFailure()  # 実行中のパイプラインの段の例外
+        self.bulk = False  # 一括取り込み中（begin_bulk_load 〜 finish_bulk_load）
+        
+        # レコード種別 → (保存SQL, 登録値タプルのリスト) を返す関数
+        self._row_builders = {
+            'RA': self._race_rows,
+            'SE': self._result_rows,
+            'UM': self._horse_rows,
+            'O1': self._odds_rows,
+            'WF': self._weight_rows,
+            'YS': self._schedule_rows,
+            **dict.fromkeys(self.COMBINATION_ODDS_TABLES, self._combination_odds_rows),
+        }
+        
+        # 生レコードの先頭2バイト → 主キーの位置（CHANGE_KEYS）
+        self._change_keys = {record_type.encode(): slice(*span)
+                             for record_type, span in self.CHANGE_KEYS.items()}
         
         # ディレクトリ作成
         if not os.path.exists(save_path):
@@ -48,183 +200,243 @@ class JVDataManager:
         """データベース初期設定"""
         with self.get_db_connection() as conn:
             cursor = conn.cursor()
-        
-        # レーステーブル
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS races (
-                race_key TEXT PRIMARY KEY,
-                year TEXT,
-                monthday TEXT,
-                jyo_code TEXT,
-                jyo_name TEXT,
-                kaiji INTEGER,
-                nichiji INTEGER,
-                race_num INTEGER,
-                race_name TEXT,
-                fukusho_name TEXT,
-                grade_cd TEXT,
-                syubetsu_cd TEXT,
-                kyori INTEGER,
-                track_cd TEXT,
-                track_name TEXT,
-                tenko_cd TEXT,
-                tenko TEXT,
-                shiba_baba_cd TEXT,
-                shiba_baba TEXT,
-                dirt_baba_cd TEXT,
-                dirt_baba TEXT,
-                hassotime TEXT,
-                toroku_tosu INTEGER,
-                syusso_tosu INTEGER,
-                data_kubun TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # 馬毎レース情報テーブル
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS results (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                race_key TEXT,
-                umaban INTEGER,
-                ketto_num TEXT,
-                bamei TEXT,
-                seibetsu_cd TEXT,
-                barei INTEGER,
-                keiro_cd TEXT,
-                jockey_code TEXT,
-                jockey_name TEXT,
-                jockey_name_ryaku TEXT,
-                trainer_code TEXT,
-                trainer_name TEXT,
-                trainer_syozoku TEXT,
-                futan INTEGER,
-                bataijyu INTEGER,
-                zogen TEXT,
-                kakutei_jyuni INTEGER,
-                time TEXT,
-                chakusa TEXT,
-                tansho_odds REAL,
-                ninsiki INTEGER,
-                honsyo INTEGER,
-                fukasyo INTEGER,
-                data_kubun TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(race_key) REFERENCES races(race_key),
-                UNIQUE(race_key, umaban)
-            )
-        """)
-        
-        # 競走馬マスタテーブル
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS horses (
-                ketto_num TEXT PRIMARY KEY,
-                bamei TEXT,
-                birth_date TEXT,
-                seibetsu_cd TEXT,
-                hinsyu_cd TEXT,
-                keiro_cd TEXT,
-                keito TEXT,
-                father TEXT,
-                mother TEXT,
-                bms TEXT,
-                tozai_cd TEXT,
-                trainer_code TEXT,
-                trainer_name TEXT,
-                banushi_code TEXT,
-                banushi_name TEXT,
-                breeder_code TEXT,
-                breeder_name TEXT,
-                sanchi_name TEXT,
-                del_kubun TEXT,
-                data_kubun TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # オッズテーブル
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS odds (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                race_key TEXT,
-                umaban INTEGER,
-                tansho_odds INTEGER,
-                fukusho_odds_low INTEGER,
-                fukusho_odds_high INTEGER,
-                tansho_ninki INTEGER,
-                fukusho_ninki INTEGER,
-                data_kubun TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(race_key) REFERENCES races(race_key),
-                UNIQUE(race_key, umaban)
-            )
-        """)
-        
-        # 馬体重テーブル
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS weights (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                race_key TEXT,
-                umaban INTEGER,
-                bataijyu INTEGER,
-                zogen_fuka TEXT,
-                zogen TEXT,
-                data_kubun TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(race_key) REFERENCES races(race_key),
-                UNIQUE(race_key, umaban)
-            )
-        """)
-        
-        # 年間スケジュールテーブル
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS schedules (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                year TEXT,
-                kaiji_date TEXT,
-                jyo_code TEXT,
-                jyo_name TEXT,
-                kaiji INTEGER,
-                nichiji INTEGER,
-                youbi TEXT,
-                henko_id TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(year, kaiji_date, jyo_code, kaiji, nichiji)
-            )
-        """)
-        
-        # 処理履歴テーブル
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS process_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                process_type TEXT,
-                data_spec TEXT,
-                from_time TEXT,
-                to_time TEXT,
-                read_count INTEGER,
-                download_count INTEGER,
-                processed_count INTEGER,
-                error_count INTEGER,
-                status TEXT,
-                started_at TIMESTAMP,
-                finished_at TIMESTAMP
-            )
-        """)
-        
-        # インデックス作成
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_race_date ON races(year, monthday)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_race_jyo ON races(jyo_code)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_result_ketto ON results(ketto_num)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_result_jockey ON results(jockey_code)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_result_trainer ON results(trainer_code)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_horse_father ON horses(father)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_horse_mother ON horses(mother)")
-        
-        conn.commit()
-        logger.info("データベース初期化完了")
+            
+            # レーステーブル
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS races (
+                    race_key TEXT PRIMARY KEY,
+                    year TEXT,
+                    monthday TEXT,
+                    jyo_code TEXT,
+                    jyo_name TEXT,
+                    kaiji INTEGER,
+                    nichiji INTEGER,
+                    race_num INTEGER,
+                    race_name TEXT,
+                    fukusho_name TEXT,
+                    grade_cd TEXT,
+                    syubetsu_cd TEXT,
+                    kyori INTEGER,
+                    track_cd TEXT,
+                    track_name TEXT,
+                    tenko_cd TEXT,
+                    tenko TEXT,
+                    shiba_baba_cd TEXT,
+                    shiba_baba TEXT,
+                    dirt_baba_cd TEXT,
+                    dirt_baba TEXT,
+                    hassotime TEXT,
+                    toroku_tosu INTEGER,
+                    syusso_tosu INTEGER,
+                    data_kubun TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # 馬毎レース情報テーブル
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    race_key TEXT,
+                    umaban INTEGER,
+                    ketto_num TEXT,
+                    bamei TEXT,
+                    seibetsu_cd TEXT,
+                    barei INTEGER,
+                    keiro_cd TEXT,
+                    jockey_code TEXT,
+                    jockey_name TEXT,
+                    jockey_name_ryaku TEXT,
+                    trainer_code TEXT,
+                    trainer_name TEXT,
+                    trainer_syozoku TEXT,
+                    futan INTEGER,
+                    bataijyu INTEGER,
+                    zogen TEXT,
+                    kakutei_jyuni INTEGER,
+                    time TEXT,
+                    chakusa TEXT,
+                    tansho_odds REAL,
+                    ninsiki INTEGER,
+                    honsyo INTEGER,
+                    fukasyo INTEGER,
+                    data_kubun TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY(race_key) REFERENCES races(race_key),
+                    UNIQUE(race_key, umaban)
+                )
+            """)
+            
+            # 競走馬マスタテーブル
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS horses (
+                    ketto_num TEXT PRIMARY KEY,
+                    bamei TEXT,
+                    birth_date TEXT,
+                    seibetsu_cd TEXT,
+                    hinsyu_cd TEXT,
+                    keiro_cd TEXT,
+                    keito TEXT,
+                    father TEXT,
+                    mother TEXT,
+                    bms TEXT,
+                    tozai_cd TEXT,
+                    trainer_code TEXT,
+                    trainer_name TEXT,
+                    banushi_code TEXT,
+                    banushi_name TEXT,
+                    breeder_code TEXT,
+                    breeder_name TEXT,
+                    sanchi_name TEXT,
+                    del_kubun TEXT,
+                    data_kubun TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # オッズテーブル
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS odds (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    race_key TEXT,
+                    umaban INTEGER,
+                    tansho_odds INTEGER,
+                    fukusho_odds_low INTEGER,
+                    fukusho_odds_high INTEGER,
+                    tansho_ninki INTEGER,
+                    fukusho_ninki INTEGER,
+                    data_kubun TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY(race_key) REFERENCES races(race_key),
+                    UNIQUE(race_key, umaban)
+                )
+            """)
+            
+            # 組番オッズテーブル（O2〜O6）
+            # 3連単は1レース最大4896組になるため、サロゲートキーを持たない
+            # WITHOUT ROWID テーブルに整数のみで格納する
+            for table, odds_columns in self.COMBINATION_ODDS_COLUMNS.items():
+                cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        race_key TEXT,
+                        kumi INTEGER,
+                        {' INTEGER, '.join(odds_columns)} INTEGER,
+                        ninki INTEGER,
+                        data_kubun TEXT,
+                        PRIMARY KEY(race_key, kumi)
+                    ) WITHOUT ROWID
+                """)
+            
+            # レイアウトから生成したテーブル（マスタ・マイニング系）
+            for schema in SCHEMAS.values():
+                for ddl in schema.ddl:
+                    cursor.execute(ddl)
+            
+            # 馬体重テーブル
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS weights (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    race_key TEXT,
+                    umaban INTEGER,
+                    bataijyu INTEGER,
+                    zogen_fuka TEXT,
+                    zogen TEXT,
+                    data_kubun TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY(race_key) REFERENCES races(race_key),
+                    UNIQUE(race_key, umaban)
+                )
+            """)
+            
+            # 年間スケジュールテーブル
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schedules (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    year TEXT,
+                    kaiji_date TEXT,
+                    jyo_code TEXT,
+                    jyo_name TEXT,
+                    kaiji INTEGER,
+                    nichiji INTEGER,
+                    youbi TEXT,
+                    henko_id TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(year, kaiji_date, jyo_code, kaiji, nichiji)
+                )
+            """)
+            
+            # 処理履歴テーブル
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS process_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    process_type TEXT,
+                    data_spec TEXT,
+                    from_time TEXT,
+                    to_time TEXT,
+                    read_count INTEGER,
+                    download_count INTEGER,
+                    processed_count INTEGER,
+                    error_count INTEGER,
+                    status TEXT,
+                    started_at TIMESTAMP,
+                    finished_at TIMESTAMP,
+                    download_wait_seconds REAL,
+                    mode TEXT,
+                    new_count INTEGER,
+                    changed_count INTEGER,
+                    skipped_count INTEGER
+                )
+            """)
+            
+            # ファイル単位のチェックポイント（中断後の再開用）
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS file_checkpoints (
+                    filename TEXT PRIMARY KEY,
+                    record_count INTEGER,
+                    hash TEXT,
+                    completed_at TIMESTAMP
+                )
+            """)
+            
+            # 変更検出用のレコードのハッシュ（キー: レコード種別 + 主キー）
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS record_hashes (
+                    key BLOB PRIMARY KEY,
+                    hash BLOB
+                ) WITHOUT ROWID
+            """)
+            
+            # 旧バージョンで作成した処理履歴テーブルに列を追加
+            columns = {row[1] for row in cursor.execute("PRAGMA table_info(process_history)")}
+            if 'download_wait_seconds' not in columns:
+                cursor.execute("ALTER TABLE process_history ADD COLUMN download_wait_seconds REAL")
+            if 'mode' not in columns:
+                cursor.execute("ALTER TABLE process_history ADD COLUMN mode TEXT")
+            for column in ('new_count', 'changed_count', 'skipped_count'):
+                if column not in columns:
+                    cursor.execute(f"ALTER TABLE process_history ADD COLUMN {column} INTEGER")
+            
+            # インデックス作成（中断した一括取り込みで削除されたままのインデックスもここで作り直す）
+            for name, target in self.SECONDARY_INDEXES:
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+            
+            interrupted = [row[0] for row in cursor.execute(
+                "SELECT id FROM process_history WHERE mode = 'BULK' AND status = 'RUNNING'")]
+            if interrupted:
+                logger.warning(f"中断した一括取り込みがあります（処理履歴 {interrupted}）。"
+                               f"インデックスを作り直しました。--setup で未完了のファイルから再開できます")
+                cursor.execute("""
+                    UPDATE process_history
+                    SET status = 'INTERRUPTED', finished_at = CURRENT_TIMESTAMP
+                    WHERE mode = 'BULK' AND status = 'RUNNING'
+                """)
+                cursor.execute("ANALYZE")
+            
+            conn.commit()
+            logger.info("データベース初期化完了")
     
     def __enter__(self):
         """コンテキストマネージャー: エントリー"""
@@ -235,37 +447,134 @@ class JVDataManager:
         self.close()
         return False
     
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """
+        データベースに接続し、接続単位の設定（PRAGMA）を適用する
+        
+        接続はスレッド間で受け渡すため check_same_thread=False とし、
+        同時に使うのは1スレッドだけになるよう呼び出し側で管理する
+        （書き込み用はロック、読み込み用はプールからの貸し出し）。
+        """
+        conn = sqlite3.connect(
+            self.db_path, 
+            timeout=30.0,  # タイムアウト設定
+            check_same_thread=False  # 接続の所有はロック・プールで管理
+        )
+        # パフォーマンス改善のための設定（接続ごとに1回だけ）
+        if read_only:
+            conn.execute('PRAGMA query_only=ON')  # 読み込み専用
+        else:
+            conn.execute('PRAGMA journal_mode=WAL')  # Write-Ahead Logging
+            conn.execute('PRAGMA synchronous=NORMAL')  # 同期モード調整
+        conn.execute('PRAGMA cache_size=10000')  # キャッシュサイズ増加
+        conn.execute('PRAGMA temp_store=memory')  # 一時ファイルをメモリに保存
+        conn.row_factory = sqlite3.Row  # 行を辞書風にアクセス可能に
+        return conn
+    
     @contextmanager
     def get_db_connection(self) -> Iterator[sqlite3.Connection]:
         """
-        データベース接続のコンテキストマネージャー
+        書き込み用データベース接続のコンテキストマネージャー
+        
+        接続はマネージャーが1本だけ持ち、最初の呼び出しで接続して以降は
+        close() まで使い回す（PRAGMA の適用も1回だけ）。複数のスレッド
+        （書き込みスレッド・呼び出し元のスレッドなど）から使われるため、
+        with の間はロックで1スレッドに限定する。トランザクションは with を
+        抜ける前に確定すること（確定していない変更は with を抜けるときに
+        ロールバックする）。
         
         Yields:
             sqlite3.Connection: データベース接続
         """
-        conn = None
+        with self._write_lock:
+            if self.conn is None:
+                self.conn = self._connect()
+            conn = self.conn
+            try:
+                yield conn
+            except sqlite3.Error as e:
+                logger.error(f"データベースエラー: {e}")
+                raise
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+    
+    @contextmanager
+    def read_connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        読み込み用データベース接続のコンテキストマネージャー
+        
+        読み込み専用の接続をプール（最大 _connection_pool_size 本）から
+        借りて、with を抜けると返す。借りている間はそのスレッドだけが使う。
+        WAL のため書き込み中でも書き込み用の接続を待たずに読める。
+        
+        Yields:
+            sqlite3.Connection: 読み込み専用のデータベース接続
+        """
+        with self._pool_lock:
+            conn = self._read_pool.pop() if self._read_pool else None
+        if conn is None:
+            conn = self._connect(read_only=True)
         try:
-            conn = sqlite3.connect(
-                self.db_path, 
-                timeout=30.0,  # タイムアウト設定
-                check_same_thread=False  # スレッドセーフ
-            )
-            # パフォーマンス改善のための設定
-            conn.execute('PRAGMA journal_mode=WAL')  # Write-Ahead Logging
-            conn.execute('PRAGMA synchronous=NORMAL')  # 同期モード調整
-            conn.execute('PRAGMA cache_size=10000')  # キャッシュサイズ増加
-            conn.execute('PRAGMA temp_store=memory')  # 一時ファイルをメモリに保存
-            conn.row_factory = sqlite3.Row  # 行を辞書風にアクセス可能に
             yield conn
-        except sqlite3.Error as e:
-            logger.error(f"データベースエラー: {e}")
-            if conn:
-                conn.rollback()
-            raise
         finally:
-            if conn:
+            # 読み込み中のトランザクションを残さない
+            conn.rollback()
+            with self._pool_lock:
+                if len(self._read_pool) < self._connection_pool_size:
+                    self._read_pool.append(conn)
+                    conn = None
+            if conn is not None:
                 conn.close()
     
+    def begin_bulk_load(self) -> None:
+        """
+        一括取り込みモードを開始する
+        
+        副次インデックス（SECONDARY_INDEXES）を削除し、書き込み用の接続を
+        synchronous=OFF・大きなページキャッシュ（BULK_CACHE_KIB）に切り替える。
+        保存はチャンクをまたいで1トランザクションにまとめ、保存時間の合計が
+        BULK_WRITE_BATCH_SECONDS に達するたびに確定する。
+        主キー・UNIQUE制約は保存SQLの上書き（ON CONFLICT）に必要なため残す。
+        
+        synchronous=OFF でもプロセスの異常終了ではデータベースは壊れない
+        （WAL のため）。OSの異常終了・電源断では直近のトランザクションが
+        失われるか、データベースが壊れる可能性がある。
+        """
+        with self.get_db_connection() as conn:
+            for name, _ in self.SECONDARY_INDEXES:
+                conn.execute(f"DROP INDEX IF EXISTS {name}")
+            conn.commit()
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute(f'PRAGMA cache_size=-{self.BULK_CACHE_KIB}')
+        self.bulk = True
+        logger.info(f"一括取り込みモード: 副次インデックス{len(self.SECONDARY_INDEXES)}件を削除, "
+                    f"synchronous=OFF, cache_size={self.BULK_CACHE_KIB // 1024}MiB")
+    
+    def finish_bulk_load(self) -> None:
+        """
+        一括取り込みモードを終了する（副次インデックスの作成・ANALYZE・設定の復元）
+        
+        インデックスは取り込み済みの行をまとめてソートして作成する
+        （1行ずつ更新するより速い）。取り込みが失敗した場合も呼び出す。
+        """
+        if not self.bulk:
+            return
+        
+        start = time.perf_counter()
+        with self.get_db_connection() as conn:
+            try:
+                for name, target in self.SECONDARY_INDEXES:
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+                conn.commit()
+                conn.execute("ANALYZE")
+                conn.commit()
+            finally:
+                conn.execute('PRAGMA synchronous=NORMAL')
+                conn.execute('PRAGMA cache_size=10000')
+                self.bulk = False
+        logger.info(f"一括取り込みモード終了: インデックス作成・ANALYZE {time.perf_counter() - start:.1f}秒")
+    
     def initialize_jvlink(self, sid: str = "UNKNOWN") -> bool:
         """
         JV-Link初期化
@@ -287,24 +596,37 @@ class JVDataManager:
         
         return True
     
-    def download_setup_data(self, data_spec: str = "RACE") -> bool:
+    def download_setup_data(self, data_spec: str = "RACE", bulk: bool = False) -> bool:
         """
         セットアップデータ取得（初回実行時）
         
+        bulk=True の場合は一括取り込みモードで取り込む（begin_bulk_load 参照）。
+        副次インデックスを削除し、同期を止めて（synchronous=OFF）大きな
+        トランザクションで保存したあと、インデックスをまとめて作成して
+        ANALYZE する。途中で異常終了した場合でもデータベースは壊れず
+        （OSの異常終了・電源断を除く）、次回起動時にインデックスを作り直し、
+        再実行すればチェックポイント済みのファイルから再開する。
+        
         Args:
             data_spec: データ種別
+            bulk: 一括取り込みモード（初回の大量取り込み用）
             
         Returns:
             成功時True
         """
-        logger.info(f"セットアップデータ取得開始: {data_spec}")
+        mode = 'BULK' if bulk else 'NORMAL'
+        logger.info(f"セットアップデータ取得開始: {data_spec}"
+                    f"{'（一括取り込みモード）' if bulk else ''}")
         
         # 処理履歴記録開始
-        process_id = self.start_process_history("SETUP", data_spec, "99999999999999")
+        process_id = self.start_process_history("SETUP", data_spec, "99999999999999", mode)
+        if bulk:
+            self.begin_bulk_load()
         
         try:
             # JV-Link初期化
             if not self.initialize_jvlink():
+                self.finish_process_history(process_id, "ERROR", 0, 0)
                 return False
             
             # セットアップデータ取得（オプション=3）
@@ -319,13 +641,18 @@ class JVDataManager:
                 self.finish_process_history(process_id, "ERROR", 0, 0)
                 return False
             
-            logger.info(f"読込対象: {read_count}件, ダウンロード: {download_count}ファイル")
+            logger.info(f"読込対象: {read_count}ファイル, ダウンロード: {download_count}ファイル")
+            
+            # データ読み込みと保存（読込対象数はファイル数のため全件読み込む）
+            processed, errors = self.process_data(max_records=None, checkpoint=True)
             
-            # データ読み込みと保存
-            processed, errors = self.process_data(max_records=read_count)
+            # 一括取り込みはインデックスを作り終えてから完了とする
+            if bulk:
+                self.finish_bulk_load()
             
             # 処理履歴更新
-            self.finish_process_history(process_id, "SUCCESS", processed, errors)
+            self.finish_process_history(process_id, "SUCCESS", processed, errors,
+                                        self.download_wait)
             
             logger.info(f"セットアップ完了: 処理{processed}件, エラー{errors}件")
             return True
@@ -337,11 +664,16 @@ class JVDataManager:
             
         finally:
             self.jvlink.close()
+            if self.bulk:
+                self.finish_bulk_load()
     
     def update_data(self, from_date: str = None, data_spec: str = "DIFF") -> bool:
         """
         差分データ更新
         
+        前回保存したレコードとバイト列が同じレコード（CHANGE_KEYS の種別）は
+        解析・保存を省き、新規・変更・省略の件数を処理履歴に記録する。
+        
         Args:
             from_date: 開始日（YYYYMMDDまたはNone）
             data_spec: データ種別
@@ -379,13 +711,15 @@ class JVDataManager:
                 self.finish_process_history(process_id, "ERROR", 0, 0)
                 return False
             
-            logger.info(f"更新対象: {read_count}件")
+            logger.info(f"更新対象: {read_count}ファイル")
             
-            # データ処理
-            processed, errors = self.process_data(max_records=read_count)
+            # データ処理（読込対象数はファイル数のため全件読み込む）
+            processed, errors = self.process_data(max_records=None, checkpoint=True,
+                                                  skip_unchanged=True)
             
             # 処理履歴更新
-            self.finish_process_history(process_id, "SUCCESS", processed, errors)
+            self.finish_process_history(process_id, "SUCCESS", processed, errors,
+                                        self.download_wait, self.record_changes)
             
             logger.info(f"更新完了: 処理{processed}件, エラー{errors}件")
             return True
@@ -427,11 +761,12 @@ class JVDataManager:
                 self.finish_process_history(process_id, "ERROR", 0, 0)
                 return False
             
-            # データ処理
-            processed, errors = self.process_data(max_records=10000)
+            # データ処理（前回と同じレコードは保存しない）
+            processed, errors = self.process_data(max_records=10000, skip_unchanged=True)
             
             # 処理履歴更新
-            self.finish_process_history(process_id, "SUCCESS", processed, errors)
+            self.finish_process_history(process_id, "SUCCESS", processed, errors,
+                                        self.download_wait, self.record_changes)
             
             logger.info(f"リアルタイム取得完了: 処理{processed}件")
             return True
@@ -444,134 +779,827 @@ class JVDataManager:
         finally:
             self.jvlink.close()
     
-    def process_data(self, max_records: int = 10000, batch_size: int = 100) -> tuple:
+    def iter_records(self, data_spec: str, from_time: str = "", option: int = 1,
+                     raw: bool = False,
+                     fields: Optional[Mapping[str, Iterable[str]]] = None
+                     ) -> Iterator[Union[Dict[str, Any], memoryview]]:
+        """
+        蓄積系データを取得し、レコードを1件ずつ返す（データベースには保存しない）
+        
+        gets() で読んだレコードをその場で解析して返すため、レコードを
+        溜め込まず、セットアップデータ全体でもメモリ使用量は一定になる。
+        ファイルの切り替わり（-1）とダウンロード待ち（-3）は内部で処理する。
+        
+        ジェネレータを途中で閉じた場合（break・close()・例外）は JVCancel で
+        ダウンロードを中止してから JVClose する。
+        
+        raw=True の場合は gets_view で読み、レコード部分の memoryview を返す。
+        内容は次のレコードを読むと上書きされるため、保持する場合は bytes() で
+        コピーすること。
+        
+        Args:
+            data_spec: データ種別
+            from_time: 取得開始日時（YYYYMMDDhhmmss。セットアップは "99999999999999"）
+            option: オプション（1: 通常, 2: 今週, 3: セットアップ）
+            raw: 解析せずに生レコード（memoryview）を返す
+            fields: レコード種別 → 解析するフィールド（None の場合は全フィールド）
+        
+        Yields:
+            解析結果辞書（raw=True の場合は生レコードの memoryview）
+        
+        Examples:
+            >>> for record in manager.iter_records('RACE', '99999999999999', option=3):
+            ...     sink.write(record)
+        """
+        if not self.initialize_jvlink():
+            raise RuntimeError("JV-Link初期化エラー")
+        
+        ret, read_count, download_count, _ = self.jvlink.open(data_spec, from_time, option)
+        if ret < 0:
+            raise RuntimeError(f"JVOpenエラー: {self.jvlink.get_error_message(ret)}")
+        logger.info(f"読込対象: {read_count}ファイル, ダウンロード: {download_count}ファイル")
+        
+        # 名称のインターン表は実行ごと
+        table = InternTable()
+        client = self.jvlink
+        gets = client.gets_view if raw else client.gets
+        parse = RecordParser.parse
+        waiter = DownloadWaiter(self.DOWNLOAD_POLL_INITIAL, self.DOWNLOAD_POLL_MAX)
+        read = 0
+        errors = 0
+        finished = False
+        
+        try:
+            while True:
+                ret, data, filename = gets()
+                
+                if ret > 0:
+                    read += 1
+                    if raw:
+                        yield data[:ret]
+                        continue
+                    try:
+                        record = parse(data, fields, table)
+                    except Exception as e:
+                        logger.error(f"解析エラー: {e}")
+                        continue
+                    if record:
+                        yield record
+                
+                elif ret == 0:
+                    finished = True
+                    logger.info(f"全データ読み込み完了: {read}件")
+                    break
+                
+                elif ret == -1:
+                    logger.info(f"ファイル処理中: {filename}")
+                
+                elif ret == -3:
+                    waiter.wait(client.status)
+                
+                else:
+                    logger.error(f"JVReadエラー: {client.get_error_message(ret)}")
+                    errors += 1
+                    if errors > 10:
+                        raise RuntimeError("JVReadエラーが多いため処理を中断")
+        finally:
+            if not finished:
+                # 途中で閉じられた場合はダウンロードを中止する
+                client.cancel()
+            client.close()
+            self.download_wait = waiter.waited
+    
+    def reparse(self, record_types: Optional[List[str]] = None,
+                race_key_from: Optional[str] = None, race_key_to: Optional[str] = None) -> bool:
+        """
+        ジャーナルからテーブルを作り直す（JV-Linkは使用しない）
+        
+        ジャーナルに記録した生レコードを取り込み処理（process_data）に流し、
+        解析・保存をやり直す。既存の行は上書きされる（データ区分の優先度が
+        既存の行より低いレコードを除く）。
+        
+        Args:
+            record_types: 対象のレコード種別（None の場合はすべて）
+            race_key_from: レースキーの下限（前方一致。'2015' で2015年以降）
+            race_key_to: レースキーの上限（前方一致。'2024' で2024年まで）
+            
+        Returns:
+            成功時True
+        """
+        if not self.journal_path or not os.path.exists(self.journal_path):
+            logger.error(f"ジャーナルがありません: {self.journal_path}")
+            return False
+        
+        spec = ','.join(record_types) if record_types else 'ALL'
+        logger.info(f"ジャーナルから再解析開始: {spec}")
+        process_id = self.start_process_history(
+            "REPARSE", spec, f"{race_key_from or ''}-{race_key_to or ''}")
+        
+        try:
+            with Journal(self.journal_path) as journal:
+                client = JournalClient(journal, record_types, race_key_from, race_key_to)
+                client.open()
+                try:
+                    processed, errors = self.process_data(max_records=None, source=client)
+                finally:
+                    client.close()
+            
+            self.finish_process_history(process_id, "SUCCESS", processed, errors)
+            logger.info(f"再解析完了: 処理{processed}件, エラー{errors}件")
+            return True
+            
+        except Exception as e:
+            logger.error(f"再解析エラー: {e}")
+            self.finish_process_history(process_id, "ERROR", 0, 0)
+            return False
+    
+    def load_files(self, path: Optional[str] = None, pattern: str = '*.jvd',
+                   batch_size: Optional[int] = None) -> bool:
+        """
+        保存済みのJV-Dataファイルを直接読み込んで取り込む（JV-Linkは使用しない）
+        
+        ファイルを mmap してレコードを区切り（files.py 参照）、PARSE_CHUNK_SIZE 件
+        ごとの範囲を解析する。parse_workers > 0 の場合は範囲ごとにワーカープロセスで
+        解析するため、ファイル内・ファイル間で並列に解析される。保存は process_data と
+        同じ書き込みスレッドが投入順に行う。
+        
+        チェックポイントは process_data(checkpoint=True) と共通で、取り込み済みの
+        ファイルは読み飛ばす（resume=False の場合は取り込み直す）。
+        ジャーナルは記録しない。変更検出のハッシュは記録する（記録済みのハッシュとの
+        比較はせず全件を保存するため、次回の更新では取り込んだレコードと同じものを省く）。
+        
+        Args:
+            path: JV-Dataファイルのディレクトリ（None の場合は save_path。サブディレクトリも対象）
+            pattern: 対象ファイル名のパターン
+            batch_size: バッチサイズ（1トランザクションで保存する件数。None の場合は自動調整）
+            
+        Returns:
+            成功時True
+        """
+        path = path or self.save_path
+        files = sorted(f for f in glob.glob(os.path.join(path, '**', pattern), recursive=True)
+                       if os.path.isfile(f))
+        logger.info(f"ファイル取り込み開始: {path} ({len(files)}ファイル)")
+        process_id = self.start_process_history("LOAD", pattern, path)
+        
+        try:
+            processed, errors = self._load_files(files, batch_size)
+            self.finish_process_history(process_id, "SUCCESS", processed, errors)
+            logger.info(f"ファイル取り込み完了: 処理{processed}件, エラー{errors}件")
+            return True
+            
+        except Exception as e:
+            logger.error(f"ファイル取り込みエラー: {e}")
+            self.finish_process_history(process_id, "ERROR", 0, 0)
+            return False
+    
+    def _load_files(self, files: List[str], batch_size: Optional[int]) -> tuple:
+        """
+        ファイルの範囲を解析段（ワーカープロセスまたは呼び出し元のスレッド）で
+        解析し、書き込みスレッドへ渡す
+        
+        Returns:
+            (処理件数, エラー件数)のタプル
+        """
+        # 名称のインターン表は実行ごと（ワーカープロセスはプロセスごとの表）
+        table = InternTable()
+        
+        stats = {name: StageStats(name) for name in ('読み込み', '解析', '保存')}
+        self.pipeline_stats = stats
+        parsed = queue.Queue(maxsize=self.PIPELINE_QUEUE_SIZE)
+        written = {'processed': 0, 'errors': 0}
+        rejected_before = sum(RecordParser.rejected.values())
+        completed = self.get_completed_files() if self.resume else set()
+        skipped = 0
+        
+        executor = None
+        if self.parse_workers > 0:
+            logger.info(f"マルチプロセス解析: {self.parse_workers}ワーカー")
+            executor = ProcessPoolExecutor(max_workers=self.parse_workers)
+        
+        self._failure = StageFailure()
+        writer = threading.Thread(target=self._write_stage, name='jravan-writer',
+                                  args=(parsed, batch_size, stats['保存'], written))
+        writer.start()
+        
+        try:
+            for i, path in enumerate(files, 1):
+                if self._failure.failed:
+                    break
+                filename = os.path.basename(path)
+                if filename in completed:
+                    skipped += 1
+                    continue
+                
+                with stats['読み込み'].work():
+                    spans, count, digest = scan_file(path, self.PARSE_CHUNK_SIZE)
+                if spans is None:
+                    logger.warning(f"JV-Dataのレコード形式ではないためスキップ: {filename}")
+                    continue
+                logger.info(f"ファイル処理中: {filename} ({i}/{len(files)}, {count}件)")
+                stats['読み込み'].items += 1
+                stats['読み込み'].records += count
+                
+                # チェックポイントはファイルの最後の範囲に添える。変更検出のハッシュは
+                # 範囲のレコードから求め、同じトランザクションで記録する（省略はしない）
+                with open_mmap(path) as buf:
+                    for n, (start, stop) in enumerate(spans, 1):
+                        file_checkpoint = (filename, count, digest) if n == len(spans) else None
+                        with stats['解析'].work():
+                            # レコードのスライスは mmap を閉じる前に解放する（ハッシュだけを残す）
+                            hashes = self._detect_changes(
+                                [buf[a:b] for a, b in record_spans(buf, start, stop)])[1]
+                            if executor:
+                                result = executor.submit(parse_file, path, start, stop,
+                                                         self.STORED_FIELDS)
+                            else:
+                                result = parse_file(path, start, stop, self.STORED_FIELDS,
+                                                    table)[:2]
+                        stats['解析'].items += 1
+                        stats['解析'].put(parsed, (result, file_checkpoint, hashes))
+        finally:
+            parsed.put(None)
+            writer.join()
+            if executor:
+                executor.shutdown()
+        
+        if skipped:
+            logger.info(f"チェックポイント済みのためスキップ: {skipped}ファイル")
+        for stage in stats.values():
+            logger.info(f"パイプライン {stage}")
+        self._failure.raise_error()
+        
+        rejected = sum(RecordParser.rejected.values()) - rejected_before
+        if rejected:
+            logger.warning(f"レコード長不正のため除外: {rejected}件 ({dict(RecordParser.rejected)})")
+        
+        return (written['processed'], written['errors'])
+    
+    def process_data(self, max_records: Optional[int] = 10000, batch_size: Optional[int] = None,
+                     checkpoint: bool = False, source: Optional[JVLinkClient] = None,
+                     skip_unchanged: bool = False) -> tuple:
         """
-        データ読み込みと処理（バッチ処理対応）
+        データ読み込みと処理（パイプライン処理）
+        
+        読み込み・解析・保存を別スレッドの3段に分け、上限付きのキューで
+        つなぐ（pipeline.py 参照）。読み込みはJV-Linkを生成した呼び出し元の
+        スレッドで行う。parse_workers > 0 の場合、解析は PARSE_CHUNK_SIZE 件
+        ずつワーカープロセスで行う。保存は書き込みスレッド1本が投入順に
+        行うため、同一レースキーのレコードの順序（上書き・削除の
+        順）は逐次処理と変わらない。
+        
+        段ごとの計測値は処理後に pipeline_stats で参照できる。
+        解析段・保存段で例外が発生した場合は読み込みを打ち切り、全段の終了後に
+        その例外を送出する（StageFailure 参照）。
+        
+        checkpoint=True の場合、ファイルごとにレコード数とハッシュを
+        file_checkpoints に記録する（ファイルの最後のバッチと同じトランザクション）。
+        中断後に再実行すると、記録済みのファイルは解析・保存せずに読み飛ばす。
+        
+        JV-Linkから読み込んだ生レコードは、解析段でチャンクごとにジャーナルへ
+        追記する（journal_path が None の場合・source を指定した場合は記録しない）。
+        
+        CHANGE_KEYS の種別のレコードは、解析段で生レコードのハッシュを求め、
+        保存段で record_hashes に記録する（レコードと同じトランザクション）。
+        skip_unchanged=True の場合は、記録済みのハッシュと同じレコードを
+        解析・保存せずに除き、新規・変更・省略の件数を record_changes に記録する。
         
         Args:
-            max_records: 最大処理レコード数
-            batch_size: バッチサイズ（パフォーマンス向上）
+            max_records: 最大処理レコード数（None の場合は全データ読み込み完了まで）
+            batch_size: バッチサイズ（1トランザクションで保存する件数。None の場合は自動調整）
+            checkpoint: ファイル単位のチェックポイントを記録・利用する（蓄積系データ用）
+            source: 読み込み元（None の場合は self.jvlink。reparse では JournalClient）
+            skip_unchanged: 前回保存したレコードと同じレコードを解析・保存しない（更新用）
             
         Returns:
             (処理件数, エラー件数)のタプル
         """
-        processed = 0
+        if max_records is None:
+            max_records = float('inf')
+        
+        stats = {name: StageStats(name) for name in ('読み込み', '解析', '保存')}
+        self.pipeline_stats = stats
+        raw = queue.Queue(maxsize=self.PIPELINE_QUEUE_SIZE)
+        parsed = queue.Queue(maxsize=self.PIPELINE_QUEUE_SIZE)
+        written = {'processed': 0, 'errors': 0}
+        rejected_before = sum(RecordParser.rejected.values())
+        
+        executor = None
+        if self.parse_workers > 0:
+            logger.info(f"マルチプロセス解析: {self.parse_workers}ワーカー")
+            executor = ProcessPoolExecutor(max_workers=self.parse_workers)
+        
+        journal = self._open_journal() if source is None else None
+        self._failure = StageFailure()
+        self.record_changes = dict.fromkeys(('new', 'changed', 'skipped'), 0)
+        # 今回の実行で保存段へ渡したレコードのハッシュ（保存前のレコードとの比較用）
+        seen = {} if skip_unchanged else None
+        
+        threads = [
+            threading.Thread(target=self._parse_stage, name='jravan-parser',
+                             args=(raw, parsed, executor, stats['解析'], journal, seen,
+                                   InternTable())),
+            threading.Thread(target=self._write_stage, name='jravan-writer',
+                             args=(parsed, batch_size, stats['保存'], written)),
+        ]
+        for thread in threads:
+            thread.start()
+        
+        try:
+            errors = self._read_stage(raw, max_records, stats['読み込み'], checkpoint,
+                                      source or self.jvlink)
+        finally:
+            raw.put(None)
+            for thread in threads:
+                thread.join()
+            if executor:
+                executor.shutdown()
+            if journal:
+                journal.close()
+        
+        for stage in stats.values():
+            logger.info(f"パイプライン {stage}")
+        self._failure.raise_error()
+        if skip_unchanged:
+            changes = self.record_changes
+            logger.info(f"変更検出: 新規{changes['new']}件, 変更{changes['changed']}件, "
+                        f"同一のため省略{changes['skipped']}件")
+        
+        rejected = sum(RecordParser.rejected.values()) - rejected_before
+        if rejected:
+            logger.warning(f"レコード長不正のため除外: {rejected}件 ({dict(RecordParser.rejected)})")
+        
+        return (written['processed'], errors + written['errors'])
+    
+    def _open_journal(self) -> Optional[Journal]:
+        """process_data で生レコードを記録するジャーナル（記録しない場合はNone）"""
+        return Journal(self.journal_path) if self.journal_path else None
+    
+    def _read_stage(self, raw: queue.Queue, max_records: float, stats: StageStats,
+                    checkpoint: bool = False, client: Optional[JVLinkClient] = None) -> int:
+        """
+        読み込み段（JV-Linkを生成したスレッドで実行）
+        
+        生レコードを PARSE_CHUNK_SIZE 件ずつ（ファイルをまたがずに）解析段へ渡す。ダウンロード待ちの
+        間は DownloadWaiter の間隔で status() を確認し、待ち時間の合計を
+        download_wait に記録する。
+        
+        checkpoint=True の場合、ファイルの最後のチャンクにチェックポイント
+        （ファイル名, レコード数, ハッシュ）を添えて渡す。resume が有効なら
+        チェックポイント済みのファイルは JVSkip で読み飛ばす。
+        
+        Returns:
+            JVReadエラー件数
+        """
+        client = client or self.jvlink
+        read = 0
         errors = 0
         file_count = 0
         last_filename = ""
-        download_wait_count = 0
-        batch_records = []  # バッチ処理用のレコード配列
+        last_downloaded = None
+        waiter = DownloadWaiter(self.DOWNLOAD_POLL_INITIAL, self.DOWNLOAD_POLL_MAX)
+        chunk = []
+        chunk_file = ""  # チャンクのレコードを読み込んだファイル名
+        
+        completed = self.get_completed_files() if checkpoint and self.resume else set()
+        current = None  # 読み込み中のファイル名（チェックポイント対象）
+        count = 0
+        digest = None
+        skipped = 0
+        
+        def flush(file_checkpoint: Optional[tuple] = None) -> None:
+            nonlocal chunk
+            if chunk or file_checkpoint:
+                stats.items += 1
+                stats.records += len(chunk)
+                stats.put(raw, (chunk, chunk_file, file_checkpoint))
+                chunk = []
         
-        while processed < max_records:
+        def finish_file() -> None:
+            nonlocal current
+            if current is not None:
+                flush((current, count, digest.hexdigest()))
+                current = None
+        
+        while read < max_records:
+            if self._failure.failed:
+                # 後段の例外で打ち切り（途中のファイルはチェックポイントを記録しない）
+                break
+            
             # データ読み込み
-            ret, data, filename = self.jvlink.gets()
+            with stats.work():
+                ret, data, filename = client.gets()
             
             if ret > 0:
-                # 正常読み込み
-                try:
-                    # レコード解析
-                    record = RecordParser.parse(data)
-                    
-                    if record:
-                        batch_records.append(record)
-                        processed += 1
-                        
-                        # バッチサイズに達したらまとめて保存
-                        if len(batch_records) >= batch_size:
-                            self._save_batch_records(batch_records)
-                            batch_records = []
-                        
-                        # 進捗表示
-                        if processed % 100 == 0:
-                            logger.info(f"処理済: {processed}/{max_records}")
-                            
-                except Exception as e:
-                    logger.error(f"レコード処理エラー: {e}")
-                    errors += 1
+                if checkpoint and filename and filename != current:
+                    finish_file()
+                    if filename in completed:
+                        # チェックポイント済みのファイルは残りを読み飛ばす
+                        client.skip()
+                        skipped += 1
+                        continue
+                    current = filename
+                    count = 0
+                    digest = hashlib.blake2b(digest_size=16)
+                
+                if filename != chunk_file:
+                    flush()
+                    chunk_file = filename
+                chunk.append(data)
+                read += 1
+                if current is not None:
+                    count += 1
+                    digest.update(data)
+                if len(chunk) >= self.PARSE_CHUNK_SIZE:
+                    flush()
                     
             elif ret == 0:
                 # 全データ読み込み完了
+                finish_file()
                 logger.info("全データ読み込み完了")
                 break
                 
             elif ret == -1:
                 # ファイル切り替わり
+                finish_file()
                 if filename != last_filename:
                     file_count += 1
                     last_filename = filename
                     logger.info(f"ファイル処理中: {filename} ({file_count})")
                     
             elif ret == -3:
-                # ダウンロード中
-                download_wait_count += 1
-                if download_wait_count % 10 == 0:
-                    status = self.jvlink.status()
-                    logger.info(f"ダウンロード待機中... ({status}ファイル完了)")
-                time.sleep(1)
+                # ダウンロード中。読み込み済みのレコードは待っている間に解析・保存する
+                flush()
+                with stats.wait():
+                    downloaded = waiter.wait(client.status)
+                if downloaded != last_downloaded:
+                    last_downloaded = downloaded
+                    logger.info(f"ダウンロード待機中... ({downloaded}ファイル完了)")
                 
             else:
                 # エラー
-                logger.error(f"JVReadエラー: {self.jvlink.get_error_message(ret)}")
+                logger.error(f"JVReadエラー: {client.get_error_message(ret)}")
                 errors += 1
                 if errors > 10:
                     logger.error("エラーが多いため処理を中断")
                     break
         
-        # 残りのレコードを処理
-        if batch_records:
-            self._save_batch_records(batch_records)
+        # 途中で打ち切ったファイルはチェックポイントを記録しない
+        flush()
         
-        return (processed, errors)
+        if skipped:
+            logger.info(f"チェックポイント済みのためスキップ: {skipped}ファイル")
+        self.download_wait = waiter.waited
+        if waiter.polls:
+            logger.info(f"ダウンロード待ち: {waiter.waited:.1f}秒 (進捗確認 {waiter.polls}回)")
+        return errors
     
-    def _save_batch_records(self, records: List[Dict[str, Any]]) -> None:
+    def _parse_stage(self, raw: queue.Queue, parsed: queue.Queue,
+                     executor: Optional[ProcessPoolExecutor], stats: StageStats,
+                     journal: Optional[Journal] = None,
+                     seen: Optional[Dict[bytes, bytes]] = None,
+                     table: Optional[InternTable] = None) -> None:
+        """
+        解析段（解析スレッドで実行）
+        
+        ワーカープロセスを使う場合は投入したFutureを順に保存段へ渡す。
+        チェックポイントと変更検出のハッシュは保存段へ引き継ぐ。journal を指定した
+        場合は解析の前にチャンクをジャーナルへ追記する。seen を指定した場合は
+        変更のないレコードを除いてから解析する（_detect_changes 参照）。
+        table は名称のインターン表（実行ごと。ワーカープロセスはプロセスごとの表）。
+        例外は StageFailure に記録し、以降は解析せずに終端まで読み進める。
+        """
+        failure = self._failure
+        while True:
+            item = stats.get(raw)
+            if item is None:
+                break
+            
+            if failure.failed:
+                # 失敗後は前段が待たないよう終端まで読み捨てる
+                continue
+            try:
+                chunk, filename, file_checkpoint = item
+                with stats.work():
+                    if journal:
+                        try:
+                            journal.append(chunk, filename)
+                        except (OSError, sqlite3.Error) as e:
+                            logger.error(f"ジャーナル書き込みエラー（以降は記録しない）: {e}")
+                            journal = None
+                    chunk, hashes = self._detect_changes(chunk, seen)
+                    if executor and chunk:
+                        result = executor.submit(parse_chunk, chunk, self.STORED_FIELDS)
+                    else:
+                        # レコード長不正の件数は RecordParser.rejected に計上済み
+                        records, errors, _ = parse_chunk(chunk, self.STORED_FIELDS, table)
+                        result = (records, errors)
+                stats.items += 1
+                stats.records += len(chunk)
+                stats.put(parsed, (result, file_checkpoint, hashes))
+            except Exception as e:
+                failure.record(stats.name, e)
+        
+        stats.put(parsed, None)
+    
+    def _detect_changes(self, chunk: List[bytes],
+                        seen: Optional[Dict[bytes, bytes]] = None) -> Tuple[List[bytes], List[tuple]]:
+        """
+        変更検出（CHANGE_KEYS の種別のレコードのハッシュを求める）
+        
+        seen を指定した場合は、前回保存したハッシュ（今回の実行で渡した分は seen、
+        それ以外は record_hashes）と同じレコードを除き、件数を record_changes に加える。
+        保存段がまだ書き込んでいないレコードとも比較できるよう、渡したレコードの
+        ハッシュは seen に記録する。chunk のレコードは bytes のほか memoryview の
+        スライス（load_files）でもよい。
+        
+        Returns:
+            (解析するレコード, 保存する (キー, ハッシュ) のリスト)
+        """
+        change_keys = self._change_keys
+        hashed = []
+        for i, data in enumerate(chunk):
+            span = change_keys.get(data[:2])
+            if span:
+                hashed.append((i, bytes(data[:2]) + bytes(data[span]),
+                               hashlib.blake2b(data, digest_size=8).digest()))
+        if seen is None or not hashed:
+            return chunk, [(key, digest) for _, key, digest in hashed]
+        
+        unknown = list({key for _, key, _ in hashed if key not in seen})
+        if unknown:
+            with self.read_connection() as conn:
+                # SQLiteのパラメータ数の上限（古い版は999）を超えないように分ける
+                for start in range(0, len(unknown), 500):
+                    keys = unknown[start:start + 500]
+                    seen.update(conn.execute(
+                        f"SELECT key, hash FROM record_hashes WHERE key IN ({','.join('?' * len(keys))})",
+                        keys))
+        
+        counts = self.record_changes
+        unchanged = set()
+        hashes = []
+        for i, key, digest in hashed:
+            stored = seen.get(key)
+            if stored == digest:
+                unchanged.add(i)
+                counts['skipped'] += 1
+                continue
+            counts['new' if stored is None else 'changed'] += 1
+            seen[key] = digest
+            hashes.append((key, digest))
+        if unchanged:
+            chunk = [data for i, data in enumerate(chunk) if i not in unchanged]
+        return chunk, hashes
+    
+    def _write_stage(self, parsed: queue.Queue, batch_size: Optional[int], stats: StageStats,
+                     written: Dict[str, int]) -> None:
+        """
+        保存段（書き込みスレッドで実行。接続は書き込み用の1本を使い回す）
+        
+        チェックポイントと変更検出のハッシュはチャンクの最後のバッチと同じ
+        トランザクションで記録する。
+        書き込み用の接続はチャンクごとに借りるため、保存の合間に他のスレッドも
+        処理履歴などを書き込める（一括取り込みを除く）。batch_size が None の場合はバッチの件数を
+        BatchSizer で保存時間に合わせて調整する（チャンクの件数が上限）。
+        一括取り込み（bulk）では接続を終端まで借りたまま、チャンクをまたいで
+        1トランザクションにまとめ、保存時間の合計が BULK_WRITE_BATCH_SECONDS に
+        達するたびと終端で確定する（チェックポイントはそのファイルの最後の
+        バッチと同じトランザクションのため、確定の区切りに関わらず整合する）。
+        例外で止まると前段がキューで待ち続けるため、例外は StageFailure に記録し、
+        以降は保存せずに終端まで読み進める（後続のチェックポイントも記録しない。
+        一括取り込みでは確定していない分も取り消す）。
+        解析ワーカーの例外はそのチャンクだけをエラーとして数え、処理を続ける。
+        """
+        failure = self._failure
+        with ExitStack() as stack:
+            held = None
+            try:
+                if self.bulk:
+                    held = stack.enter_context(self.get_db_connection())
+            except Exception as e:
+                failure.record(stats.name, e)
+            self._write_chunks(parsed, batch_size, stats, written, held)
+            try:
+                if held is not None and held.in_transaction and not failure.failed:
+                    held.commit()
+            except Exception as e:
+                failure.record(stats.name, e)
+    
+    def _write_chunks(self, parsed: queue.Queue, batch_size: Optional[int], stats: StageStats,
+                      written: Dict[str, int], held: Optional[sqlite3.Connection]) -> None:
+        """保存段の本体（held: 一括取り込みで借りたままの接続。確定は保存時間の合計で判断する）"""
+        failure = self._failure
+        target = self.BULK_WRITE_BATCH_SECONDS if self.bulk else self.WRITE_BATCH_SECONDS
+        sizer = BatchSizer(target=target) if batch_size is None else None
+        pending = 0.0  # held の確定していないトランザクションの保存時間（秒）
+        # チェックポイント前のファイルで保存できなかったレコード数（1件でもあれば
+        # そのファイルのチェックポイントは記録しない。チェックポイントは
+        # ファイルの最後のレコードとは別のチャンクで届くことがある）
+        unsaved = 0
+        while True:
+            item = stats.get(parsed)
+            if item is None:
+                break
+            
+            if failure.failed:
+                continue
+            try:
+                result, file_checkpoint, hashes = item
+                try:
+                    if isinstance(result, Future):
+                        with stats.wait():
+                            records, chunk_errors, rejected = result.result()
+                        RecordParser.rejected.update(rejected)
+                    else:
+                        records, chunk_errors = result
+                except Exception as e:
+                    # 解析できなかったファイルはチェックポイントを記録しない
+                    logger.error(f"解析ワーカーエラー: {e}")
+                    written['errors'] += 1
+                    unsaved = 0 if file_checkpoint else unsaved + 1
+                    continue
+                
+                with stats.work(), (nullcontext(held) if held else self.get_db_connection()) as conn:
+                    # ファイルの最後のバッチにチェックポイントを添える（空のチャンクも1回保存する）
+                    commit = held is None
+                    failed = 0
+                    start = 0
+                    while True:
+                        size = sizer.size if sizer else batch_size
+                        batch = records[start:start + size]
+                        start += size
+                        last = start >= len(records)
+                        began = time.perf_counter()
+                        if last:
+                            failed += self._save_batch_records(
+                                batch, conn, None if unsaved or failed else file_checkpoint,
+                                hashes, commit=commit)
+                        else:
+                            failed += self._save_batch_records(batch, conn, commit=commit)
+                        elapsed = time.perf_counter() - began
+                        pending += elapsed
+                        if sizer:
+                            sizer.update(len(batch), elapsed)
+                        if last:
+                            break
+                    if held is not None and pending >= self.BULK_WRITE_BATCH_SECONDS:
+                        conn.commit()
+                        pending = 0.0
+                
+                unsaved = 0 if file_checkpoint else unsaved + failed
+                stats.items += 1
+                stats.records += len(records)
+                written['processed'] += len(records)
+                written['errors'] += chunk_errors + failed
+                logger.info(f"処理済: {written['processed']}件")
+            except Exception as e:
+                failure.record(stats.name, e)
+    
+    def _save_batch_records(self, records: List[Dict[str, Any]],
+                            conn: Optional[sqlite3.Connection] = None,
+                            file_checkpoint: Optional[tuple] = None,
+                            hashes: Optional[List[tuple]] = None,
+                            commit: bool = True) -> None:
         """
         レコードをバッチでデータベースに保存（パフォーマンス向上）
         
+        バッチはセーブポイントで区切るため、commit=False で前のバッチの
+        トランザクションを続けている場合も、失敗時はこのバッチだけを取り消す
+        （前のバッチまでは確定してから個別保存に切り替える）。
+        
         Args:
             records: 保存対象のレコード配列
+            conn: データベース接続（None の場合は書き込み用の接続）
+            file_checkpoint: 同じトランザクションで記録するチェックポイント
+                             (ファイル名, レコード数, ハッシュ)
+            hashes: 同じトランザクションで記録する変更検出のハッシュ [(キー, ハッシュ)]
+            commit: 保存後に確定する（False の場合はトランザクションを開いたままにする）
+        
+        Returns:
+            保存できなかったレコード数（個別保存で失敗した件数）
         """
-        if not records:
-            return
-            
-        try:
+        if not records and file_checkpoint is None and not hashes:
+            return 0
+        
+        if conn is None:
             with self.get_db_connection() as conn:
-                # トランザクション開始
+                return self._save_batch_records(records, conn, file_checkpoint, hashes, commit)
+        
+        try:
+            # トランザクション開始（開いたままのトランザクションは続ける）
+            if not conn.in_transaction:
                 conn.execute('BEGIN')
+            conn.execute('SAVEPOINT batch')
+            
+            try:
+                # 保存SQL（テーブル）ごとに登録値をまとめ、1回の executemany で登録する。
+                # 同じテーブルの中ではレコードの順序を保つ（上書き順）。登録と削除が
+                # 入れ替わる場合は、先に溜まっている側を書き出してから続ける
+                cursor = conn.cursor()
+                table_rows: Dict[str, list] = {}
+                schema_records = {}
+                builders = self._row_builders
+                opposite = self.OPPOSITE_SQL
+                for record in records:
+                    record_type = record.get('record_type')
+                    rows = builders.get(record_type)
+                    if rows:
+                        sql, values = rows(record)
+                        pending = opposite.get(sql)
+                        if pending in table_rows:
+                            cursor.executemany(pending, table_rows.pop(pending))
+                        table_rows.setdefault(sql, []).extend(values)
+                    elif record_type in SCHEMAS:
+                        schema_records.setdefault(SCHEMAS[record_type], []).append(record)
                 
-                try:
-                    for record in records:
-                        self.save_record(record, conn)
-                    
+                for sql, values in table_rows.items():
+                    cursor.executemany(sql, values)
+                # 生成テーブルの種別もまとめてexecutemanyで登録
+                for schema, group in schema_records.items():
+                    schema.insert(cursor, group)
+                
+                if hashes:
+                    self.save_hashes(cursor, hashes)
+                if file_checkpoint:
+                    self.save_checkpoint(cursor, file_checkpoint)
+                
+                conn.execute('RELEASE batch')
+                if commit:
                     # バッチ全体をコミット
                     conn.commit()
-                    
-                except Exception as e:
-                    # エラー時はロールバック
-                    conn.rollback()
-                    logger.error(f"バッチ保存エラー: {e}")
-                    raise
-                    
+                return 0
+                
+            except Exception as e:
+                # エラー時はこのバッチだけをロールバックし、前のバッチまでは確定する
+                conn.execute('ROLLBACK TO batch')
+                conn.commit()
+                logger.error(f"バッチ保存エラー: {e}")
+                raise
+                
         except Exception as e:
             logger.error(f"バッチ処理中にエラーが発生: {e}")
             # 個別保存にフォールバック
-            self._save_records_individually(records)
+            return self._save_records_individually(records, conn, file_checkpoint, hashes)
     
-    def _save_records_individually(self, records: List[Dict[str, Any]]) -> None:
+    def _save_records_individually(self, records: List[Dict[str, Any]],
+                                   conn: sqlite3.Connection,
+                                   file_checkpoint: Optional[tuple] = None,
+                                   hashes: Optional[List[tuple]] = None) -> int:
         """
         レコードを個別に保存（フォールバック処理）
         
+        チェックポイントと変更検出のハッシュは全レコードを保存できた場合のみ記録する
+        （再開時にファイルごと読み直せるようにし、保存できなかったレコードを
+        次回の更新で省かないようにする）。
+        
         Args:
             records: 保存対象のレコード配列
+            conn: データベース接続
+            file_checkpoint: 記録するチェックポイント
+            hashes: 記録する変更検出のハッシュ
+        
+        Returns:
+            保存できなかったレコード数
         """
         logger.info("個別保存モードにフォールバック")
         
+        failed = 0
         for record in records:
             try:
-                with self.get_db_connection() as conn:
-                    self.save_record(record, conn)
-                    conn.commit()
+                self.save_record(record, conn)
+                conn.commit()
             except Exception as e:
+                conn.rollback()
+                failed += 1
                 logger.error(f"個別保存エラー: {e}")
+        
+        if failed:
+            return failed
+        if hashes:
+            self.save_hashes(conn.cursor(), hashes)
+        if file_checkpoint:
+            self.save_checkpoint(conn.cursor(), file_checkpoint)
+        conn.commit()
+        return 0
+    
+    def save_hashes(self, cursor: sqlite3.Cursor, hashes: List[tuple]) -> None:
+        """変更検出のハッシュ保存 [(キー, ハッシュ)]"""
+        cursor.executemany("INSERT OR REPLACE INTO record_hashes (key, hash) VALUES (?, ?)",
+                           hashes)
+    
+    def save_checkpoint(self, cursor: sqlite3.Cursor, file_checkpoint: tuple) -> None:
+        """ファイル単位のチェックポイント保存（ファイル名, レコード数, ハッシュ）"""
+        cursor.execute("""
+            INSERT OR REPLACE INTO file_checkpoints (
+                filename, record_count, hash, completed_at
+            ) VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        """, file_checkpoint)
+    
+    def get_completed_files(self) -> set:
+        """チェックポイント済み（保存完了）のファイル名"""
+        with self.read_connection() as conn:
+            return {row[0] for row in conn.execute("SELECT filename FROM file_checkpoints")}
     
     def save_record(self, record: Dict[str, Any], conn: sqlite3.Connection):
         """
@@ -585,18 +1613,11 @@ class JVDataManager:
         record_type = record.get('record_type')
         
         try:
-            if record_type == 'RA':
-                self.save_race_record(cursor, record)
-            elif record_type == 'SE':
-                self.save_result_record(cursor, record)
-            elif record_type == 'UM':
-                self.save_horse_record(cursor, record)
-            elif record_type == 'O1':
-                self.save_odds_record(cursor, record)
-            elif record_type == 'WF':
-                self.save_weight_record(cursor, record)
-            elif record_type == 'YS':
-                self.save_schedule_record(cursor, record)
+            rows = self._row_builders.get(record_type)
+            if rows:
+                cursor.executemany(*rows(record))
+            elif record_type in SCHEMAS:
+                SCHEMAS[record_type].insert(cursor, [record])
             # 他のレコード種別も必要に応じて追加
             
         except Exception as e:
@@ -605,113 +1626,178 @@ class JVDataManager:
     
     def save_race_record(self, cursor: sqlite3.Cursor, record: Dict[str, Any]) -> None:
         """RAレコード保存"""
-        race_key = self.build_race_key(record['race_key'])
-        
-        cursor.execute("""
-            INSERT OR REPLACE INTO races (
-                race_key, year, monthday, jyo_code, jyo_name,
-                kaiji, nichiji, race_num, race_name, fukusho_name,
-                grade_cd, syubetsu_cd, kyori, track_cd, track_name,
-                tenko_cd, tenko, shiba_baba_cd, shiba_baba,
-                dirt_baba_cd, dirt_baba, hassotime,
-                toroku_tosu, syusso_tosu, data_kubun,
-                updated_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        """, (
-            race_key,
-            record['race_key']['year'],
-            record['race_key']['monthday'],
-            record['race_key']['jyo_code'],
-            CodeMaster.get_name('JYO', record['race_key']['jyo_code']),
-            int(record['race_key']['kaiji']) if record['race_key']['kaiji'] else None,
-            int(record['race_key']['nichiji']) if record['race_key']['nichiji'] else None,
-            int(record['race_key']['race_num']) if record['race_key']['race_num'] else None,
-            record['race_info']['race_name'],
-            record['race_info']['fukusho_name'],
-            record['race_info']['grade_cd'],
-            record['race_info']['syubetsu_cd'],
-            record['race_info']['kyori'],
-            record['race_info']['track_cd'],
-            CodeMaster.get_name('TRACK', record['race_info']['track_cd']),
-            record['condition']['tenko_cd'],
-            CodeMaster.get_name('TENKO', record['condition']['tenko_cd']),
-            record['condition']['shiba_baba_cd'],
-            CodeMaster.get_name('SHIBA_BABA', record['condition']['shiba_baba_cd']),
-            record['condition']['dirt_baba_cd'],
-            CodeMaster.get_name('DIRT_BABA', record['condition']['dirt_baba_cd']),
+        cursor.executemany(*self._race_rows(record))
+    
+    def save_result_record(self, cursor: sqlite3.Cursor, record: Dict[str, Any]) -> None:
+        """SEレコード保存"""
+        cursor.executemany(*self._result_rows(record))
+    
+    def save_horse_record(self, cursor: sqlite3.Cursor, record: Dict[str, Any]) -> None:
+        """UMレコード保存"""
+        cursor.executemany(*self._horse_rows(record))
+    
+    def save_odds_record(self, cursor: sqlite3.Cursor, record: Dict[str, Any]) -> None:
+        """O1レコード（オッズ）保存"""
+        cursor.executemany(*self._odds_rows(record))
+    
+    def save_combination_odds_record(self, cursor: sqlite3.Cursor, record: Dict[str, Any]) -> None:
+        """O2〜O6レコード（組番オッズ）保存"""
+        cursor.executemany(*self._combination_odds_rows(record))
+    
+    def save_weight_record(self, cursor: sqlite3.Cursor, record: Dict[str, Any]) -> None:
+        """WFレコード（馬体重）保存"""
+        cursor.executemany(*self._weight_rows(record))
+    
+    def save_schedule_record(self, cursor: sqlite3.Cursor, record: Dict[str, Any]) -> None:
+        """YSレコード（年間スケジュール）保存"""
+        cursor.executemany(*self._schedule_rows(record))
+    
+    # 保存SQL（_*_rows が返す登録値タプルの順）。既存行は値が変わった場合だけ更新する。
+    # レース詳細・レース結果はデータ区分の優先度が既存行以上のレコードだけで更新する
+    RACE_SQL = _upsert_sql('races', (
+        'race_key', 'year', 'monthday', 'jyo_code', 'jyo_name',
+        'kaiji', 'nichiji', 'race_num', 'race_name', 'fukusho_name',
+        'grade_cd', 'syubetsu_cd', 'kyori', 'track_cd', 'track_name',
+        'tenko_cd', 'tenko', 'shiba_baba_cd', 'shiba_baba',
+        'dirt_baba_cd', 'dirt_baba', 'hassotime',
+        'toroku_tosu', 'syusso_tosu', 'data_kubun',
+    ), ('race_key',), priority=DATA_KUBUN_PRIORITY, updated_at=True)
+    
+    RESULT_SQL = _upsert_sql('results', (
+        'race_key', 'umaban', 'ketto_num', 'bamei',
+        'seibetsu_cd', 'barei', 'keiro_cd',
+        'jockey_code', 'jockey_name', 'jockey_name_ryaku',
+        'trainer_code', 'trainer_name', 'trainer_syozoku',
+        'futan', 'bataijyu', 'zogen',
+        'kakutei_jyuni', 'time', 'chakusa',
+        'tansho_odds', 'ninsiki',
+        'honsyo', 'fukasyo', 'data_kubun',
+    ), ('race_key', 'umaban'), priority=DATA_KUBUN_PRIORITY, updated_at=True)
+    
+    HORSE_SQL = _upsert_sql('horses', (
+        'ketto_num', 'bamei', 'birth_date',
+        'seibetsu_cd', 'hinsyu_cd', 'keiro_cd',
+        'keito', 'father', 'mother', 'bms',
+        'tozai_cd', 'trainer_code', 'trainer_name',
+        'banushi_code', 'banushi_name',
+        'breeder_code', 'breeder_name', 'sanchi_name',
+        'del_kubun', 'data_kubun',
+    ), ('ketto_num',), updated_at=True)
+    
+    ODDS_SQL = _upsert_sql('odds', (
+        'race_key', 'umaban',
+        'tansho_odds', 'fukusho_odds_low', 'fukusho_odds_high',
+        'tansho_ninki', 'fukusho_ninki',
+        'data_kubun',
+    ), ('race_key', 'umaban'))
+    
+    WEIGHT_SQL = _upsert_sql('weights', (
+        'race_key', 'umaban',
+        'bataijyu', 'zogen_fuka', 'zogen',
+        'data_kubun',
+    ), ('race_key', 'umaban'))
+    
+    SCHEDULE_SQL = _upsert_sql('schedules', (
+        'year', 'kaiji_date', 'jyo_code', 'jyo_name',
+        'kaiji', 'nichiji', 'youbi', 'henko_id',
+    ), ('year', 'kaiji_date', 'jyo_code', 'kaiji', 'nichiji'))
+    
+    # 削除レコード（DELETE_DATA_KUBUN）の削除SQL
+    RACE_DELETE_SQL = "DELETE FROM races WHERE race_key = ?"
+    RESULT_DELETE_SQL = "DELETE FROM results WHERE race_key = ? AND umaban = ?"
+    
+    # 同じテーブルの登録SQL ⇔ 削除SQL（バッチ内で順序を保つ組）
+    OPPOSITE_SQL = {
+        RACE_SQL: RACE_DELETE_SQL, RACE_DELETE_SQL: RACE_SQL,
+        RESULT_SQL: RESULT_DELETE_SQL, RESULT_DELETE_SQL: RESULT_SQL,
+    }
+    
+    def _race_rows(self, record: Dict[str, Any]) -> Tuple[str, List[tuple]]:
+        """RAレコード → (保存SQL, 登録値タプルのリスト)。削除レコードは (削除SQL, キー)"""
+        key = record['race_key']
+        if record['data_kubun'] == self.DELETE_DATA_KUBUN:
+            return self.RACE_DELETE_SQL, [(self.build_race_key(key),)]
+        race_info = record['race_info']
+        condition = record['condition']
+        return self.RACE_SQL, [(
+            self.build_race_key(key),
+            key['year'],
+            key['monthday'],
+            key['jyo_code'],
+            CodeMaster.get_name('JYO', key['jyo_code']),
+            int(key['kaiji']) if key['kaiji'] else None,
+            int(key['nichiji']) if key['nichiji'] else None,
+            int(key['race_num']) if key['race_num'] else None,
+            race_info['race_name'],
+            race_info['fukusho_name'],
+            race_info['grade_cd'],
+            race_info['syubetsu_cd'],
+            race_info['kyori'],
+            race_info['track_cd'],
+            CodeMaster.get_name('TRACK', race_info['track_cd']),
+            condition['tenko_cd'],
+            CodeMaster.get_name('TENKO', condition['tenko_cd']),
+            condition['shiba_baba_cd'],
+            CodeMaster.get_name('SHIBA_BABA', condition['shiba_baba_cd']),
+            condition['dirt_baba_cd'],
+            CodeMaster.get_name('DIRT_BABA', condition['dirt_baba_cd']),
             record['hassotime'],
             record['toroku_tosu'],
             record['syusso_tosu'],
             record['data_kubun']
-        ))
+        )]
     
-    def save_result_record(self, cursor: sqlite3.Cursor, record: Dict[str, Any]) -> None:
-        """SEレコード保存"""
-        race_key = self.build_race_key(record['race_key'])
-        
-        cursor.execute("""
-            INSERT OR REPLACE INTO results (
-                race_key, umaban, ketto_num, bamei,
-                seibetsu_cd, barei, keiro_cd,
-                jockey_code, jockey_name, jockey_name_ryaku,
-                trainer_code, trainer_name, trainer_syozoku,
-                futan, bataijyu, zogen,
-                kakutei_jyuni, time, chakusa,
-                tansho_odds, ninsiki,
-                honsyo, fukasyo, data_kubun,
-                updated_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        """, (
-            race_key,
+    def _result_rows(self, record: Dict[str, Any]) -> Tuple[str, List[tuple]]:
+        """SEレコード → (保存SQL, 登録値タプルのリスト)。削除レコードは (削除SQL, キー)"""
+        if record['data_kubun'] == self.DELETE_DATA_KUBUN:
+            return self.RESULT_DELETE_SQL, [(self.build_race_key(record['race_key']),
+                                             record['umaban'])]
+        horse_info = record['horse_info']
+        jockey = record['jockey']
+        trainer = record['trainer']
+        result = record['result']
+        return self.RESULT_SQL, [(
+            self.build_race_key(record['race_key']),
             record['umaban'],
             record['ketto_num'],
             record['bamei'],
-            record['horse_info']['seibetsu_cd'],
-            record['horse_info']['barei'],
-            record['horse_info']['keiro_cd'],
-            record['jockey']['code'],
-            record['jockey']['name'],
-            record['jockey']['name_ryaku'],
-            record['trainer']['code'],
-            record['trainer']['name'],
-            record['trainer']['syozoku'],
+            horse_info['seibetsu_cd'],
+            horse_info['barei'],
+            horse_info['keiro_cd'],
+            jockey['code'],
+            jockey['name'],
+            jockey['name_ryaku'],
+            trainer['code'],
+            trainer['name'],
+            trainer['syozoku'],
             record['futan'],
             record['bataijyu'],
             record['zogen'],
-            record['result']['kakutei_jyuni'],
-            record['result']['time'],
-            record['result']['chakusa'],
-            record['result']['tansho_odds'],
-            record['result']['ninsiki'],
+            result['kakutei_jyuni'],
+            result['time'],
+            result['chakusa'],
+            result['tansho_odds'],
+            result['ninsiki'],
             record['prize']['honsyo'],
             record['prize']['fukasyo'],
             record['data_kubun']
-        ))
+        )]
     
-    def save_horse_record(self, cursor: sqlite3.Cursor, record: Dict[str, Any]) -> None:
-        """UMレコード保存"""
-        cursor.execute("""
-            INSERT OR REPLACE INTO horses (
-                ketto_num, bamei, birth_date,
-                seibetsu_cd, hinsyu_cd, keiro_cd,
-                keito, father, mother, bms,
-                tozai_cd, trainer_code, trainer_name,
-                banushi_code, banushi_name,
-                breeder_code, breeder_name, sanchi_name,
-                del_kubun, data_kubun,
-                updated_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        """, (
+    def _horse_rows(self, record: Dict[str, Any]) -> Tuple[str, List[tuple]]:
+        """UMレコード → (保存SQL, 登録値タプルのリスト)"""
+        horse_info = record['horse_info']
+        blood = record['blood']
+        return self.HORSE_SQL, [(
             record['ketto_num'],
             record['bamei'],
             record['birth_date']['formatted'],
-            record['horse_info']['seibetsu_cd'],
-            record['horse_info']['hinsyu_cd'],
-            record['horse_info']['keiro_cd'],
+            horse_info['seibetsu_cd'],
+            horse_info['hinsyu_cd'],
+            horse_info['keiro_cd'],
             record['keito'],
-            record['blood']['father'],
-            record['blood']['mother'],
-            record['blood']['bms'],
+            blood['father'],
+            blood['mother'],
+            blood['bms'],
             record['tozai_cd'],
             record['trainer']['code'],
             record['trainer']['name'],
@@ -722,69 +1808,68 @@ class JVDataManager:
             record['sanchi_name'],
             record['del_kubun'],
             record['data_kubun']
-        ))
+        )]
     
-    def save_odds_record(self, cursor: sqlite3.Cursor, record: Dict[str, Any]) -> None:
-        """O1レコード（オッズ）保存"""
+    def _odds_rows(self, record: Dict[str, Any]) -> Tuple[str, List[tuple]]:
+        """O1レコード → (保存SQL, 馬番ごとの登録値タプルのリスト)"""
         race_key = self.build_race_key(record['race_key'])
+        data_kubun = record['data_kubun']
+        return self.ODDS_SQL, [(
+            race_key,
+            odds['umaban'],
+            odds['tansho_odds'],
+            odds['fukusho_odds_low'],
+            odds['fukusho_odds_high'],
+            odds['tansho_ninki'],
+            odds['fukusho_ninki'],
+            data_kubun
+        ) for odds in record.get('odds', [])]
+    
+    def _combination_odds_rows(self, record: Dict[str, Any]) -> Tuple[str, List[tuple]]:
+        """
+        O2〜O6レコード → (保存SQL, 組番ごとの登録値タプルのリスト)
         
-        for odds in record.get('odds', []):
-            cursor.execute("""
-                INSERT OR REPLACE INTO odds (
-                    race_key, umaban,
-                    tansho_odds, fukusho_odds_low, fukusho_odds_high,
-                    tansho_ninki, fukusho_ninki,
-                    data_kubun
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                race_key,
-                odds['umaban'],
-                odds['tansho_odds'],
-                odds['fukusho_odds_low'],
-                odds['fukusho_odds_high'],
-                odds['tansho_ninki'],
-                odds['fukusho_ninki'],
-                record['data_kubun']
-            ))
+        パーサーが項目ごとの配列で返すため、1組ずつ辞書を作らずに
+        列を束ねて登録値にする。変換できないオッズ
+        （-1: 未発売・取消等）はNULLとして保存する。
+        """
+        table = self.COMBINATION_ODDS_TABLES[record['record_type']]
+        columns = ('kumi',) + self.COMBINATION_ODDS_COLUMNS[table] + ('ninki',)
+        odds = record['odds']
+        return _combination_odds_sql(table, columns), list(zip(
+            repeat(self.build_race_key(record['race_key'])),
+            *(odds[column].tolist() for column in columns),
+            repeat(record['data_kubun'])
+        ))
     
-    def save_weight_record(self, cursor: sqlite3.Cursor, record: Dict[str, Any]) -> None:
-        """WFレコード（馬体重）保存"""
+    def _weight_rows(self, record: Dict[str, Any]) -> Tuple[str, List[tuple]]:
+        """WFレコード → (保存SQL, 馬番ごとの登録値タプルのリスト)"""
         race_key = self.build_race_key(record['race_key'])
-        
-        for weight in record.get('weights', []):
-            cursor.execute("""
-                INSERT OR REPLACE INTO weights (
-                    race_key, umaban,
-                    bataijyu, zogen_fuka, zogen,
-                    data_kubun
-                ) VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                race_key,
-                weight['umaban'],
-                weight['bataijyu'],
-                weight['zogen_fuka'],
-                weight['zogen'],
-                record['data_kubun']
-            ))
+        data_kubun = record['data_kubun']
+        return self.WEIGHT_SQL, [(
+            race_key,
+            weight['umaban'],
+            weight['bataijyu'],
+            weight['zogen_fuka'],
+            weight['zogen'],
+            data_kubun
+        ) for weight in record.get('weights', [])]
     
-    def save_schedule_record(self, cursor: sqlite3.Cursor, record: Dict[str, Any]) -> None:
-        """YSレコード（年間スケジュール）保存"""
-        for kaisai in record.get('kaisai_info', []):
-            cursor.execute("""
-                INSERT OR REPLACE INTO schedules (
-                    year, kaiji_date, jyo_code, jyo_name,
-                    kaiji, nichiji, youbi, henko_id
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                record['year'],
-                kaisai['kaiji_date'],
-                kaisai['jyo_code'],
-                CodeMaster.get_name('JYO', kaisai['jyo_code']),
-                int(kaisai['kaiji']) if kaisai['kaiji'] else None,
-                int(kaisai['nichiji']) if kaisai['nichiji'] else None,
-                kaisai['youbi'],
-                record['henko_id']
-            ))
+    def _schedule_rows(self, record: Dict[str, Any]) -> Tuple[str, List[tuple]]:
+        """YSレコード → (保存SQL, 開催日ごとの登録値タプルのリスト)"""
+        year = record['year']
+        henko_id = record['henko_id']
+        jyo_names = CodeMaster.JYO_CODE
+        return self.SCHEDULE_SQL, [(
+            year,
+            kaisai['kaiji_date'],
+            kaisai['jyo_code'],
+            jyo_names.get(kaisai['jyo_code'], kaisai['jyo_code']),
+            int(kaisai['kaiji']) if kaisai['kaiji'] else None,
+            int(kaisai['nichiji']) if kaisai['nichiji'] else None,
+            kaisai['youbi'],
+            henko_id
+        ) for kaisai in record.get('kaisai_info', [])]
     
     def build_race_key(self, race_key_dict: Dict[str, str]) -> str:
         """レースキー構築"""
@@ -797,23 +1882,26 @@ class JVDataManager:
         return f"{year}{monthday}{jyo}{kaiji}{nichiji}{race}"
     
     def get_last_update_time(self) -> str:
-        """最終更新日時取得"""
-        with self.get_db_connection() as conn:
+        """最終更新日時取得（JVOpen の from に渡す日本時間の YYYYMMDDhhmmss）"""
+        with self.read_connection() as conn:
             cursor = conn.cursor()
-        
-        # 処理履歴から最終成功日時を取得
-        cursor.execute("""
-            SELECT to_time 
-            FROM process_history 
-            WHERE status = 'SUCCESS' 
-            ORDER BY finished_at DESC 
-            LIMIT 1
-        """)
-        
-        result = cursor.fetchone()
-        if result and result[0]:
-            return result[0]
-        
+            
+            # 処理履歴から最終成功日時を取得（JV-Linkから取得した処理のみ）
+            cursor.execute("""
+                SELECT to_time 
+                FROM process_history 
+                WHERE status = 'SUCCESS' 
+                AND process_type IN ('SETUP', 'UPDATE')
+                ORDER BY finished_at DESC 
+                LIMIT 1
+            """)
+            
+            result = cursor.fetchone()
+            if result and result[0]:
+                # 'YYYY-MM-DD hh:mm:ss'（UTC）→ 'YYYYMMDDhhmmss'（日本時間）
+                finished = datetime.fromisoformat(result[0]) + self.JST_OFFSET
+                return finished.strftime("%Y%m%d%H%M%S")
+            
             # なければレーステーブルから取得
             cursor.execute("""
                 SELECT MAX(year || monthday || '000000') 
@@ -828,22 +1916,29 @@ class JVDataManager:
             one_year_ago = datetime.now() - timedelta(days=365)
             return one_year_ago.strftime("%Y%m%d000000")
     
-    def start_process_history(self, process_type: str, data_spec: str, from_time: str) -> int:
-        """処理履歴開始記録"""
+    def start_process_history(self, process_type: str, data_spec: str, from_time: str,
+                              mode: str = 'NORMAL') -> int:
+        """処理履歴開始記録（mode: 取り込みモード。'NORMAL' または 'BULK'）"""
         with self.get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO process_history (
                     process_type, data_spec, from_time, 
-                    status, started_at
-                ) VALUES (?, ?, ?, 'RUNNING', CURRENT_TIMESTAMP)
-            """, (process_type, data_spec, from_time))
+                    status, started_at, mode
+                ) VALUES (?, ?, ?, 'RUNNING', CURRENT_TIMESTAMP, ?)
+            """, (process_type, data_spec, from_time, mode))
             conn.commit()
             return cursor.lastrowid
     
     def finish_process_history(self, process_id: int, status: str, 
-                              processed: int, errors: int) -> None:
-        """処理履歴終了記録"""
+                              processed: int, errors: int,
+                              download_wait: Optional[float] = None,
+                              changes: Optional[Mapping[str, int]] = None) -> None:
+        """
+        処理履歴終了記録（download_wait: ダウンロード待ち時間の合計秒数、
+        changes: 変更検出の件数 {'new': 新規, 'changed': 変更, 'skipped': 同一のため省略}）
+        """
+        changes = changes or {}
         with self.get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
@@ -851,22 +1946,34 @@ class JVDataManager:
                 SET status = ?, 
                     processed_count = ?, 
                     error_count = ?,
+                    download_wait_seconds = ?,
+                    new_count = ?,
+                    changed_count = ?,
+                    skipped_count = ?,
                     to_time = CURRENT_TIMESTAMP,
                     finished_at = CURRENT_TIMESTAMP
                 WHERE id = ?
-            """, (status, processed, errors, process_id))
+            """, (status, processed, errors, download_wait, changes.get('new'),
+                  changes.get('changed'), changes.get('skipped'), process_id))
             conn.commit()
     
     def close(self):
         """終了処理"""
-        # 旧式のコネクションがあれば閉じる
-        if hasattr(self, 'conn') and self.conn:
-            try:
-                self.conn.close()
-            except sqlite3.Error as e:
-                logger.warning(f"データベース接続終了時エラー: {e}")
-            finally:
-                self.conn = None
+        # データベース接続（書き込み用・読み込み用）を閉じる
+        if getattr(self, 'conn', None):
+            with self._write_lock:
+                try:
+                    self.conn.close()
+                except sqlite3.Error as e:
+                    logger.warning(f"データベース接続終了時エラー: {e}")
+                finally:
+                    self.conn = None
+        
+        if getattr(self, '_read_pool', None):
+            with self._pool_lock:
+                pool, self._read_pool = self._read_pool, []
+            for conn in pool:
+                conn.close()
         
         # JV-Link終了
         if self.jvlink:
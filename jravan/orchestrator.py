@@ -0,0 +1,393 @@
+"""
+JV-Data Orchestrator Module
+複数のデータ種別の並列取得
+
+データ種別（RACE, BLOD, MING など）ごとにワーカープロセスを起動し、
+それぞれが自分のJV-Linkクライアントでデータを取得・解析する。
+データベースへの書き込み（処理履歴・チェックポイントを含む）と
+ジャーナルへの記録は、親プロセスの1本の接続でまとめて行う。
+    
+    ワーカープロセス : JVDataManager の取り込み処理（読み込み・解析）
+                       保存・記録の代わりに結果を親プロセスへ送る
+    親プロセス       : 受け取った順に保存（ワーカーごとの順序は保たれる）
+
+同時に実行するワーカー数は max_concurrent で制限し、優先度（priority）の
+高いデータ種別から起動する。チェックポイントはファイル単位のため、
+中断後の再実行ではデータ種別ごとに完了済みのファイルから再開する。
+"""
+
+import logging
+import multiprocessing
+import queue
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from .client import JVLinkClient
+from .journal import Journal
+from .manager import JVDataManager
+
+logger = logging.getLogger(__name__)
+
+
+class FetchTask(NamedTuple):
+    """データ種別1件分の取得内容"""
+    data_spec: str                   # データ種別
+    priority: int = 0                # 優先度（大きいほど先に起動）
+    mode: str = 'update'             # 'setup'（セットアップ） / 'update'（差分更新）
+    from_date: Optional[str] = None  # 差分更新の開始日（YYYYMMDD。None の場合は最終更新日時）
+
+
+class SpecProgress:
+    """
+    データ種別1件分の進捗
+    
+    Attributes:
+        state: 状態（待機中 / 実行中 / 完了 / エラー）
+        files_total: 読込対象ファイル数（JVOpen の戻り値）
+        files_seen: 読み込みを開始したファイル数（チェックポイント済みで読み飛ばしたファイルを含む）
+        records: 保存したレコード数
+        unsaved: チェックポイント前のファイルで保存できなかったレコード数
+                 （1件でもあればそのファイルのチェックポイントは記録しない）
+    """
+    
+    def __init__(self, data_spec: str):
+        self.data_spec = data_spec
+        self.state = '待機中'
+        self.files_total = 0
+        self.files_seen = 0
+        self.records = 0
+        self.unsaved = 0
+        self.started_at: Optional[float] = None
+    
+    def eta(self) -> Optional[float]:
+        """残り時間の推定値（秒。ファイル数の進み具合から計算。未計測の場合はNone）"""
+        if self.started_at is None or not self.files_total or not self.files_seen:
+            return None
+        elapsed = time.monotonic() - self.started_at
+        return elapsed * max(self.files_total - self.files_seen, 0) / self.files_seen
+    
+    def __str__(self) -> str:
+        text = f"{self.data_spec}: {self.state}"
+        if self.files_total:
+            text += f" {self.files_seen}/{self.files_total}ファイル"
+        if self.records:
+            text += f" {self.records:,}件"
+        eta = self.eta()
+        if self.state == '実行中' and eta is not None:
+            text += f" 残り約{_format_seconds(eta)}"
+        return text
+
+
+def _format_seconds(seconds: float) -> str:
+    """秒数を「1時間2分」「3分」「45秒」の形式にする"""
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}時間{seconds % 3600 // 60}分"
+    if seconds >= 60:
+        return f"{seconds // 60}分"
+    return f"{seconds}秒"
+
+
+class _ProgressClient:
+    """ワーカーのJV-Linkクライアントのラッパー（ファイル数の進捗を親プロセスへ送る）"""
+    
+    # 進捗を送る最短間隔（秒）
+    INTERVAL = 0.5
+    
+    def __init__(self, client: JVLinkClient, data_spec: str, send: Callable[[tuple], None]):
+        self.client = client
+        self.data_spec = data_spec
+        self.send = send
+        self._filename = None
+        self._files = 0
+        self._sent_at = 0.0
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+    
+    def open(self, *args: Any, **kwargs: Any):
+        result = self.client.open(*args, **kwargs)
+        if result[0] >= 0:
+            self.send(('open', self.data_spec, result[1]))
+        return result
+    
+    def gets(self, buffer_size: int = 110000):
+        result = self.client.gets(buffer_size)
+        ret, _, filename = result
+        if (ret > 0 or ret == -1) and filename and filename != self._filename:
+            self._filename = filename
+            self._files += 1
+            now = time.monotonic()
+            if now - self._sent_at >= self.INTERVAL:
+                self._sent_at = now
+                self.send(('progress', self.data_spec, self._files))
+        elif ret == 0:
+            self.send(('progress', self.data_spec, self._files))
+        return result
+
+
+class _ForwardingJournal:
+    """ワーカーのジャーナル（記録する生レコードを親プロセスへ送る）"""
+    
+    def __init__(self, data_spec: str, send: Callable[[tuple], None]):
+        self.data_spec = data_spec
+        self.send = send
+    
+    def append(self, records: List[bytes], filename: str = '') -> None:
+        self.send(('journal', self.data_spec, records, filename))
+    
+    def close(self) -> None:
+        pass
+
+
+class _SpecWorker(JVDataManager):
+    """
+    ワーカープロセスの JVDataManager
+    
+    取り込み処理はそのまま使い、データベース・ジャーナルへの書き込みを
+    親プロセスへのメッセージに置き換える（データベースは読み込みのみ）。
+    """
+    
+    def __init__(self, data_spec: str, send: Callable[[tuple], None], *args: Any, **kwargs: Any):
+        self.data_spec = data_spec
+        self.send = send
+        super().__init__(*args, **kwargs)
+    
+    def setup_database(self):
+        """データベース初期設定（親プロセスで実行済み）"""
+    
+    def _open_journal(self) -> Optional[_ForwardingJournal]:
+        return _ForwardingJournal(self.data_spec, self.send) if self.journal_path else None
+    
+    def _write_stage(self, parsed: queue.Queue, batch_size: Optional[int], stats,
+                     written: Dict[str, int]) -> None:
+        """保存段（解析結果を親プロセスへ送る。例外後は送らずに終端まで読み進める）"""
+        failure = self._failure
+        while True:
+            item = stats.get(parsed)
+            if item is None:
+                break
+            if failure.failed:
+                continue
+            try:
+                (records, errors), file_checkpoint, hashes = item
+                with stats.work():
+                    self.send(('records', self.data_spec, records, errors, file_checkpoint, hashes))
+                stats.records += len(records)
+                written['processed'] += len(records)
+                written['errors'] += errors
+            except Exception as e:
+                failure.record(stats.name, e)
+    
+    def start_process_history(self, process_type: str, data_spec: str, from_time: str,
+                              mode: str = 'NORMAL') -> int:
+        self.send(('start', self.data_spec, process_type, data_spec, from_time, mode))
+        return 0
+    
+    def finish_process_history(self, process_id: int, status: str,
+                               processed: int, errors: int,
+                               download_wait: Optional[float] = None,
+                               changes: Optional[Dict[str, int]] = None) -> None:
+        self.send(('finish', self.data_spec, status, processed, errors, download_wait, changes))
+
+
+def _run_spec(task: FetchTask, db_path: str, save_path: str, resume: bool, journal: bool,
+              client_factory: Optional[Callable[[str], JVLinkClient]],
+              out: multiprocessing.Queue) -> None:
+    """ワーカープロセスの処理（データ種別1件分の取得）"""
+    send = out.put
+    success = False
+    manager = None
+    try:
+        client = client_factory(task.data_spec) if client_factory else JVLinkClient()
+        manager = _SpecWorker(task.data_spec, send, db_path, save_path,
+                              client=_ProgressClient(client, task.data_spec, send),
+                              resume=resume, journal=journal)
+        if task.mode == 'setup':
+            success = manager.download_setup_data(task.data_spec)
+        else:
+            success = manager.update_data(task.from_date, task.data_spec)
+    except Exception as e:
+        logger.error(f"{task.data_spec}: ワーカーエラー: {e}")
+    finally:
+        if manager:
+            manager.close()
+        send(('exit', task.data_spec, success))
+
+
+class FetchOrchestrator:
+    """複数のデータ種別を並列に取得するクラス"""
+    
+    # 進捗をログに出力する間隔（秒）
+    REPORT_INTERVAL = 10.0
+    
+    def __init__(self, manager: JVDataManager, max_concurrent: int = 2,
+                 client_factory: Optional[Callable[[str], JVLinkClient]] = None):
+        """
+        初期化
+        
+        Args:
+            manager: 保存先の JVDataManager（データベース・ジャーナル・resume の設定を使う）
+            max_concurrent: 同時に実行するワーカープロセス数
+            client_factory: データ種別 → JV-Linkクライアントを返す関数（None の場合は JVLinkClient。
+                            ワーカープロセスへ渡すため pickle できること）
+        """
+        self.manager = manager
+        self.max_concurrent = max(1, max_concurrent)
+        self.client_factory = client_factory
+        self.progress: Dict[str, SpecProgress] = {}
+        self._started_at = 0.0
+    
+    def run(self, tasks: List[FetchTask]) -> Dict[FetchTask, bool]:
+        """
+        取得を実行（すべてのデータ種別が終わるまで待つ）
+        
+        Args:
+            tasks: データ種別ごとの取得内容（同じデータ種別は1件のみ）
+        
+        Returns:
+            取得内容 → 成功時True（tasks の順）
+        
+        Raises:
+            ValueError: 同じデータ種別の取得内容が複数ある場合
+        """
+        specs = [task.data_spec for task in tasks]
+        duplicates = sorted({spec for spec in specs if specs.count(spec) > 1})
+        if duplicates:
+            # 進捗・処理履歴・チェックポイントはデータ種別ごとのため同時に取得できない
+            raise ValueError(f"データ種別が重複しています: {', '.join(duplicates)}")
+        
+        pending = sorted(tasks, key=lambda task: -task.priority)
+        self.progress = {task.data_spec: SpecProgress(task.data_spec) for task in pending}
+        self._started_at = time.monotonic()
+        logger.info(f"並列取得開始: {', '.join(t.data_spec for t in pending)} "
+                    f"(同時実行 {self.max_concurrent})")
+        
+        out = multiprocessing.Queue(maxsize=self.manager.PIPELINE_QUEUE_SIZE * self.max_concurrent)
+        running: Dict[str, multiprocessing.Process] = {}
+        process_ids: Dict[str, int] = {}
+        results: Dict[str, bool] = {}
+        journal = self.manager._open_journal()
+        reported_at = time.monotonic()
+        
+        try:
+            while pending or running:
+                # 優先度順に空きの分だけ起動
+                while pending and len(running) < self.max_concurrent:
+                    task = pending.pop(0)
+                    process = multiprocessing.Process(
+                        target=_run_spec, name=f'jravan-{task.data_spec}',
+                        args=(task, self.manager.db_path, self.manager.save_path,
+                              self.manager.resume, self.manager.journal_path is not None,
+                              self.client_factory, out))
+                    process.start()
+                    running[task.data_spec] = process
+                    self.progress[task.data_spec].state = '実行中'
+                    self.progress[task.data_spec].started_at = time.monotonic()
+                
+                try:
+                    message = out.get(timeout=0.5)
+                except queue.Empty:
+                    pass
+                else:
+                    self._handle(message, journal, running, process_ids, results)
+                # 他のワーカーのメッセージを受信し続けている間も終了を確認する
+                self._reap(out, journal, running, process_ids, results)
+                
+                if time.monotonic() - reported_at >= self.REPORT_INTERVAL:
+                    reported_at = time.monotonic()
+                    logger.info(self.report())
+        finally:
+            for process in running.values():
+                process.terminate()
+            if journal:
+                journal.close()
+        
+        logger.info(self.report())
+        return {task: results.get(task.data_spec, False) for task in tasks}
+    
+    def _handle(self, message: tuple, journal: Optional[Journal],
+                running: Dict[str, multiprocessing.Process],
+                process_ids: Dict[str, int], results: Dict[str, bool]) -> None:
+        """ワーカーからのメッセージを処理（保存は受け取った順に行う）"""
+        kind, data_spec = message[0], message[1]
+        progress = self.progress[data_spec]
+        
+        if kind == 'records':
+            records, errors, file_checkpoint, hashes = message[2:]
+            failed = self.manager._save_batch_records(
+                records, file_checkpoint=None if progress.unsaved else file_checkpoint,
+                hashes=hashes)
+            progress.unsaved = 0 if file_checkpoint else progress.unsaved + failed
+            progress.records += len(records)
+        elif kind == 'journal':
+            if journal:
+                journal.append(message[2], message[3])
+        elif kind == 'progress':
+            progress.files_seen = max(progress.files_seen, message[2])
+        elif kind == 'open':
+            progress.files_total = message[2]
+        elif kind == 'start':
+            process_ids[data_spec] = self.manager.start_process_history(*message[2:])
+        elif kind == 'finish':
+            if data_spec in process_ids:
+                self.manager.finish_process_history(process_ids.pop(data_spec), *message[2:])
+        elif kind == 'exit':
+            success = message[2]
+            results[data_spec] = success
+            progress.state = '完了' if success else 'エラー'
+            process = running.pop(data_spec, None)
+            if process:
+                process.join()
+            logger.info(f"並列取得 {progress}")
+    
+    def _reap(self, out: multiprocessing.Queue, journal: Optional[Journal],
+              running: Dict[str, multiprocessing.Process],
+              process_ids: Dict[str, int], results: Dict[str, bool]) -> None:
+        """
+        終了の通知なしに終了したワーカーをエラーとして扱う
+        
+        終了前に送られたメッセージ（保存するレコード・終了の通知）を先に処理し、
+        それでも終了の通知がなければエラーとする。
+        """
+        for data_spec, process in list(running.items()):
+            if process.exitcode is None:
+                continue
+            self._drain(out, journal, running, process_ids, results)
+            if data_spec not in running:
+                continue
+            logger.error(f"{data_spec}: ワーカーが異常終了しました (exitcode={process.exitcode})")
+            if data_spec in process_ids:
+                self.manager.finish_process_history(process_ids.pop(data_spec), "ERROR", 0, 0)
+            results[data_spec] = False
+            self.progress[data_spec].state = 'エラー'
+            del running[data_spec]
+    
+    def _drain(self, out: multiprocessing.Queue, journal: Optional[Journal],
+               running: Dict[str, multiprocessing.Process],
+               process_ids: Dict[str, int], results: Dict[str, bool]) -> None:
+        """受信済みのメッセージをすべて処理する"""
+        while True:
+            try:
+                message = out.get_nowait()
+            except queue.Empty:
+                return
+            self._handle(message, journal, running, process_ids, results)
+    
+    def report(self) -> str:
+        """全体と各データ種別の進捗（ログ出力用）"""
+        specs = list(self.progress.values())
+        total = sum(p.files_total for p in specs)
+        seen = sum(min(p.files_seen, p.files_total) for p in specs)
+        records = sum(p.records for p in specs)
+        elapsed = time.monotonic() - self._started_at
+        
+        text = f"並列取得 進捗: {records:,}件, 経過{_format_seconds(elapsed)}"
+        if total and seen:
+            text += f", {seen}/{total}ファイル"
+            if seen < total:
+                text += f" 残り約{_format_seconds(elapsed * (total - seen) / seen)}"
+        waiting = sum(p.state == '待機中' for p in specs)
+        if waiting:
+            text += f"（待機中{waiting}件を除く）"
+        return text + ''.join(f"\n  {p}" for p in specs)
@@ -5,9 +5,98 @@ JV-Dataの固定長フォーマットをパースするモジュール
 Based on JRA-VAN SDK Ver4.9.0.2
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Callable, Iterable, List, Mapping, Optional, Union
+import codecs
+import logging
 import struct
+from collections import Counter
 from datetime import datetime
+from functools import cached_property, lru_cache
+
+from . import batch
+from .layouts import LAYOUTS, Field, Group, Layout, Repeat, project
+
+logger = logging.getLogger(__name__)
+
+
+# Shift-JISデコーダ（コーデック検索を毎回行わないよう事前取得）
+_sjis_decode = codecs.getdecoder('shift-jis')
+
+
+def _b2i(raw: bytes) -> Optional[int]:
+    """
+    ASCII数字のバイト列を直接整数に変換（デコードなし）
+    
+    int() はバイト列を受け付け、前後の空白も無視する。
+    変換できない場合（全角数字・不正なバイトを含むなど）は従来の mid_b2s + int と
+    同じく、Shift-JISでデコード（不正なバイトは無視）してから変換する。
+    空・空白のみ・それでも変換できない場合はNone。
+    """
+    try:
+        return int(raw)
+    except ValueError:
+        pass
+    text = _sjis_decode(raw, 'ignore')[0].strip()
+    try:
+        return int(text) if text else None
+    except ValueError:
+        return None
+
+
+def _b2s(raw: bytes) -> str:
+    """1フィールド分のバイト列を文字列に変換（ASCIIのみならShift-JISデコードなし）"""
+    if raw.isascii():
+        return raw.decode('latin-1').strip()
+    return _sjis_decode(raw, 'ignore')[0].strip()
+
+
+class InternTable(dict):
+    """
+    文字列フィールドのインターン表（生バイト列 → デコード済み文字列）
+    
+    騎手名・調教師名・馬主名などは同じバイト列が何十万回も現れるため、
+    2回目以降はデコードせずに同じ文字列オブジェクトを返す。
+    登録件数が max_size に達した後は登録せずにデコードのみ行う。
+    
+    parse_batch(dictionary=True) の辞書コードも同じ表で採番する。コードは表ごとの
+    登録順の連番で、names[コード] が値になる（同じ表を使う限りバッチをまたいで同じコード）。
+    取り込み処理は実行ごとに新しい表を作る。
+    """
+    
+    def __init__(self, max_size: int = 200000):
+        super().__init__()
+        self.max_size = max_size
+        self.codes: Dict[str, int] = {}
+        self.names: List[str] = []
+    
+    def __missing__(self, raw: bytes) -> str:
+        value = _b2s(raw)
+        if len(self) < self.max_size:
+            self[raw] = value
+        return value
+    
+    def code(self, raw: bytes) -> int:
+        """生バイト列の辞書コード（デコード後の値ごとに採番。長さの違う列でも同じ値は同じコード）"""
+        value = self[raw]
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.names)
+            self.names.append(value)
+        return code
+
+
+# 長い文字列フィールド（名称など）の既定のインターン表（表を指定しない解析で使う）
+_intern = InternTable()
+
+
+def _format_time(time_str: str) -> Optional[str]:
+    """4桁のタイム文字列をM:SS.f形式に変換"""
+    if time_str and len(time_str) == 4:
+        try:
+            return f"{int(time_str[0])}:{int(time_str[1:3]):02d}.{int(time_str[3])}"
+        except ValueError:
+            pass
+    return None
 
 
 class JVDataParser:
@@ -40,19 +129,19 @@ class JVDataParser:
         """
         バイト配列から整数を切り出し
         
+        数値項目はASCII数字（ゼロ・空白埋め）のため、文字列へデコードせず
+        バイト列から直接変換する。
+        
         Args:
             data: バイト配列
             start: 開始位置（1から始まる）
             length: バイト長
             
         Returns:
-            整数値（変換できない場合はNone）
+            整数値（空白のみ・変換できない場合はNone）
         """
-        str_val = JVDataParser.mid_b2s(data, start, length)
-        try:
-            return int(str_val) if str_val else None
-        except ValueError:
-            return None
+        actual_start = start - 1
+        return _b2i(data[actual_start:actual_start + length])
     
     @staticmethod
     def parse_ymd(data: bytes, start: int) -> Dict[str, str]:
@@ -116,6 +205,401 @@ class JVDataParser:
         return None
 
 
+class LayoutCompiler:
+    """
+    レイアウト定義を専用のパース関数にコンパイルするクラス
+    
+    フィールドごとに mid_b2s を呼び出す代わりに、スライス位置を
+    定数として埋め込んだ関数を生成する。レコード全体をlatin-1で
+    一度だけ文字列化し、ASCIIのみの範囲は文字列スライスで、
+    全角文字を含む範囲のみShift-JISでデコードする。bytes のほか
+    memoryview（mmap したファイルのスライスなど）もコピーせずに解析できる。
+    名称などの長い文字列フィールドはインターン表（第2引数。省略時は既定の表）を引き、
+    既出のバイト列ならデコードせずに同じ文字列を返す。
+    """
+    
+    # この長さ以上の文字列フィールドは全角文字を含みうるためインターン表で変換する
+    TEXT_MIN_LENGTH = 8
+    
+    @classmethod
+    def compile(cls, layout: Layout) -> Callable[[bytes], Dict[str, Any]]:
+        """
+        レイアウトからパース関数を生成
+        
+        Args:
+            layout: レコードレイアウト
+        
+        Returns:
+            バイト列（とインターン表）を受け取り解析結果辞書を返す関数
+        """
+        name = f'parse_{layout.record_type.lower()}'
+        lines = [
+            f'def {name}(data, _intern=_intern):',
+            # bytes 以外のバッファ（memoryview など）も受け付ける
+            "    t = str(data, 'latin-1')",
+            '    n = len(data)',
+            # レコード全体がASCIIならShift-JISデコードは不要
+            '    if t.isascii():',
+        ]
+        lines += cls._body(layout, None, '        ')
+        
+        guards, spans = cls._guards(layout)
+        lines += [f'    g{i} = t[{start}:{stop}].isascii()'
+                  for i, (start, stop) in enumerate(spans)]
+        lines += cls._body(layout, guards, '    ')
+        
+        for item in layout.fields:
+            if isinstance(item, Repeat) and item.columnar:
+                if isinstance(item.item, Field) or any(f.type != 'int' for f in item.item):
+                    raise ValueError(f"列形式の繰り返し項目は数値項目のみ対応: {item.name}")
+        
+        namespace = {
+            '_sjis': _sjis_decode,
+            '_b2i': _b2i,
+            '_format_time': _format_time,
+            '_intern': _intern,
+            '_columns': batch.parse_columns,
+            '_layout': layout,
+        }
+        code = compile('\n'.join(lines), f'<layout {layout.record_type}>', 'exec')
+        exec(code, namespace)
+        
+        func = namespace[name]
+        func.__doc__ = f'{layout.record_type}レコード（{layout.description}）解析'
+        return func
+    
+    @classmethod
+    def _guards(cls, layout: Layout) -> tuple:
+        """
+        ASCII判定の単位を決める
+        
+        短いコードフィールドは位置順に連続する範囲ごとにまとめて
+        1回だけ判定し、長い文字列フィールドは個別に判定する。
+        数値フィールドはバイト列から直接変換するため判定不要。
+        
+        Returns:
+            (id(フィールド) → 判定変数名, 判定範囲のリスト)
+        """
+        fields = []
+        for item in layout.fields:
+            if isinstance(item, Group):
+                fields.extend(item.fields)
+            elif isinstance(item, Field):
+                fields.append(item)
+        fields = sorted((f for f in fields if f.type != 'int'), key=lambda f: f.start)
+        
+        guards = {}
+        spans = []
+        run = []
+        
+        def close_run():
+            if run:
+                spans.append((min(f.start for f in run) - 1,
+                              max(f.start + f.length for f in run) - 1))
+                for f in run:
+                    guards[id(f)] = f'g{len(spans) - 1}'
+                run.clear()
+        
+        for f in fields:
+            if f.type == 'str' and f.length >= cls.TEXT_MIN_LENGTH:
+                # インターン表で変換するため判定不要
+                close_run()
+            else:
+                run.append(f)
+        close_run()
+        
+        # 繰り返し項目は領域全体で1回だけ判定
+        for item in layout.fields:
+            if isinstance(item, Repeat):
+                items = (item.item,) if isinstance(item.item, Field) else item.item
+                if all(f.type == 'int' or cls._interned(f) for f in items):
+                    continue
+                overhang = max(f.start + f.length - 1 for f in items) - item.size
+                start = item.start - 1
+                spans.append((start, start + item.count * item.size + max(overhang, 0)))
+                guards[id(item)] = f'g{len(spans) - 1}'
+        return guards, spans
+    
+    @classmethod
+    def _body(cls, layout: Layout, guards: Optional[Dict[int, str]], indent: str) -> List[str]:
+        """
+        関数本体（繰り返し項目の展開と結果辞書の構築）
+        
+        guards がNoneの場合はレコード全体がASCIIである前提のコードを生成する。
+        """
+        lines = []
+        repeats = {}
+        for index, item in enumerate(layout.fields):
+            if isinstance(item, Repeat):
+                var = f'_r{len(repeats)}'
+                repeats[item.name] = var
+                if item.columnar:
+                    # 項目ごとの配列に一括変換
+                    lines.append(f'{indent}{var} = _columns(data, _layout.fields[{index}])')
+                    continue
+                guard = None if guards is None else guards.get(id(item))
+                lines += [indent + line for line in cls._repeat(item, var, guard)]
+        
+        entries = [
+            f"'record_type': {layout.record_type!r}",
+            f"'description': {layout.description!r}",
+        ]
+        for item in layout.fields:
+            if isinstance(item, Repeat):
+                entries.append(f'{item.name!r}: {repeats[item.name]}')
+            else:
+                entries.append(cls._entry(item, None, guards))
+        lines.append(indent + 'return {' + ', '.join(entries) + '}')
+        return lines
+    
+    @classmethod
+    def _repeat(cls, repeat: Repeat, var: str, guard: Optional[str]) -> List[str]:
+        """繰り返し項目をリストに展開するループ"""
+        start = repeat.start - 1
+        stop = start + repeat.count * repeat.size
+        lines = [
+            f'{var} = []',
+            f'for o in range({start}, {stop}, {repeat.size}):',
+        ]
+        if repeat.bounded:
+            lines.append(f'    if o + {repeat.size + 1} > n: break')
+        
+        items = (repeat.item,) if isinstance(repeat.item, Field) else repeat.item
+        guards = None if guard is None else {id(f): guard for f in items}
+        
+        if isinstance(repeat.item, Field):
+            key = repeat.item
+            value = 'v'
+        else:
+            key = next(f for f in repeat.item if f.name == repeat.key)
+            value = '{' + ', '.join(
+                f'{f.name!r}: v' if f is key else cls._entry(f, 'o', guards)
+                for f in repeat.item
+            ) + '}'
+        
+        lines.append(f"    v = {cls._value(key, 'o', guards)}")
+        if key.type == 'int':
+            lines.append('    if v and v > 0:')
+        else:
+            lines.append(f"    if v and v != {'0' * key.length!r}:")
+        lines.append(f'        {var}.append({value})')
+        return lines
+    
+    @classmethod
+    def _entry(cls, item, base: Optional[str], guards: Optional[Dict[int, str]]) -> str:
+        """結果辞書の1エントリ"""
+        if isinstance(item, Group):
+            return f'{item.name!r}: {{' + ', '.join(
+                cls._entry(f, base, guards) for f in item.fields
+            ) + '}'
+        return f'{item.name!r}: {cls._value(item, base, guards)}'
+    
+    @classmethod
+    def _value(cls, field: Field, base: Optional[str], guards: Optional[Dict[int, str]]) -> str:
+        """フィールド値を求める式"""
+        if field.type == 'int':
+            return f'_b2i(data[{cls._span(field.start - 1, field.length, base)}])'
+        if cls._interned(field):
+            return f'_intern[bytes(data[{cls._span(field.start - 1, field.length, base)}])]'
+        
+        guard = None if guards is None else guards[id(field)]
+        if field.type == 'ymd':
+            return cls._dict(field.start, (('year', 0, 4), ('month', 4, 2),
+                                           ('day', 6, 2), ('formatted', 0, 8)), base, guard)
+        if field.type == 'hms':
+            return cls._dict(field.start, (('hour', 0, 2), ('minute', 2, 2),
+                                           ('second', 4, 2), ('formatted', 0, 6)), base, guard)
+        
+        text = cls._str(field.start - 1, field.length, base, guard)
+        if field.type == 'time':
+            return f'_format_time({text})'
+        return text
+    
+    @classmethod
+    def _dict(cls, start: int, parts, base: Optional[str], guard: Optional[str]) -> str:
+        """年月日・時分秒の辞書を求める式"""
+        return '{' + ', '.join(
+            f'{key!r}: {cls._str(start - 1 + offset, length, base, guard)}'
+            for key, offset, length in parts
+        ) + '}'
+    
+    @classmethod
+    def _interned(cls, field: Field) -> bool:
+        """インターン表で変換するフィールドか"""
+        return field.type == 'str' and field.length >= cls.TEXT_MIN_LENGTH
+    
+    @staticmethod
+    def _span(start: int, length: int, base: Optional[str]) -> str:
+        """スライス範囲（baseは繰り返しブロックの先頭位置を表す変数名）"""
+        if base is None:
+            return f'{start}:{start + length}'
+        return f'{base} + {start}:{base} + {start + length}'
+    
+    @classmethod
+    def _str(cls, start: int, length: int, base: Optional[str], guard: Optional[str]) -> str:
+        """
+        文字列フィールドを切り出す式（前後の空白削除）
+        
+        guard がNoneの場合はASCII判定なし（レコード全体がASCII）、
+        それ以外は判定変数を参照する。
+        """
+        span = cls._span(start, length, base)
+        if guard is None:
+            return f't[{span}].strip()'
+        return f"(t[{span}] if {guard} else _sjis(data[{span}], 'ignore')[0]).strip()"
+
+
+class RecordView:
+    """
+    遅延デコードのレコードビュー
+    
+    生データの memoryview を保持し、各フィールドは最初にアクセスされた
+    時点でデコードしてキャッシュする。レースの絞り込みなど一部の項目しか
+    参照しない処理では、参照しない項目のデコードを省略できる。
+    
+    属性（view.race_key.jyo_code）と添字（view['race_key']['jyo_code']）の
+    どちらでも参照できる。キャッシュ前の項目は参照時のバッファ内容から
+    デコードされるため、再利用するバッファを渡す場合はコピーしてから渡すこと。
+    """
+    
+    def __init__(self, buf: memoryview):
+        self._buf = buf
+    
+    @cached_property
+    def record_type(self) -> str:
+        return self._buf[0:2].tobytes().decode('ascii', errors='ignore')
+    
+    @cached_property
+    def description(self) -> str:
+        return RecordParser.RECORD_TYPES.get(self.record_type, '不明')
+    
+    def __getitem__(self, name: str) -> Any:
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+    
+    def __len__(self) -> int:
+        return len(self._buf)
+    
+    def __repr__(self) -> str:
+        return f'<{type(self).__name__} {self.record_type} {len(self._buf)}バイト>'
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """RecordParser.parse と同じ解析結果辞書を返す"""
+        return RecordParser.parse(self._buf.tobytes())
+
+
+class GroupView:
+    """レコードビュー内のフィールド群（同じバッファを共有）"""
+    
+    fields = ()
+    
+    def __init__(self, buf: memoryview):
+        self._buf = buf
+    
+    def __getitem__(self, name: str) -> Any:
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+    
+    def __repr__(self) -> str:
+        return f'<{type(self).__name__} {self.to_dict()!r}>'
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.fields}
+
+
+class ViewCompiler:
+    """
+    レイアウト定義から遅延レコードビューのクラスを生成するクラス
+    
+    フィールドごとに cached_property を定義するため、2回目以降の参照は
+    インスタンス辞書の参照のみとなる。
+    """
+    
+    @classmethod
+    def compile(cls, layout: Layout) -> type:
+        """
+        レイアウトからビュークラスを生成
+        
+        Args:
+            layout: レコードレイアウト
+        
+        Returns:
+            RecordView のサブクラス
+        """
+        namespace = {
+            '__doc__': f'{layout.record_type}レコード（{layout.description}）ビュー',
+            'record_type': layout.record_type,
+            'description': layout.description,
+        }
+        for item in layout.fields:
+            if isinstance(item, Group):
+                getter = cls._group(layout, item)
+            elif isinstance(item, Repeat):
+                getter = cls._repeat(layout, item)
+            else:
+                getter = cls._field(item)
+            namespace[item.name] = cls._property(item.name, getter)
+        return type(f'{layout.record_type}View', (RecordView,), namespace)
+    
+    @staticmethod
+    def _property(name: str, getter: Callable[[memoryview], Any]) -> cached_property:
+        """バッファからの取得関数をキャッシュ付きプロパティに変換"""
+        def fget(self):
+            return getter(self._buf)
+        fget.__name__ = name
+        return cached_property(fget)
+    
+    @staticmethod
+    def _field(field: Field) -> Callable[[memoryview], Any]:
+        """単一フィールドの取得関数"""
+        start = field.start - 1
+        span = slice(start, start + field.length)
+        if field.type == 'int':
+            # int() はmemoryviewもそのまま受け付ける
+            return lambda buf: _b2i(buf[span])
+        if field.type == 'ymd':
+            parts = (('year', 0, 4), ('month', 4, 2), ('day', 6, 2), ('formatted', 0, 8))
+        elif field.type == 'hms':
+            parts = (('hour', 0, 2), ('minute', 2, 2), ('second', 4, 2), ('formatted', 0, 6))
+        elif field.type == 'time':
+            return lambda buf: _format_time(_b2s(buf[span].tobytes()))
+        elif LayoutCompiler._interned(field):
+            return lambda buf: _intern[buf[span].tobytes()]
+        else:
+            return lambda buf: _b2s(buf[span].tobytes())
+        
+        def parse_dict(buf):
+            raw = buf[span].tobytes()
+            return {key: _b2s(raw[offset:offset + length]) for key, offset, length in parts}
+        return parse_dict
+    
+    @classmethod
+    def _group(cls, layout: Layout, group: Group) -> Callable[[memoryview], GroupView]:
+        """フィールド群の取得関数（入れ子のビューを返す）"""
+        namespace = {'fields': tuple(f.name for f in group.fields)}
+        for f in group.fields:
+            namespace[f.name] = cls._property(f.name, cls._field(f))
+        return type(f'{layout.record_type}_{group.name}', (GroupView,), namespace)
+    
+    @staticmethod
+    def _repeat(layout: Layout, repeat: Repeat) -> Callable[[memoryview], list]:
+        """
+        繰り返し項目の取得関数
+        
+        先頭位置を1にずらした繰り返し項目だけのレイアウトをコンパイルし、
+        繰り返し領域以降のバイト列だけを渡す。
+        """
+        parse = LayoutCompiler.compile(Layout(layout.record_type, layout.description,
+                                              (repeat._replace(start=1),)))
+        offset = repeat.start - 1
+        name = repeat.name
+        return lambda buf: parse(buf[offset:].tobytes())[name]
+
+
 class RecordParser:
     """レコード種別ごとのパーサー"""
     
@@ -140,433 +624,224 @@ class RecordParser:
         'BR': '生産者マスタ',
         'BN': '馬主マスタ',
         'RC': 'レコードマスタ',
-        'HC': '繁殖牝馬マスタ',
+        'HN': '繁殖馬マスタ',
+        'HC': '坂路調教',
         'HS': '種牡馬マスタ',
         'YS': '年間スケジュール',
         'BT': '血統',
-        'CS': 'コース別成績',
-        'DM': '競争別成績',
-        'TM': 'タイム型データマイニング',
-        'SK': 'SKIP',  # スキップ
+        'CS': 'コース情報',
+        'DM': 'タイム型データマイニング予想',
+        'TM': '対戦型データマイニング予想',
+        'SK': '産駒マスタ',
         'CK': 'チェック',
     }
     
     @classmethod
-    def parse(cls, data: bytes) -> Optional[Dict[str, Any]]:
+    def parse(cls, data: bytes,
+              fields: Union[Iterable[str], Mapping[str, Iterable[str]], None] = None,
+              table: Optional[InternTable] = None) -> Optional[Dict[str, Any]]:
         """
         レコード解析のメインメソッド
         
+        先頭2バイト（デコードなし）で DISPATCH を引き、専用パーサーを呼び出す。
+        レコード長を定義した種別は、フィールドが収まらない（レイアウトの最終位置 +
+        CRLF より短い）レコードと末尾がCRLFでないレコードを除外する。例外は送出せず
+        rejected に計上してNoneを返す（種別ごとに最初の1件は警告を出力する）。
+        定義より長いレコードは受け付ける（仕様書のレコード長は実データと異なる場合がある）。
+        
+        fields を指定した場合は指定したフィールドだけを解析する（列の射影）。
+        record_type / description は常に含まれる。
+        
         Args:
-            data: レコードデータ
+            data: レコードデータ（bytes / bytearray / memoryview）
+            fields: 解析するフィールド（'race_key'、'race_info.kyori' など）、
+                    またはレコード種別 → フィールドの辞書（辞書にない種別は全フィールド）
+            table: 名称などのインターン表（None の場合は既定の表 intern_table）
             
         Returns:
-            解析結果辞書
+            解析結果辞書（レコード長不正の場合はNone）
+        
+        Examples:
+            >>> RecordParser.parse(data, fields=['race_key', 'umaban', 'result.time'])
         """
-        if len(data) < 2:
+        entry = cls.DISPATCH.get(bytes(data[:2]))
+        if entry is not None:
+            parser, _, min_length, record_type = entry
+            if fields is not None:
+                parser = cls.projected(record_type, fields)
+            if min_length is None or (len(data) >= min_length and data[-2:] == b'\r\n'):
+                return parser(data) if table is None else parser(data, table)
+            if not cls.rejected[record_type]:
+                logger.warning(f"レコード長不正のため除外: {record_type} {len(data)}バイト"
+                               f"（{min_length}バイト以上・末尾CRLFが必要。以降は件数のみ計上）")
+            cls.rejected[record_type] += 1
             return None
         
-        record_type = data[0:2].decode('ascii', errors='ignore')
+        if len(data) < 2:
+            return None
         
-        # レコード種別に応じたパーサーを呼び出し
-        parser_method = f'parse_{record_type.lower()}'
-        if hasattr(cls, parser_method):
-            return getattr(cls, parser_method)(data)
+        record_type = str(data[0:2], 'ascii', errors='ignore')
         
         # デフォルトレスポンス
         return {
             'record_type': record_type,
             'description': cls.RECORD_TYPES.get(record_type, '不明'),
             'size': len(data),
-            'raw_data': data
+            'raw_data': bytes(data)
         }
     
-    @classmethod
-    def parse_ra(cls, data: bytes) -> Dict[str, Any]:
-        """RAレコード（レース詳細）解析"""
-        parser = JVDataParser()
-        
-        record = {
-            'record_type': 'RA',
-            'description': 'レース詳細',
-            'data_kubun': parser.mid_b2s(data, 3, 1),
-            'make_date': parser.parse_ymd(data, 4),
-            'make_time': parser.parse_hms(data, 12),
-            
-            # レースキー情報
-            'race_key': {
-                'year': parser.mid_b2s(data, 18, 4),
-                'monthday': parser.mid_b2s(data, 22, 4),
-                'jyo_code': parser.mid_b2s(data, 26, 2),
-                'kaiji': parser.mid_b2s(data, 28, 2),
-                'nichiji': parser.mid_b2s(data, 30, 2),
-                'race_num': parser.mid_b2s(data, 32, 2),
-            },
-            
-            # レース情報
-            'race_info': {
-                'youbi': parser.mid_b2s(data, 34, 2),
-                'race_name': parser.mid_b2s(data, 36, 60),
-                'fukusho_name': parser.mid_b2s(data, 96, 60),
-                'kakutei_jyuni': parser.mid_b2s(data, 156, 100),
-                'grade_cd': parser.mid_b2s(data, 256, 1),
-                'syubetsu_cd': parser.mid_b2s(data, 257, 2),
-                'kigo_cd': parser.mid_b2s(data, 259, 3),
-                'jyuryo_cd': parser.mid_b2s(data, 262, 1),
-                'jyoken_cd': parser.mid_b2s(data, 263, 2),
-                'kyori': parser.mid_b2i(data, 266, 4),
-                'track_cd': parser.mid_b2s(data, 270, 2),
-                'course_kbn': parser.mid_b2s(data, 272, 1),
-            },
-            
-            # 発走時刻
-            'hassotime': parser.mid_b2s(data, 273, 4),
-            
-            # 頭数
-            'toroku_tosu': parser.mid_b2i(data, 277, 2),
-            'syusso_tosu': parser.mid_b2i(data, 279, 2),
-            'nyusen_tosu': parser.mid_b2i(data, 281, 2),
-            
-            # 天候・馬場状態
-            'condition': {
-                'tenko_cd': parser.mid_b2s(data, 283, 1),
-                'shiba_baba_cd': parser.mid_b2s(data, 284, 1),
-                'dirt_baba_cd': parser.mid_b2s(data, 285, 1),
-            },
-            
-            # ラップタイム（最大25個）
-            'lap_time': [],
-            
-            # ハロンタイム
-            'haron_time_s': [],
-            'haron_time_l': [],
-        }
-        
-        # ラップタイム解析（3バイト × 25）
-        for i in range(25):
-            lap = parser.mid_b2s(data, 286 + i*3, 3)
-            if lap and lap != '000':
-                record['lap_time'].append(lap)
-        
-        # ハロンタイムS（3バイト × 4）
-        for i in range(4):
-            haron = parser.mid_b2s(data, 361 + i*3, 3)
-            if haron and haron != '000':
-                record['haron_time_s'].append(haron)
-        
-        # ハロンタイムL（3バイト × 3）
-        for i in range(3):
-            haron = parser.mid_b2s(data, 373 + i*3, 3)
-            if haron and haron != '000':
-                record['haron_time_l'].append(haron)
-        
-        return record
+    # レイアウト定義からコンパイルした専用パーサー（インポート時に1回だけ生成）
+    PARSERS: Dict[str, Callable[[bytes], Dict[str, Any]]] = {
+        record_type: LayoutCompiler.compile(layout)
+        for record_type, layout in LAYOUTS.items()
+    }
     
-    @classmethod
-    def parse_se(cls, data: bytes) -> Dict[str, Any]:
-        """SEレコード（馬毎レース情報）解析"""
-        parser = JVDataParser()
-        
-        record = {
-            'record_type': 'SE',
-            'description': '馬毎レース情報',
-            'data_kubun': parser.mid_b2s(data, 3, 1),
-            'make_date': parser.parse_ymd(data, 4),
-            
-            # レースキー
-            'race_key': {
-                'year': parser.mid_b2s(data, 12, 4),
-                'monthday': parser.mid_b2s(data, 16, 4),
-                'jyo_code': parser.mid_b2s(data, 20, 2),
-                'kaiji': parser.mid_b2s(data, 22, 2),
-                'nichiji': parser.mid_b2s(data, 24, 2),
-                'race_num': parser.mid_b2s(data, 26, 2),
-            },
-            
-            # 馬番・血統登録番号
-            'umaban': parser.mid_b2i(data, 28, 2),
-            'ketto_num': parser.mid_b2s(data, 30, 10),
-            
-            # 馬名
-            'bamei': parser.mid_b2s(data, 40, 36),
-            
-            # 馬情報
-            'horse_info': {
-                'seibetsu_cd': parser.mid_b2s(data, 76, 1),
-                'barei': parser.mid_b2i(data, 77, 2),
-                'tozai_cd': parser.mid_b2s(data, 79, 1),
-                'hinsyu_cd': parser.mid_b2s(data, 80, 1),
-                'keiro_cd': parser.mid_b2s(data, 81, 2),
-            },
-            
-            # 馬主
-            'owner': {
-                'code': parser.mid_b2s(data, 83, 6),
-                'name': parser.mid_b2s(data, 89, 64),
-            },
-            
-            # 負担重量
-            'futan': parser.mid_b2i(data, 153, 3),
-            
-            # ブリンカー
-            'blinker': parser.mid_b2s(data, 156, 1),
-            
-            # 騎手
-            'jockey': {
-                'code': parser.mid_b2s(data, 157, 5),
-                'name': parser.mid_b2s(data, 162, 34),
-                'name_ryaku': parser.mid_b2s(data, 196, 8),
-            },
-            
-            # 馬体重
-            'bataijyu': parser.mid_b2i(data, 204, 3),
-            'zogen': parser.mid_b2s(data, 207, 3),
-            
-            # 異常区分
-            'ijyo_cd': parser.mid_b2s(data, 210, 1),
-            
-            # 調教師
-            'trainer': {
-                'code': parser.mid_b2s(data, 211, 5),
-                'name': parser.mid_b2s(data, 216, 34),
-                'name_ryaku': parser.mid_b2s(data, 250, 8),
-                'syozoku': parser.mid_b2s(data, 258, 4),
-            },
-            
-            # 馬主情報
-            'banushi': {
-                'code': parser.mid_b2s(data, 262, 6),
-                'name': parser.mid_b2s(data, 268, 64),
-            },
-            
-            # 賞金
-            'prize': {
-                'honsyo': parser.mid_b2i(data, 332, 8),
-                'fukasyo': parser.mid_b2i(data, 340, 8),
-                'shutokujyo': parser.mid_b2i(data, 348, 8),
-                'shutoku': parser.mid_b2i(data, 356, 8),
-            },
-            
-            # レース結果
-            'result': {
-                'kakutei_jyuni': parser.mid_b2i(data, 364, 2),
-                'time': parser.parse_time(data, 366),
-                'chakusa_cd': parser.mid_b2s(data, 370, 1),
-                'chakusa': parser.mid_b2s(data, 371, 3),
-                'jyuni_fuka': parser.mid_b2s(data, 374, 1),
-                'tansho_odds': parser.mid_b2i(data, 375, 4),
-                'ninsiki': parser.mid_b2i(data, 379, 2),
-            },
-        }
-        
-        return record
+    # レコード種別の先頭2バイト → (パーサー, レコード長, 最小レコード長, レコード種別)
+    # 最小レコード長はレイアウトの最終位置 + CRLF（レコード長を定義した種別のみ）
+    DISPATCH: Dict[bytes, tuple] = {
+        record_type.encode('ascii'): (
+            parser, LAYOUTS[record_type].length,
+            batch._extent(LAYOUTS[record_type]) + 2 if LAYOUTS[record_type].length else None,
+            record_type)
+        for record_type, parser in PARSERS.items()
+    }
     
-    @classmethod
-    def parse_um(cls, data: bytes) -> Dict[str, Any]:
-        """UMレコード（競走馬マスタ）解析"""
-        parser = JVDataParser()
-        
-        record = {
-            'record_type': 'UM',
-            'description': '競走馬マスタ',
-            'data_kubun': parser.mid_b2s(data, 3, 1),
-            'make_date': parser.parse_ymd(data, 4),
-            
-            # 血統登録番号
-            'ketto_num': parser.mid_b2s(data, 12, 10),
-            
-            # 削除区分
-            'del_kubun': parser.mid_b2s(data, 22, 1),
-            
-            # 登録・抹消日
-            'touroku_date': parser.parse_ymd(data, 23),
-            'massyo_date': parser.parse_ymd(data, 31),
-            
-            # 馬名
-            'bamei': parser.mid_b2s(data, 39, 36),
-            
-            # 生年月日
-            'birth_date': parser.parse_ymd(data, 75),
-            
-            # 馬情報
-            'horse_info': {
-                'seibetsu_cd': parser.mid_b2s(data, 83, 1),
-                'hinsyu_cd': parser.mid_b2s(data, 84, 1),
-                'keiro_cd': parser.mid_b2s(data, 85, 2),
-            },
-            
-            # 系統
-            'keito': parser.mid_b2s(data, 87, 60),
-            
-            # 3代血統
-            'blood': {
-                'father': parser.mid_b2s(data, 147, 10),
-                'mother': parser.mid_b2s(data, 157, 10),
-                'bms': parser.mid_b2s(data, 167, 10),  # 母父
-            },
-            
-            # 東西所属
-            'tozai_cd': parser.mid_b2s(data, 177, 1),
-            
-            # 調教師
-            'trainer': {
-                'code': parser.mid_b2s(data, 178, 5),
-                'name': parser.mid_b2s(data, 183, 34),
-            },
-            
-            # 馬主
-            'banushi': {
-                'code': parser.mid_b2s(data, 217, 6),
-                'name': parser.mid_b2s(data, 223, 64),
-            },
-            
-            # 生産者
-            'breeder': {
-                'code': parser.mid_b2s(data, 287, 6),
-                'name': parser.mid_b2s(data, 293, 42),
-            },
-            
-            # 産地名
-            'sanchi_name': parser.mid_b2s(data, 335, 20),
-        }
-        
-        return record
+    # レコード長不正で除外した件数（レコード種別ごと）
+    rejected: Counter = Counter()
+    
+    # 名称などの長い文字列フィールドの既定のインターン表
+    # （取り込み処理は実行ごとの表を parse / parse_chunk に渡す）
+    intern_table: InternTable = _intern
+    
+    # 遅延デコードのビュークラス
+    VIEWS: Dict[str, type] = {
+        record_type: ViewCompiler.compile(layout)
+        for record_type, layout in LAYOUTS.items()
+    }
     
     @classmethod
-    def parse_o1(cls, data: bytes) -> Dict[str, Any]:
-        """O1レコード（単複オッズ）解析"""
-        parser = JVDataParser()
-        
-        record = {
-            'record_type': 'O1',
-            'description': '単複オッズ',
-            'data_kubun': parser.mid_b2s(data, 3, 1),
-            'make_date': parser.parse_ymd(data, 4),
-            
-            # レースキー
-            'race_key': {
-                'year': parser.mid_b2s(data, 12, 4),
-                'monthday': parser.mid_b2s(data, 16, 4),
-                'jyo_code': parser.mid_b2s(data, 20, 2),
-                'kaiji': parser.mid_b2s(data, 22, 2),
-                'nichiji': parser.mid_b2s(data, 24, 2),
-                'race_num': parser.mid_b2s(data, 26, 2),
-            },
-            
-            # 発売票数合計
-            'total_sale': {
-                'tansho': parser.mid_b2s(data, 28, 11),
-                'fukusho': parser.mid_b2s(data, 39, 11),
-            },
-            
-            # 返還総額
-            'henkan': {
-                'tansho': parser.mid_b2s(data, 50, 11),
-                'fukusho': parser.mid_b2s(data, 61, 11),
-            },
-            
-            # オッズ（最大28頭分）
-            'odds': [],
-        }
+    def projected(cls, record_type: str,
+                  fields: Union[Iterable[str], Mapping[str, Iterable[str]]]
+                  ) -> Callable[[bytes], Dict[str, Any]]:
+        """
+        指定したフィールドだけを解析するパーサーを取得
+        
+        射影したレイアウトを LayoutCompiler でコンパイルし、
+        (レコード種別, フィールド) ごとにキャッシュする。
         
-        # 各馬のオッズ情報（16バイト × 28頭）
-        for i in range(28):
-            base_pos = 72 + i * 16
+        Args:
+            record_type: レコード種別
+            fields: フィールドのリスト、またはレコード種別 → フィールドの辞書
             
-            umaban = parser.mid_b2i(data, base_pos, 2)
-            if umaban and umaban > 0:
-                horse_odds = {
-                    'umaban': umaban,
-                    'tansho_odds': parser.mid_b2i(data, base_pos + 2, 4),
-                    'fukusho_odds_low': parser.mid_b2i(data, base_pos + 6, 4),
-                    'fukusho_odds_high': parser.mid_b2i(data, base_pos + 10, 4),
-                    'tansho_ninki': parser.mid_b2i(data, base_pos + 14, 1),
-                    'fukusho_ninki': parser.mid_b2i(data, base_pos + 15, 1),
-                }
-                record['odds'].append(horse_odds)
-        
-        return record
+        Returns:
+            パース関数（辞書に指定がない種別は PARSERS の関数）
+        """
+        if isinstance(fields, Mapping):
+            fields = fields.get(record_type)
+            if fields is None:
+                return cls.PARSERS[record_type]
+        return _compile_projection(record_type, tuple(fields))
     
     @classmethod
-    def parse_wf(cls, data: bytes) -> Dict[str, Any]:
-        """WFレコード（馬体重）解析"""
-        parser = JVDataParser()
-        
-        record = {
-            'record_type': 'WF',
-            'description': '馬体重',
-            'data_kubun': parser.mid_b2s(data, 3, 1),
-            'make_date': parser.parse_ymd(data, 4),
-            
-            # レースキー
-            'race_key': {
-                'year': parser.mid_b2s(data, 12, 4),
-                'monthday': parser.mid_b2s(data, 16, 4),
-                'jyo_code': parser.mid_b2s(data, 20, 2),
-                'kaiji': parser.mid_b2s(data, 22, 2),
-                'nichiji': parser.mid_b2s(data, 24, 2),
-                'race_num': parser.mid_b2s(data, 26, 2),
-            },
-            
-            # 馬体重情報（最大28頭分）
-            'weights': [],
-        }
+    def view(cls, data) -> Optional[RecordView]:
+        """
+        レコードの遅延ビューを取得
         
-        # 各馬の馬体重情報（7バイト × 28頭）
-        for i in range(28):
-            base_pos = 28 + i * 7
+        parse と異なり、フィールドは参照された時点で初めてデコードされる。
+        
+        Args:
+            data: レコードデータ（bytes / bytearray / memoryview）
             
-            umaban = parser.mid_b2i(data, base_pos, 2)
-            if umaban and umaban > 0:
-                weight_info = {
-                    'umaban': umaban,
-                    'bataijyu': parser.mid_b2i(data, base_pos + 2, 3),
-                    'zogen_fuka': parser.mid_b2s(data, base_pos + 5, 1),
-                    'zogen': parser.mid_b2s(data, base_pos + 6, 3),
-                }
-                record['weights'].append(weight_info)
-        
-        return record
+        Returns:
+            レコードビュー（to_dict() で parse と同じ辞書を取得できる）
+        """
+        buf = memoryview(data)
+        if len(buf) < 2:
+            return None
+        
+        record_type = buf[0:2].tobytes().decode('ascii', errors='ignore')
+        return cls.VIEWS.get(record_type, RecordView)(buf)
     
     @classmethod
-    def parse_ys(cls, data: bytes) -> Dict[str, Any]:
-        """YSレコード（年間スケジュール）解析"""
-        parser = JVDataParser()
-        
-        record = {
-            'record_type': 'YS',
-            'description': '年間スケジュール',
-            'data_kubun': parser.mid_b2s(data, 3, 1),
-            'make_date': parser.parse_ymd(data, 4),
-            
-            # 年
-            'year': parser.mid_b2s(data, 12, 4),
-            
-            # 変更識別
-            'henko_id': parser.mid_b2s(data, 16, 1),
-            
-            # 開催情報
-            'kaisai_info': []
-        }
+    def parse_batch(cls, record_type: str, records: List[bytes], dictionary: bool = False,
+                    fields: Optional[Iterable[str]] = None, table: Optional[InternTable] = None):
+        """
+        同一種別のレコードをまとめてNumPy構造化配列に変換（NumPyが必要）
+        
+        数値項目は列ごとに一括で整数化し、文字列項目は固定長バイト列のまま
+        保持する（batch.decode_text で必要な列だけデコード）。
         
-        # 開催情報（最大397開催）
-        for i in range(397):
-            base_pos = 17 + i * 16
-            if base_pos + 16 > len(data):
-                break
+        Args:
+            record_type: レコード種別
+            records: レコードデータのリスト
+            dictionary: 名称などの長い文字列フィールドを整数コードにする
+            fields: 変換するフィールド（None の場合は全フィールド）
+            table: 辞書コードを採番するインターン表（None の場合は intern_table）
             
-            # 開催キー
-            kaiji_date = parser.mid_b2s(data, base_pos, 8)
-            if kaiji_date and kaiji_date != '00000000':
-                kaisai = {
-                    'kaiji_date': kaiji_date,
-                    'jyo_code': parser.mid_b2s(data, base_pos + 8, 2),
-                    'kaiji': parser.mid_b2s(data, base_pos + 10, 2),
-                    'nichiji': parser.mid_b2s(data, base_pos + 12, 2),
-                    'youbi': parser.mid_b2s(data, base_pos + 14, 2),
-                }
-                record['kaisai_info'].append(kaisai)
+        Returns:
+            構造化配列（dictionary=True の場合は (構造化配列, コード → 値のリスト)）
+        """
+        return batch.parse_batch(record_type, records, dictionary, fields,
+                                 cls.intern_table if table is None else table)
+    
+    parse_ra = staticmethod(PARSERS['RA'])
+    parse_se = staticmethod(PARSERS['SE'])
+    parse_um = staticmethod(PARSERS['UM'])
+    parse_o1 = staticmethod(PARSERS['O1'])
+    parse_wf = staticmethod(PARSERS['WF'])
+    parse_ys = staticmethod(PARSERS['YS'])
+    
+    # O2〜O6は組番オッズを項目ごとの配列で返す
+    parse_o2 = staticmethod(PARSERS['O2'])
+    parse_o3 = staticmethod(PARSERS['O3'])
+    parse_o4 = staticmethod(PARSERS['O4'])
+    parse_o5 = staticmethod(PARSERS['O5'])
+    parse_o6 = staticmethod(PARSERS['O6'])
+    
+    # マスタ・マイニング系
+    parse_ks = staticmethod(PARSERS['KS'])
+    parse_ch = staticmethod(PARSERS['CH'])
+    parse_br = staticmethod(PARSERS['BR'])
+    parse_bn = staticmethod(PARSERS['BN'])
+    parse_hn = staticmethod(PARSERS['HN'])
+    parse_sk = staticmethod(PARSERS['SK'])
+    parse_hc = staticmethod(PARSERS['HC'])
+    parse_cs = staticmethod(PARSERS['CS'])
+    parse_dm = staticmethod(PARSERS['DM'])
+    parse_tm = staticmethod(PARSERS['TM'])
+
+
+@lru_cache(maxsize=None)
+def _compile_projection(record_type: str, fields: tuple) -> Callable[[bytes], Dict[str, Any]]:
+    """射影したレイアウトのパース関数（RecordParser.projected 用）"""
+    return LayoutCompiler.compile(project(LAYOUTS[record_type], fields))
+
+
+def parse_chunk(chunk: List[bytes], fields: Optional[Mapping[str, Iterable[str]]] = None,
+                table: Optional[InternTable] = None) -> tuple:
+    """
+    生レコードのリストをまとめて解析（ProcessPoolExecutor のワーカー用）
+    
+    Args:
+        chunk: レコードデータ（bytes / memoryview）のリスト
+        fields: レコード種別 → 解析するフィールド（RecordParser.parse と同じ）
+        table: インターン表（None の場合は既定の表。ワーカープロセスではプロセスごとの表）
         
-        return record
+    Returns:
+        (解析結果辞書のリスト, エラー件数, レコード長不正で除外した件数)
+    """
+    before = Counter(RecordParser.rejected)
+    records = []
+    errors = 0
+    for data in chunk:
+        try:
+            record = RecordParser.parse(data, fields, table)
+        except Exception:
+            errors += 1
+            continue
+        if record:
+            records.append(record)
+    return records, errors, RecordParser.rejected - before
 
 
 class CodeMaster:
@@ -727,7 +1002,7 @@ def test_parser():
     print("=" * 50)
     
     # テストデータ（実際のデータが必要）
-    test_data = b'RA' + b'1' + b'20250101' + b'120000' + b' ' * 1000
+    test_data = b'RA' + b'1' + b'20250101' + b'120000' + b' ' * 390 + b'\r\n'
     
     # レコード解析
     result = RecordParser.parse(test_data)
@@ -0,0 +1,238 @@
+"""
+JV-Data Pipeline Module
+取り込み処理（読み込み → 解析 → 保存）の段ごとの計測
+
+JVDataManager.process_data は3段のパイプラインで動作する。
+    
+    読み込み : JV-Link（COM）を生成したスレッドで gets() を呼び出す
+    解析     : 解析スレッド（parse_workers > 0 の場合はワーカープロセス）
+    保存     : 書き込みスレッド（データベース接続を1本保持）
+
+段の間は上限付きのキューでつなぎ、後段が詰まった場合は前段が待つ。
+各段の処理時間・入力待ち時間・出力待ち時間を StageStats に記録する。
+全体の所要時間は各段の合計ではなく、最も遅い段の処理時間に近づく。
+
+読み込み段がダウンロード待ち（gets() が -3）の間の待ち方は DownloadWaiter が決める。
+段で発生した例外は StageFailure で共有し、全段の終了後に呼び出し元へ送出する。
+"""
+
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StageStats:
+    """
+    パイプライン1段分の計測値
+    
+    Attributes:
+        name: 段の名前
+        items: 処理した単位数（チャンク数など）
+        records: 処理したレコード数
+        busy: 処理時間（秒）
+        idle: 入力待ち時間（秒）
+        blocked: 出力待ち時間（秒。後段が詰まっていた時間）
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.records = 0
+        self.busy = 0.0
+        self.idle = 0.0
+        self.blocked = 0.0
+    
+    @contextmanager
+    def work(self) -> Iterator[None]:
+        """処理時間として計測"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.busy += time.perf_counter() - start
+    
+    @contextmanager
+    def wait(self) -> Iterator[None]:
+        """入力待ち時間として計測"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.idle += time.perf_counter() - start
+    
+    def get(self, q: queue.Queue) -> Any:
+        """前段のキューから取り出す（待ち時間を計測）"""
+        with self.wait():
+            return q.get()
+    
+    def put(self, q: queue.Queue, item: Any) -> None:
+        """後段のキューに渡す（キューが満杯で待った時間を計測）"""
+        start = time.perf_counter()
+        q.put(item)
+        self.blocked += time.perf_counter() - start
+    
+    def __str__(self) -> str:
+        return (f"{self.name}: 処理 {self.busy:.1f}秒, 入力待ち {self.idle:.1f}秒, "
+                f"出力待ち {self.blocked:.1f}秒, {self.records}件")
+    
+    def __repr__(self) -> str:
+        return f'<StageStats {self}>'
+
+
+class StageFailure:
+    """
+    パイプラインの段で発生した例外（最初の1件）
+    
+    例外で止まった段があると前段がキューで待ち続けるため、各段は例外を
+    record で記録したあとも、処理をせずに終端（None）までキューを読み進める。
+    読み込み段は failed を見て読み込みを打ち切り、呼び出し元は全段の終了後に
+    raise_error で例外を送出する。
+    
+    Attributes:
+        stage: 例外が発生した段の名前
+        error: 例外（発生していない場合はNone）
+    """
+    
+    def __init__(self):
+        self.stage: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def failed(self) -> bool:
+        """いずれかの段で例外が発生したか"""
+        return self.error is not None
+    
+    def record(self, stage: str, error: BaseException) -> None:
+        """例外を記録（2件目以降はログのみ）"""
+        logger.error(f"パイプライン {stage}段でエラー: {error!r}")
+        with self._lock:
+            if self.error is None:
+                self.stage = stage
+                self.error = error
+    
+    def raise_error(self) -> None:
+        """記録した例外を送出（なければ何もしない）"""
+        if self.error is not None:
+            raise self.error
+
+
+class DownloadWaiter:
+    """
+    ダウンロード待ち（gets() が -3）のポーリング
+    
+    status()（ダウンロード済みファイル数）が増えるまで、待ち時間を
+    initial 秒から factor 倍ずつ伸ばす（上限 maximum 秒）。ファイル数が
+    増えた間隔からダウンロード速度を求め、次のファイルの完了予測時刻が
+    先であればそこまでまとめて待つ。ファイル数が増えた時点で待ち時間は
+    initial に戻る。
+    
+    Attributes:
+        waited: 累計待ち時間（秒）
+        polls: status() の呼び出し回数
+        rate: ダウンロード速度の推定値（ファイル/秒。未計測の場合はNone）
+    """
+    
+    def __init__(self, initial: float = 0.005, maximum: float = 1.0, factor: float = 2.0):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.delay = initial
+        self.waited = 0.0
+        self.polls = 0
+        self.rate: Optional[float] = None
+        self._downloaded: Optional[int] = None
+        self._progressed_at = 0.0
+    
+    def wait(self, status: Callable[[], int]) -> int:
+        """
+        ダウンロードの進捗を確認し、進んでいなければ待つ
+        
+        Args:
+            status: ダウンロード済みファイル数を返す関数（JVLinkClient.status）
+        
+        Returns:
+            ダウンロード済みファイル数
+        """
+        start = time.monotonic()
+        downloaded = status()
+        delay = self.next_delay(downloaded)
+        if delay:
+            time.sleep(delay)
+        self.waited += time.monotonic() - start
+        return downloaded
+    
+    def next_delay(self, downloaded: int) -> float:
+        """
+        進捗を記録し、次に status() を確認するまでの待ち時間を返す
+        
+        待ち方を呼び出し側で決める場合（asyncio.sleep で待つ場合など）に使う。
+        累計待ち時間 waited は呼び出し側で加算する。
+        
+        Args:
+            downloaded: ダウンロード済みファイル数（status() の戻り値）
+        
+        Returns:
+            待ち時間（秒。進捗があった場合は0）
+        """
+        self.polls += 1
+        now = time.monotonic()
+        
+        if self._downloaded is None or downloaded > self._downloaded:
+            # 進捗あり（待たずに読み込みを再開する）
+            if self._downloaded is not None:
+                rate = (downloaded - self._downloaded) / max(now - self._progressed_at, 1e-6)
+                self.rate = rate if self.rate is None else (self.rate + rate) / 2
+            self._downloaded = downloaded
+            self._progressed_at = now
+            self.delay = self.initial
+            return 0.0
+        
+        delay = self.delay
+        if self.rate:
+            # 次のファイルの完了予測時刻まで待つ
+            predicted = self._progressed_at + 1 / self.rate - now
+            delay = max(delay, min(predicted, self.maximum))
+        self.delay = min(self.delay * self.factor, self.maximum)
+        return delay
+
+
+class BatchSizer:
+    """
+    保存バッチ（1トランザクションで保存する件数）の調整
+    
+    レコード種別によって1件あたりの行数が大きく異なる（RA・SE は1行、
+    O1・WF は馬番ごと、YS は開催日ごと）ため、件数を固定せず、直近の
+    バッチの保存速度（件/秒）から1トランザクションがおよそ target 秒に
+    なる件数を求める。急に変わらないよう前回の1/2〜2倍に抑え、
+    minimum〜maximum に収める。
+    
+    Attributes:
+        size: 次のバッチの件数
+    """
+    
+    def __init__(self, initial: int = 100, target: float = 0.2,
+                 minimum: int = 10, maximum: int = 10000):
+        self.target = target
+        self.minimum = minimum
+        self.maximum = maximum
+        self.size = initial
+    
+    def update(self, count: int, seconds: float) -> None:
+        """
+        保存したバッチの件数と所要時間から次のバッチの件数を決める
+        
+        Args:
+            count: 保存した件数
+            seconds: 保存（コミットまで）の所要時間（秒）
+        """
+        if count <= 0:
+            return
+        size = int(count * self.target / max(seconds, 1e-6))
+        size = min(max(size, self.size // 2), self.size * 2)
+        self.size = min(max(size, self.minimum), self.maximum)
@@ -0,0 +1,311 @@
+"""
+JV-Link Replay Module
+保存済みのJV-Dataファイルからレコードを返すJV-Linkの代替クライアント
+
+ReplayJVLinkClient は JVLinkClient と同じインターフェースを持ち、
+JV-Link（Windows・COM）なしで JVDataManager の取り込み処理全体を
+実行・計測できる。
+
+入力はディレクトリ内のファイル（1行1レコード、CRLF区切り）で、
+ファイル名順に1ファイルずつ返す。RecordingJVLinkClient で記録した
+キャプチャも同じ形式のため、そのまま再生できる。
+
+JV-Linkの戻り値の再現:
+    >0 : レコード（戻り値はバイト数）
+    -1 : ファイル切り替わり（各ファイルの読み込み開始時）
+    -3 : ダウンロード中（download_interval 秒ごとに1ファイルずつ読み込み可能になる）
+     0 : 全ファイル読み込み完了
+"""
+
+import glob
+import os
+import time
+import logging
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from .client import JVLinkClient
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayJVLinkClient(JVLinkClient):
+    """保存済みのJV-Dataファイルを再生するJV-Linkクライアント"""
+    
+    def __init__(self, path: str, download_interval: float = 0.0,
+                 read_delay: float = 0.0, pattern: str = '*') -> None:
+        """
+        コンストラクタ
+        
+        Args:
+            path: JV-Dataファイル（キャプチャ）のディレクトリ
+            download_interval: 1ファイルのダウンロード時間（秒）。0の場合は
+                               全ファイルがダウンロード済みとして -3 を返さない
+            read_delay: 1回の読み込みごとの待ち時間（秒）
+            pattern: 対象ファイル名のパターン
+        """
+        super().__init__()
+        self.path = path
+        self.download_interval = download_interval
+        self.read_delay = read_delay
+        self.pattern = pattern
+        self._files: List[str] = []
+        self._index = 0
+        self._file: Optional[BinaryIO] = None
+        self._filename = ""
+        self._opened_at = 0.0
+    
+    def initialize(self, sid: str = "UNKNOWN") -> int:
+        """
+        初期化（再生元ディレクトリの確認のみ）
+        
+        Args:
+            sid: ソフトウェアID（未使用）
+        
+        Returns:
+            0: 正常終了
+            -118: 再生元ディレクトリがない
+        """
+        if not os.path.isdir(self.path):
+            logger.error(f"再生元ディレクトリがありません: {self.path}")
+            return -118
+        
+        self.is_initialized = True
+        logger.info(f"リプレイ初期化成功 (再生元: {self.path})")
+        return 0
+    
+    def get_version(self) -> str:
+        """バージョン取得"""
+        return "replay"
+    
+    def set_save_path(self, path: str) -> int:
+        """保存パス設定（再生時は何もしない）"""
+        return 0
+    
+    def set_save_flag(self, flag: int) -> int:
+        """保存フラグ設定（再生時は何もしない）"""
+        return 0
+    
+    def set_ui_properties(self) -> int:
+        """設定ダイアログ表示（再生時は何もしない）"""
+        return 0
+    
+    def open(self, data_spec: str, from_time: str = "99999999999999",
+             option: int = 1) -> Tuple[int, int, int, str]:
+        """
+        蓄積系データオープン（data_spec・from_time・option に関わらず全ファイルを再生）
+        
+        Args:
+            data_spec: データ種別
+            from_time: 取得開始日時
+            option: オプション
+        
+        Returns:
+            (戻り値コード, 読込対象ファイル数, ダウンロードファイル数, 最終ファイルタイムスタンプ)
+        """
+        if not self.is_initialized:
+            logger.error("JVInit未実行")
+            return (-201, 0, 0, "")
+        
+        logger.info(f"JVOpen実行（リプレイ）: spec={data_spec}, from={from_time}, option={option}")
+        ret = self._start()
+        if ret < 0:
+            return (ret, 0, 0, "")
+        
+        download_count = len(self._files) if self.download_interval > 0 else 0
+        last_timestamp = datetime.fromtimestamp(
+            os.path.getmtime(self._files[-1])).strftime('%Y%m%d%H%M%S')
+        logger.info(f"JVOpen成功: 読込対象={len(self._files)}, DL={download_count}")
+        return (0, len(self._files), download_count, last_timestamp)
+    
+    def open_realtime(self, data_spec: str, key: str = "") -> int:
+        """
+        速報系データオープン（全ファイルを再生）
+        
+        Args:
+            data_spec: データ種別
+            key: レースキー
+        
+        Returns:
+            戻り値コード
+        """
+        if not self.is_initialized:
+            logger.error("JVInit未実行")
+            return -201
+        
+        logger.info(f"JVRTOpen実行（リプレイ）: spec={data_spec}, key={key}")
+        return self._start()
+    
+    def _start(self) -> int:
+        """再生対象ファイルを列挙して先頭から読み込みを開始"""
+        if self.is_open:
+            logger.warning("前回のJVOpenを閉じています")
+            self.close()
+        
+        self._files = sorted(f for f in glob.glob(os.path.join(self.path, self.pattern))
+                             if os.path.isfile(f))
+        if not self._files:
+            logger.error(f"再生するファイルがありません: {self.path}")
+            return -1
+        
+        self._index = 0
+        self._filename = ""
+        self._opened_at = time.monotonic()
+        self.is_open = True
+        return 0
+    
+    def read(self, buffer_size: int = 110000) -> Tuple[int, bytes, str]:
+        """
+        データ読み込み
+        
+        Args:
+            buffer_size: バッファサイズ（未使用）
+        
+        Returns:
+            (戻り値コード, データ, ファイル名)
+        """
+        if not self.is_open:
+            return (-401, b"", "")
+        
+        if self.read_delay:
+            time.sleep(self.read_delay)
+        
+        if self._file is None:
+            if self._index >= len(self._files):
+                return (0, b"", "")
+            if self._index >= self.status():
+                return (-3, b"", "")
+            path = self._files[self._index]
+            self._file = open(path, 'rb')
+            self._filename = os.path.basename(path)
+            # ファイル切り替わり（次の呼び出しからこのファイルのレコードを返す）
+            return (-1, b"", self._filename)
+        
+        data = self._file.readline()
+        if data:
+            return (len(data), data, self._filename)
+        
+        # ファイル終端
+        self._file.close()
+        self._file = None
+        self._index += 1
+        return self.read(buffer_size)
+    
+    def gets(self, buffer_size: int = 110000) -> Tuple[int, bytes, str]:
+        """データ読み込み（JVGets版。read と同じ）"""
+        return self.read(buffer_size)
+    
+    def _gets_raw(self, buffer_size: int) -> Tuple[int, bytes, str]:
+        """gets_view の読み込み元（read と同じ）"""
+        return self.read(buffer_size)
+    
+    def status(self) -> int:
+        """
+        ダウンロード進捗取得
+        
+        Returns:
+            ダウンロード済み（読み込み可能な）ファイル数
+        """
+        if self.download_interval <= 0:
+            return len(self._files)
+        elapsed = time.monotonic() - self._opened_at
+        return min(len(self._files), int(elapsed / self.download_interval))
+    
+    def skip(self) -> None:
+        """読み込み中のファイルの残りを読み飛ばす"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._index += 1
+    
+    def cancel(self) -> None:
+        """ダウンロードキャンセル"""
+        self.close()
+    
+    def close(self) -> int:
+        """
+        終了処理
+        
+        Returns:
+            戻り値コード
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.is_open = False
+        return 0
+    
+    def file_delete(self, filename: str) -> int:
+        """ファイル削除（再生元のファイルは削除しない）"""
+        return 0
+
+
+def spec_client(path: str, download_interval: float, data_spec: str) -> ReplayJVLinkClient:
+    """
+    データ種別ごとのキャプチャを再生するクライアント（FetchOrchestrator の client_factory 用）
+    
+    path/{data_spec} があればそのディレクトリ、なければ path を再生する。
+    functools.partial(spec_client, path, download_interval) として渡す。
+    """
+    spec_path = os.path.join(path, data_spec)
+    return ReplayJVLinkClient(spec_path if os.path.isdir(spec_path) else path, download_interval)
+
+
+class RecordingJVLinkClient:
+    """
+    JV-Linkクライアントの読み込み結果をキャプチャとして記録するラッパー
+    
+    gets / read で返したレコードを、JV-Linkが返したファイル名ごとに
+    path 以下へ書き込む。ファイルはキャプチャのセッション（close まで）で
+    最初に現れたときに作り直すため、同じディレクトリに記録し直しても
+    前回のレコードは残らない。それ以外のメソッドはそのままクライアントに委譲する。
+    記録したディレクトリは ReplayJVLinkClient で再生できる。
+    """
+    
+    def __init__(self, client: JVLinkClient, path: str) -> None:
+        """
+        コンストラクタ
+        
+        Args:
+            client: 記録対象のクライアント
+            path: キャプチャの保存先ディレクトリ
+        """
+        self.client = client
+        self.path = path
+        self._files: Dict[str, BinaryIO] = {}
+        os.makedirs(path, exist_ok=True)
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+    
+    def read(self, buffer_size: int = 110000) -> Tuple[int, bytes, str]:
+        """データ読み込み（記録あり）"""
+        return self._record(self.client.read(buffer_size))
+    
+    def gets(self, buffer_size: int = 110000) -> Tuple[int, bytes, str]:
+        """データ読み込み（JVGets版・記録あり）"""
+        return self._record(self.client.gets(buffer_size))
+    
+    def gets_view(self, buffer_size: int = 110000) -> Tuple[int, memoryview, str]:
+        """データ読み込み（JVGets版・バッファ再利用・記録あり）"""
+        ret, data, filename = self.client.gets_view(buffer_size)
+        self._record((ret, data[:max(ret, 0)], filename))
+        return (ret, data, filename)
+    
+    def _record(self, result: Tuple[int, bytes, str]) -> Tuple[int, bytes, str]:
+        ret, data, filename = result
+        if ret > 0:
+            f = self._files.get(filename)
+            if f is None:
+                # セッションで最初のレコード（以前のキャプチャは上書きする）
+                name = os.path.basename(filename) or 'capture.jvd'
+                f = self._files[filename] = open(os.path.join(self.path, name), 'wb')
+            f.write(data)
+        return result
+    
+    def close(self) -> int:
+        """キャプチャファイルを閉じてクライアントを終了"""
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+        return self.client.close()
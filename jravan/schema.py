@@ -0,0 +1,251 @@
+"""
+JV-Data Schema Module
+レイアウト定義からテーブル定義（DDL）と一括登録処理を生成するモジュール
+
+レコード種別を追加する場合は layouts.py にレイアウトを、
+TABLES に保存先テーブルを1行追加するだけでよい。
+パース関数は parser.RecordParser.PARSERS と同じコンパイル済み関数を使う。
+
+列の対応:
+    フィールド        : 同名の列（'int' は INTEGER、それ以外は TEXT）
+    'ymd' / 'hms'     : formatted の文字列
+    グループ          : {グループ名}_{フィールド名} の列
+    レースキー        : build_race_key と同じ16桁の race_key 列
+    繰り返し項目      : 子テーブル {テーブル名}_{項目名}（親の主キー + 要素の列）
+"""
+
+from itertools import chain
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from .layouts import LAYOUTS, Field, Group, Repeat
+from .parser import RecordParser
+
+
+def _priority_sql(column: str, priority: Mapping[str, int]) -> str:
+    """データ区分の列 → 優先度を返すSQL式（表にない区分・NULLは0）"""
+    cases = ' '.join(f"WHEN '{kubun}' THEN {rank}" for kubun, rank in priority.items())
+    return f"CASE {column} {cases} ELSE 0 END"
+
+
+def _upsert_sql(table: str, columns: Tuple[str, ...], key: Tuple[str, ...],
+                values: Optional[Tuple[str, ...]] = None,
+                priority: Optional[Mapping[str, int]] = None,
+                updated_at: bool = False) -> str:
+    """
+    保存SQL（INSERT ... ON CONFLICT DO UPDATE）
+    
+    key（主キー・UNIQUE制約の列）が同じ行が既にある場合は、値が変わった列が
+    あるときだけ更新する。INSERT OR REPLACE と異なり既存の行を削除しないため、
+    同じデータの再取得では書き込みが起きず、created_at も保たれる。
+    priority を指定した場合は、データ区分の優先度が既存の行より低いレコードでは更新しない。
+    """
+    values = list(values or ['?'] * len(columns))
+    updates = [column for column in columns if column not in key]
+    assignments = [f"{column} = excluded.{column}" for column in updates]
+    condition = ' OR '.join(f"{table}.{column} IS NOT excluded.{column}" for column in updates)
+    if priority:
+        condition = (f"{_priority_sql('excluded.data_kubun', priority)} >= "
+                     f"{_priority_sql(f'{table}.data_kubun', priority)} AND ({condition})")
+    columns = list(columns)
+    if updated_at:
+        columns.append('updated_at')
+        values.append('CURRENT_TIMESTAMP')
+        assignments.append('updated_at = CURRENT_TIMESTAMP')
+    return f"""
+        INSERT INTO {table} ({', '.join(columns)})
+        VALUES ({', '.join(values)})
+        ON CONFLICT({', '.join(key)}) DO UPDATE SET {', '.join(assignments)}
+        WHERE {condition}
+    """
+
+
+class Table(NamedTuple):
+    """レコード種別ごとの保存先テーブル"""
+    record_type: str
+    name: str
+    primary_key: Tuple[str, ...]
+
+
+# レイアウトから自動生成するテーブル
+TABLES = (
+    Table('KS', 'jockeys', ('kisyu_code',)),
+    Table('CH', 'trainers', ('chokyosi_code',)),
+    Table('BR', 'breeders', ('breeder_code',)),
+    Table('BN', 'owners', ('banusi_code',)),
+    Table('HN', 'breeding_horses', ('hansyoku_num',)),
+    Table('SK', 'offspring', ('ketto_num',)),
+    Table('HC', 'hanro_trainings', ('tresen_kubun', 'chokyo_date', 'chokyo_time', 'ketto_num')),
+    Table('CS', 'courses', ('jyo_code', 'kyori', 'track_cd', 'kaishu_date')),
+    Table('DM', 'time_mining', ('race_key',)),
+    Table('TM', 'match_mining', ('race_key',)),
+)
+
+
+class CompiledTable:
+    """
+    コンパイル済みテーブル定義
+    
+    Attributes:
+        record_type: レコード種別
+        name: テーブル名
+        parse: パース関数
+        ddl: CREATE TABLE文（子テーブルを含む）
+        insert_sql: 登録SQL（同じ主キーの行は値が変わった場合だけ更新）
+        row: 解析結果辞書 → 登録値タプル
+        key: 解析結果辞書 → 主キー値タプル
+        children: 子テーブルごとの (削除SQL, 登録SQL, 解析結果辞書 → 登録値タプルのリスト)
+    """
+    
+    def __init__(self, record_type: str, name: str, parse: Callable[[bytes], Dict[str, Any]],
+                 ddl: List[str], insert_sql: str, row: Callable[[Dict[str, Any]], tuple],
+                 key: Callable[[Dict[str, Any]], tuple], children: List[tuple]):
+        self.record_type = record_type
+        self.name = name
+        self.parse = parse
+        self.ddl = ddl
+        self.insert_sql = insert_sql
+        self.row = row
+        self.key = key
+        self.children = children
+    
+    def insert(self, cursor, records: List[Dict[str, Any]]) -> None:
+        """
+        解析済みレコードをまとめて登録（executemany）
+        
+        同じ主キーの行は値が変わった列があるときだけ更新する。子テーブルは
+        要素ごとの変更を判定せず、親の主キーごとに削除してから登録し直す
+        （親の行が変わっていない場合も書き込む）。
+        
+        Args:
+            cursor: データベースカーソル
+            records: 同一種別の解析済みレコードのリスト
+        """
+        cursor.executemany(self.insert_sql, map(self.row, records))
+        if self.children:
+            keys = list(map(self.key, records))
+            for delete_sql, insert_sql, rows in self.children:
+                cursor.executemany(delete_sql, keys)
+                cursor.executemany(insert_sql, chain.from_iterable(map(rows, records)))
+    
+    def __repr__(self) -> str:
+        return f'<CompiledTable {self.record_type} → {self.name}>'
+
+
+class SchemaCompiler:
+    """レイアウト定義からテーブル定義と登録処理を生成するクラス"""
+    
+    @classmethod
+    def compile(cls, table: Table) -> CompiledTable:
+        """
+        テーブル定義をコンパイル
+        
+        Args:
+            table: 保存先テーブル
+        
+        Returns:
+            コンパイル済みテーブル定義
+        """
+        layout = LAYOUTS[table.record_type]
+        columns = []  # (列名, SQL型, 値の式)
+        repeats = []
+        for item in layout.fields:
+            if isinstance(item, Repeat):
+                repeats.append(item)
+            elif isinstance(item, Group) and item.name == 'race_key':
+                columns.append(('race_key', 'TEXT', ' + '.join(
+                    f"r['race_key'][{f.name!r}]" for f in item.fields)))
+            elif isinstance(item, Group):
+                columns += [(f'{item.name}_{f.name}', cls._sql_type(f),
+                             cls._value(f, f"r[{item.name!r}][{f.name!r}]"))
+                            for f in item.fields]
+            else:
+                columns.append((item.name, cls._sql_type(item),
+                                cls._value(item, f'r[{item.name!r}]')))
+        
+        names = [name for name, _, _ in columns]
+        missing = set(table.primary_key) - set(names)
+        if missing:
+            raise ValueError(f"{table.name}: 主キーの列がありません: {sorted(missing)}")
+        
+        ddl = [cls._create(table.name,
+                           [f'{name} {sql_type}' for name, sql_type, _ in columns]
+                           + ['updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP'],
+                           table.primary_key)]
+        insert_sql = _upsert_sql(table.name, tuple(names), table.primary_key, updated_at=True)
+        row = cls._function('row', columns)
+        key_columns = [c for c in columns if c[0] in table.primary_key]
+        key_columns.sort(key=lambda c: table.primary_key.index(c[0]))
+        key = cls._function('key', key_columns)
+        
+        children = []
+        for repeat in repeats:
+            child, child_ddl, child_insert, rows = cls._child(table, repeat, key_columns)
+            ddl.append(child_ddl)
+            where = ' AND '.join(f'{name} = ?' for name, _, _ in key_columns)
+            children.append((f'DELETE FROM {child} WHERE {where}', child_insert, rows))
+        
+        return CompiledTable(table.record_type, table.name,
+                             RecordParser.PARSERS[table.record_type],
+                             ddl, insert_sql, row, key, children)
+    
+    @classmethod
+    def _child(cls, table: Table, repeat: Repeat, key_columns: List[tuple]) -> tuple:
+        """繰り返し項目の子テーブル（親の主キー + 要素のキーで一意）"""
+        if isinstance(repeat.item, Field) or repeat.key is None or repeat.columnar:
+            raise ValueError(f"{table.name}: 子テーブルにできない繰り返し項目: {repeat.name}")
+        
+        name = f'{table.name}_{repeat.name}'
+        columns = [(f.name, cls._sql_type(f), cls._value(f, f'e[{f.name!r}]'))
+                   for f in repeat.item]
+        ddl = cls._create(name,
+                          [f'{n} {t}' for n, t, _ in key_columns + columns],
+                          tuple(n for n, _, _ in key_columns) + (repeat.key,))
+        insert_sql = cls._insert(name, [n for n, _, _ in key_columns + columns])
+        
+        # 親の主キーは要素ごとに同じ値のため先に求めておく
+        lines = ['def rows(r):']
+        lines += [f'    k{i} = {expr}' for i, (_, _, expr) in enumerate(key_columns)]
+        values = [f'k{i}' for i in range(len(key_columns))] + [expr for _, _, expr in columns]
+        lines.append(f"    return [({', '.join(values)},) for e in r[{repeat.name!r}]]")
+        return name, ddl, insert_sql, cls._exec('rows', lines)
+    
+    @staticmethod
+    def _sql_type(field: Field) -> str:
+        return 'INTEGER' if field.type == 'int' else 'TEXT'
+    
+    @staticmethod
+    def _value(field: Field, expr: str) -> str:
+        """登録値の式（年月日・時分秒は連結した文字列）"""
+        if field.type in ('ymd', 'hms'):
+            return f"{expr}['formatted']"
+        return expr
+    
+    @staticmethod
+    def _create(name: str, columns: List[str], primary_key: Tuple[str, ...]) -> str:
+        body = ',\n    '.join(columns + [f"PRIMARY KEY({', '.join(primary_key)})"])
+        return f'CREATE TABLE IF NOT EXISTS {name} (\n    {body}\n)'
+    
+    @staticmethod
+    def _insert(name: str, columns: List[str]) -> str:
+        """子テーブルの登録SQL（親の主キーの行は削除済み。同じ要素が重複した場合は後の要素）"""
+        return (f"INSERT OR REPLACE INTO {name} ({', '.join(columns)}) "
+                f"VALUES ({', '.join(['?'] * len(columns))})")
+    
+    @classmethod
+    def _function(cls, name: str, columns: List[tuple]) -> Callable[[Dict[str, Any]], tuple]:
+        """解析結果辞書から値のタプルを作る関数"""
+        values = ', '.join(expr for _, _, expr in columns)
+        return cls._exec(name, [f'def {name}(r):', f'    return ({values},)'])
+    
+    @staticmethod
+    def _exec(name: str, lines: List[str]) -> Callable:
+        namespace = {}
+        exec(compile('\n'.join(lines), f'<schema {name}>', 'exec'), namespace)
+        return namespace[name]
+
+
+# レコード種別 → コンパイル済みテーブル定義（インポート時に1回だけ生成）
+SCHEMAS: Dict[str, CompiledTable] = {
+    table.record_type: SchemaCompiler.compile(table)
+    for table in TABLES
+}
@@ -0,0 +1,73 @@
+"""
+asyncio 版（AsyncJVDataManager.stream）のテスト
+"""
+
+import asyncio
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+from jravan.aio import AsyncJVDataManager
+from jravan.replay import ReplayJVLinkClient
+from tests.conftest import make_record, race_key, run_with_timeout
+
+
+@pytest.fixture
+def replay(capture) -> str:
+    return capture('diff', {
+        'RAVM001.jvd': [make_record('RA', race_key=race_key(race=i % 12 + 1, day=i // 12 + 1))
+                        for i in range(24)],
+        'SEVM001.jvd': [make_record('SE', race_key=race_key(race=i + 1), umaban=1)
+                        for i in range(12)],
+    })
+
+
+def stream(tmp_path, replay: str, setup=None) -> tuple:
+    """stream(save=True) で受け取ったレコード（または送出した例外）と JV-Link のクライアント"""
+    client = ReplayJVLinkClient(replay)
+    
+    async def run():
+        async with AsyncJVDataManager(str(tmp_path / 'test.db'), str(tmp_path / 'jvdata'),
+                                      client=client, journal=False) as manager:
+            manager.manager.PARSE_CHUNK_SIZE = 5
+            if setup:
+                setup(manager)
+            records = []
+            try:
+                async for record in manager.stream('RACE', '20240101000000', save=True):
+                    records.append(record)
+            except RuntimeError as e:
+                return e, client
+            return records, client
+    
+    return run_with_timeout(lambda: asyncio.run(run()))
+
+
+def count(tmp_path, table: str) -> int:
+    with closing(sqlite3.connect(str(tmp_path / 'test.db'))) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_stream_save(tmp_path, replay):
+    """解析したレコードを順に返し、同じレコードをデータベースにも保存する"""
+    records, client = stream(tmp_path, replay)
+    assert [r['record_type'] for r in records] == ['RA'] * 24 + ['SE'] * 12
+    assert [r['race_key']['race_num'] for r in records[:3]] == ['01', '02', '03']
+    assert not client.is_open
+    assert count(tmp_path, 'races') == 24
+    assert count(tmp_path, 'results') == 12
+    assert count(tmp_path, 'record_hashes') == 36
+
+
+def test_save_failure(tmp_path, replay):
+    """保存の例外は stream から送出し、読み込みを止めて JV-Link を閉じる"""
+    def setup(manager):
+        def fail(*args, **kwargs):
+            raise RuntimeError("save failure")
+        manager.manager._save_batch_records = fail
+    
+    error, client = stream(tmp_path, replay, setup)
+    assert str(error) == "save failure"
+    assert not client.is_open
+    assert count(tmp_path, 'races') == 0
@@ -0,0 +1,111 @@
+"""
+NumPy構造化配列へのバッチ変換（batch.parse_batch・batch.parse_columns）のテスト
+"""
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from jravan import batch
+from jravan.batch import MISSING, decode_text, parse_batch
+from jravan.layouts import LAYOUTS, Field, Group, Repeat
+from jravan.parser import RecordParser
+from tests.conftest import plain, sample_record
+
+
+def tenths(time):
+    """parse のタイム（M:SS.f）を1/10秒単位にする"""
+    if time is None:
+        return MISSING
+    minutes, rest = time.split(':')
+    seconds, fraction = rest.split('.')
+    return int(minutes) * 600 + int(seconds) * 10 + int(fraction)
+
+
+def check(field: Field, column, expected) -> None:
+    """バッチ変換の値（str は decode_text 済み）が parse の値と対応する"""
+    if field.type == 'int':
+        assert column == (MISSING if expected is None else expected), field.name
+    elif field.type in ('ymd', 'hms'):
+        formatted = expected['formatted']
+        assert column == (int(formatted) if formatted.isdigit() else MISSING), field.name
+    elif field.type == 'time':
+        assert column == tenths(expected), field.name
+    else:
+        assert column == expected, field.name
+
+
+def text(value):
+    return value.decode('shift-jis', 'ignore').strip()
+
+
+def scalar(field: Field, value):
+    """バッチ変換の1項目の値（str はデコード）"""
+    return text(value) if field.type == 'str' else int(value)
+
+
+def check_repeat(repeat: Repeat, row, expected) -> None:
+    """繰り返し項目（バッチ変換は空き要素を含む固定長）"""
+    if isinstance(repeat.item, Field):
+        field = repeat.item
+        values = [None if v == MISSING else scalar(field, v) for v in row]
+        kept = [v for v in values
+                if v and (v != '0' * field.length if field.type == 'str' else v > 0)]
+        assert kept == expected, repeat.name
+        return
+    
+    if repeat.columnar:
+        # parse は項目ごとの配列
+        expected = [dict(zip(expected, values)) for values in zip(*plain(expected).values())]
+    key = next(f for f in repeat.item if f.name == repeat.key)
+    kept = [element for element in row
+            if (element[key.name] > 0 if key.type == 'int'
+                else text(element[key.name]) not in ('', '0' * key.length))]
+    assert len(kept) == len(expected), repeat.name
+    for element, parsed in zip(kept, expected):
+        for f in repeat.item:
+            value = scalar(f, element[f.name])
+            if repeat.columnar:
+                assert value == parsed[f.name], f.name
+            else:
+                check(f, value, parsed[f.name])
+
+
+@pytest.mark.parametrize('record_type', sorted(LAYOUTS))
+def test_parse_batch(record_type):
+    """各列の値がレコードごとの parse の値と対応する"""
+    records = [sample_record(record_type, seed) for seed in range(5)]
+    arr = parse_batch(record_type, records)
+    assert arr.dtype == batch.batch_dtype(record_type)
+    assert len(arr) == len(records)
+    
+    for row, data in zip(arr, records):
+        expected = RecordParser.parse(data)
+        for item in LAYOUTS[record_type].fields:
+            if isinstance(item, Group):
+                for f in item.fields:
+                    check(f, scalar(f, row[item.name][f.name]), expected[item.name][f.name])
+            elif isinstance(item, Repeat):
+                check_repeat(item, row[item.name], expected[item.name])
+            else:
+                check(item, scalar(item, row[item.name]), expected[item.name])
+
+
+def test_decode_text():
+    """文字列の列は固定長バイト列のまま保持し、decode_text で必要な列だけデコードする"""
+    records = [sample_record('SE', seed) for seed in range(5)]
+    arr = parse_batch('SE', records)
+    assert arr['bamei'].dtype == np.dtype('S36')
+    assert decode_text(arr['bamei']).tolist() == [RecordParser.parse(r)['bamei'] for r in records]
+
+
+def test_lengths():
+    """長さの異なるレコードは不足分を空白とみなし、超過分は無視する"""
+    record = sample_record('WF', 1)
+    short = record[:27]
+    arr = parse_batch('WF', [record, short, record + b' ' * 50])
+    assert arr[2] == arr[0]
+    assert arr[1]['race_key'] == arr[0]['race_key']
+    assert (arr[1]['weights']['umaban'] == MISSING).all()
+    assert len(parse_batch('WF', [])) == 0
+
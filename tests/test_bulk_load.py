@@ -0,0 +1,65 @@
+"""
+一括取り込みモード（download_setup_data(bulk=True)）のテスト
+
+チャンクをまたいで1トランザクションにまとめ、保存に失敗したバッチだけを取り消すことを確認する。
+"""
+
+import pytest
+
+from tests.conftest import make_record, race_key, run_with_timeout
+
+
+@pytest.fixture
+def setup(capture) -> str:
+    # 1ファイル20件 × 3ファイル
+    return capture('setup', {
+        f'RAVM{n:03d}.jvd': [make_record('RA', race_key=race_key(race=i + 1 if i < 12 else i - 11,
+                                                                 day=n * 2 + i // 12))
+                             for i in range(20)]
+        for n in range(1, 4)
+    })
+
+
+def count_commits(manager) -> list:
+    commits = []
+    manager.conn.set_trace_callback(
+        lambda sql: commits.append(sql) if sql.strip().upper() == 'COMMIT' else None)
+    return commits
+
+
+@pytest.mark.parametrize('bulk', [False, True])
+def test_transactions(make_manager, setup, bulk):
+    """一括取り込みではチャンクごとに確定しない"""
+    manager = make_manager(setup)
+    manager.PARSE_CHUNK_SIZE = 5
+    manager.BULK_WRITE_BATCH_SECONDS = 60.0
+    commits = count_commits(manager)
+    
+    assert run_with_timeout(lambda: manager.download_setup_data('RACE', bulk=bulk)) is True
+    assert manager.conn.execute("SELECT COUNT(*) FROM races").fetchone()[0] == 60
+    assert len(manager.get_completed_files()) == 3
+    # 12チャンク（通常はチャンクごとに確定、一括取り込みは終端の1回と処理履歴・インデックス作成）
+    if bulk:
+        assert len(commits) < 12
+    else:
+        assert len(commits) >= 12
+
+
+def test_batch_failure(make_manager, setup):
+    """保存に失敗したバッチだけを取り消し、同じトランザクションの前のチャンクは残す"""
+    manager = make_manager(setup)
+    manager.PARSE_CHUNK_SIZE = 6
+    manager.BULK_WRITE_BATCH_SECONDS = 60.0
+    bad = race_key(race=8, day=5)  # RAVM002.jvd の最後のチャンク（チェックポイントと同じ）
+    race_rows = manager._row_builders['RA']
+    
+    def rows(record):
+        if manager.build_race_key(record['race_key']) == bad:
+            raise ValueError("injected failure")
+        return race_rows(record)
+    manager._row_builders['RA'] = rows
+    
+    assert run_with_timeout(lambda: manager.download_setup_data('RACE', bulk=True)) is True
+    assert manager.conn.execute("SELECT COUNT(*) FROM races").fetchone()[0] == 59
+    # 保存できなかったレコードのファイルはチェックポイントを記録しない
+    assert manager.get_completed_files() == {'RAVM001.jvd', 'RAVM003.jvd'}
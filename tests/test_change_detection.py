@@ -0,0 +1,124 @@
+"""
+変更検出（前回保存したレコードと同じ RA/SE レコードの省略）のテスト
+"""
+
+import pytest
+
+from jravan.manager import JVDataManager
+from tests.conftest import make_record, race_key, run_with_timeout
+
+
+def races(name: str = 'レース', count: int = 12) -> list:
+    return [make_record('RA', race_key=race_key(race=i + 1), race_info__race_name=name)
+            for i in range(count)]
+
+
+def results(count: int = 12) -> list:
+    return [make_record('SE', race_key=race_key(race=i + 1), umaban=1) for i in range(count)]
+
+
+def horses(count: int = 3) -> list:
+    return [make_record('UM', ketto_num=f'20200{i:05d}') for i in range(count)]
+
+
+@pytest.fixture
+def run(make_manager, capture):
+    """
+    ファイル（レコードのリスト）ごとに取り込み（mode: 'update' / 'setup' / 'load'）、
+    (manager, 処理履歴の件数) を返す。ファイル名は実行ごとに変える（チェックポイントで
+    読み飛ばされないように）
+    """
+    runs = 0
+    
+    def run(files: list, mode: str = 'update') -> tuple:
+        nonlocal runs
+        runs += 1
+        path = capture(f'run{runs}', {f'{records[0][:2].decode()}VM{runs:03d}{n}.jvd': records
+                                      for n, records in enumerate(files)})
+        manager = make_manager(path)
+        if mode == 'update':
+            ok = run_with_timeout(lambda: manager.update_data('20240101'))
+        elif mode == 'setup':
+            ok = run_with_timeout(lambda: manager.download_setup_data('RACE'))
+        else:
+            ok = run_with_timeout(lambda: manager.load_files(path))
+        assert ok is True
+        history = manager.conn.execute(
+            "SELECT processed_count, new_count, changed_count, skipped_count "
+            "FROM process_history ORDER BY id DESC LIMIT 1").fetchone()
+        return manager, tuple(history)
+    return run
+
+
+def race_names(manager: JVDataManager) -> list:
+    return [row[0] for row in manager.conn.execute("SELECT race_name FROM races ORDER BY race_key")]
+
+
+def test_skip_unchanged(run):
+    """同じ RA/SE レコードは解析・保存を省く（他の種別は毎回保存する）"""
+    files = [races(), results(), horses()]
+    _, history = run(files)
+    assert history == (27, 24, 0, 0)
+    
+    manager, history = run(files)
+    assert history == (3, 0, 0, 24)
+    assert manager.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 12
+
+
+def test_changed(run):
+    """内容が変わったレコードだけを保存する（前回と同じ内容に戻した場合も保存する）"""
+    run([races('A')])
+    changed = races('A')
+    changed[0] = races('B')[0]
+    manager, history = run([changed])
+    assert history == (1, 0, 1, 11)
+    assert race_names(manager) == ['B'] + ['A'] * 11
+    
+    manager, history = run([races('A')])
+    assert history == (1, 0, 1, 11)
+    assert race_names(manager) == ['A'] * 12
+
+
+def test_changed_within_run(run):
+    """同じ更新内で A → B → A と変わった場合は最後のレコードが残る"""
+    run([races('A')])
+    a, b = races('A')[0], races('B')[0]
+    manager, history = run([[b], [a]])
+    assert history == (2, 0, 2, 0)
+    assert race_names(manager)[0] == 'A'
+
+
+def test_setup_records_hashes(run):
+    """セットアップで保存したレコードも次回の更新で省く"""
+    run([races()], mode='setup')
+    _, history = run([races()])
+    assert history == (0, 0, 0, 12)
+
+
+def test_load_files_records_hashes(run):
+    """ファイルの直接読み込みは全件を保存し、ハッシュを記録する（次回の更新では同じレコードを省く）"""
+    run([races('A')])
+    manager, _ = run([races('A'), results()], mode='load')
+    assert race_names(manager) == ['A'] * 12
+    assert manager.conn.execute("SELECT COUNT(*) FROM record_hashes").fetchone()[0] == 24
+    
+    manager, history = run([races('A'), results()])
+    assert history == (0, 0, 0, 24)
+    
+    run([races('B')], mode='load')
+    manager, history = run([races('B')])
+    assert history == (0, 0, 0, 12)
+    assert race_names(manager) == ['B'] * 12
+
+
+def test_unsaved_record(run, monkeypatch):
+    """保存できなかったレコードのハッシュは記録しない（次回の更新で保存し直す）"""
+    run([races('A')])
+    monkeypatch.setattr(JVDataManager, '_race_rows', lambda self, record: 1 / 0)
+    manager, _ = run([races('B')])
+    assert race_names(manager) == ['A'] * 12
+    
+    monkeypatch.undo()
+    manager, history = run([races('B')])
+    assert history == (12, 0, 12, 0)
+    assert race_names(manager) == ['B'] * 12
@@ -0,0 +1,84 @@
+"""
+ファイル単位のチェックポイントと再開のテスト
+"""
+
+import pytest
+
+from tests.conftest import make_record, race_key, run_with_timeout
+
+
+FILES = ['RAVM001.jvd', 'RAVM002.jvd', 'RAVM003.jvd']
+
+
+@pytest.fixture
+def setup(capture) -> str:
+    # 1ファイル20件 × 3ファイル（RAVM00n.jvd は 2n 日・2n+1 日のレース）
+    return capture('setup', {
+        filename: [make_record('RA', race_key=race_key(race=i % 12 + 1, day=n * 2 + i // 12))
+                   for i in range(20)]
+        for n, filename in enumerate(FILES, 1)
+    })
+
+
+def last_history(manager) -> tuple:
+    return tuple(manager.conn.execute(
+        "SELECT status, processed_count, error_count FROM process_history "
+        "ORDER BY id DESC LIMIT 1").fetchone())
+
+
+def test_checkpoints(make_manager, setup):
+    """ファイルごとにレコード数・ハッシュ付きのチェックポイントを記録する"""
+    manager = make_manager(setup)
+    manager.PARSE_CHUNK_SIZE = 6
+    assert run_with_timeout(lambda: manager.download_setup_data('RACE')) is True
+    
+    rows = manager.conn.execute(
+        "SELECT filename, record_count, hash FROM file_checkpoints ORDER BY filename").fetchall()
+    assert [(row[0], row[1]) for row in rows] == [(filename, 20) for filename in FILES]
+    assert len({row[2] for row in rows}) == 3
+
+
+@pytest.mark.parametrize('resume', [True, False])
+def test_resume(make_manager, setup, monkeypatch, resume):
+    """中断後の再実行はチェックポイント済みのファイルを読み飛ばす（resume=False の場合は読み直す）"""
+    manager = make_manager(setup)
+    manager.PARSE_CHUNK_SIZE = 6
+    save_checkpoint = manager.save_checkpoint
+    
+    def crash(cursor, file_checkpoint):
+        if file_checkpoint[0] == 'RAVM002.jvd':
+            raise RuntimeError("crash")
+        save_checkpoint(cursor, file_checkpoint)
+    monkeypatch.setattr(manager, 'save_checkpoint', crash)
+    
+    assert run_with_timeout(lambda: manager.download_setup_data('RACE')) is False
+    assert manager.get_completed_files() == {'RAVM001.jvd'}
+    
+    manager = make_manager(setup, resume=resume)
+    assert run_with_timeout(lambda: manager.download_setup_data('RACE')) is True
+    assert last_history(manager) == ('SUCCESS', 40 if resume else 60, 0)
+    assert manager.get_completed_files() == set(FILES)
+    assert manager.conn.execute("SELECT COUNT(*) FROM races").fetchone()[0] == 60
+
+
+def test_unsaved_record(make_manager, setup):
+    """保存できなかったレコードがあるファイルはチェックポイントを記録せず、再実行で読み直す"""
+    manager = make_manager(setup)
+    manager.PARSE_CHUNK_SIZE = 5  # チェックポイントはファイルの最後のレコードとは別のチャンク
+    bad = race_key(race=1, day=4)  # RAVM002.jvd の最初のチャンク
+    race_rows = manager._row_builders['RA']
+    
+    def rows(record):
+        if manager.build_race_key(record['race_key']) == bad:
+            raise ValueError("injected failure")
+        return race_rows(record)
+    manager._row_builders['RA'] = rows
+    
+    assert run_with_timeout(lambda: manager.download_setup_data('RACE')) is True
+    assert last_history(manager) == ('SUCCESS', 60, 1)
+    assert manager.get_completed_files() == {'RAVM001.jvd', 'RAVM003.jvd'}
+    
+    manager = make_manager(setup)
+    assert run_with_timeout(lambda: manager.download_setup_data('RACE')) is True
+    assert last_history(manager) == ('SUCCESS', 20, 0)
+    assert manager.conn.execute("SELECT COUNT(*) FROM races").fetchone()[0] == 60
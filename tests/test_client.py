@@ -0,0 +1,61 @@
+"""
+JVLinkClient の読み込み（gets / gets_view）のテスト
+
+JV-Link（COM）の代わりに、JVGets の戻り値を返すオブジェクトを使う。
+"""
+
+import pytest
+
+from jravan.client import JVLinkClient
+from tests.conftest import make_record, race_key
+
+
+RECORDS = [make_record('RA', race_key=race_key(race=i + 1)) for i in range(3)]
+
+
+class FakeJVLink:
+    """JVGets の戻り値（バッファ全体のバイト配列）を順に返す"""
+    
+    def __init__(self, records: list):
+        self.records = list(records)
+    
+    def JVGets(self, buff, size, filename):
+        if not self.records:
+            return (0, None, '')
+        data = self.records.pop(0)
+        return (len(data), data + b'\0' * 100, 'RAVM001.jvd')
+    
+    def JVClose(self):
+        return 0
+
+
+@pytest.fixture
+def client() -> JVLinkClient:
+    client = JVLinkClient()
+    client.jvlink = FakeJVLink(RECORDS)
+    client.is_open = True
+    return client
+
+
+def test_gets(client):
+    """gets はレコードごとに独立した bytes（戻り値コード分）を返す"""
+    results = [client.gets() for _ in range(4)]
+    assert [ret for ret, _, _ in results] == [len(r) for r in RECORDS] + [0]
+    assert [data for _, data, _ in results[:3]] == RECORDS
+    assert all(type(data) is bytes for _, data, _ in results)
+
+
+def test_gets_view(client):
+    """gets_view は同じバッファを返し、次の呼び出しで内容が上書きされる"""
+    ret, view, filename = client.gets_view()
+    first = bytes(view[:ret])
+    assert first == RECORDS[0]
+    assert filename == 'RAVM001.jvd'
+    
+    ret, second, _ = client.gets_view()
+    assert second is view
+    assert bytes(view[:ret]) == RECORDS[1]
+    assert bytes(view[:ret]) != first
+    
+    client.gets_view()
+    assert client.gets_view()[0] == 0
@@ -0,0 +1,52 @@
+"""
+データベース接続（書き込み用の1本の接続・読み込み用の接続プール）のテスト
+"""
+
+import sqlite3
+from contextlib import ExitStack
+
+import pytest
+
+
+def test_read_only(make_manager):
+    """読み込み用の接続では読めるが書き込めない"""
+    manager = make_manager()
+    with manager.read_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM races").fetchone()[0] == 0
+        with pytest.raises(sqlite3.OperationalError, match='readonly'):
+            conn.execute("DELETE FROM races")
+
+
+def test_write_connection(make_manager):
+    """書き込み用の接続は close() まで同じ接続を使い回す"""
+    manager = make_manager()
+    with manager.get_db_connection() as first:
+        pass
+    with manager.get_db_connection() as second:
+        assert second is first
+    with manager.read_connection() as conn:
+        assert conn is not first
+
+
+def test_pool(make_manager):
+    """返した接続は再利用し、プールには _connection_pool_size 本まで残す（超えた分は閉じる）"""
+    manager = make_manager()
+    size = manager._connection_pool_size
+    with ExitStack() as stack:
+        borrowed = [stack.enter_context(manager.read_connection()) for _ in range(size + 2)]
+        assert len({id(conn) for conn in borrowed}) == size + 2
+        assert manager._read_pool == []
+    
+    assert len(manager._read_pool) == size
+    pooled = set(map(id, manager._read_pool))
+    closed = [conn for conn in borrowed if id(conn) not in pooled]
+    assert len(closed) == 2
+    for conn in closed:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    
+    with manager.read_connection() as conn:
+        assert id(conn) in pooled
+    
+    manager.close()
+    assert manager._read_pool == []
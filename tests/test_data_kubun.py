@@ -0,0 +1,109 @@
+"""
+データ区分による上書き（優先度）と削除レコードのテスト
+"""
+
+import pytest
+
+from jravan.manager import JVDataManager
+from jravan.parser import RecordParser
+from tests.conftest import make_record, race_key, run_with_timeout
+
+
+KEY = race_key(race=11)
+
+
+def race(data_kubun: str, name: str) -> bytes:
+    return make_record('RA', data_kubun, race_key=KEY, race_info__race_name=name)
+
+
+def result(data_kubun: str, umaban: int, bamei: str = 'ホース') -> bytes:
+    return make_record('SE', data_kubun, race_key=KEY, umaban=umaban, bamei=bamei)
+
+
+@pytest.fixture
+def update(make_manager, capture):
+    """files（ファイル名 → レコード）を1回の更新として取り込み、managerを返す"""
+    runs = 0
+    
+    def run(files: dict) -> JVDataManager:
+        nonlocal runs
+        runs += 1
+        manager = make_manager(capture(f'diff{runs}', files))
+        assert run_with_timeout(lambda: manager.update_data('20240101')) is True
+        return manager
+    return run
+
+
+def races(manager) -> list:
+    return [tuple(row) for row in manager.conn.execute(
+        "SELECT race_name, data_kubun FROM races WHERE race_key = ?", (KEY,))]
+
+
+def results(manager) -> list:
+    return [tuple(row) for row in manager.conn.execute(
+        "SELECT umaban, bamei, data_kubun FROM results WHERE race_key = ? ORDER BY umaban",
+        (KEY,))]
+
+
+def test_priority(update):
+    """優先度が既存の行以上のレコードだけで上書きする（同じ更新内・更新をまたぐ場合）"""
+    manager = update({'RAVM001.jvd': [race('1', '出走馬名表'), race('7', '成績'), race('5', '速報')]})
+    assert races(manager) == [('成績', '7')]
+    
+    manager = update({'RAVM002.jvd': [race('6', '速報コーナー')]})
+    assert races(manager) == [('成績', '7')]
+    
+    manager = update({'RAVM003.jvd': [race('7', '成績修正')]})
+    assert races(manager) == [('成績修正', '7')]
+    
+    # レース中止は出走前の区分を上書きし、速報成績では上書きしない
+    manager = update({'RAVM004.jvd': [race('2', '出馬表')]})
+    assert races(manager) == [('成績修正', '7')]
+    manager = update({'RAVM005.jvd': [race('9', '中止')]})
+    assert races(manager) == [('中止', '9')]
+    manager = update({'RAVM006.jvd': [race('3', '速報3着')]})
+    assert races(manager) == [('中止', '9')]
+
+
+def test_priority_results(update):
+    """レース結果も馬番ごとに優先度で上書きする"""
+    manager = update({'SEVM001.jvd': [result('7', 1, 'セイセキ'), result('1', 2, 'デバ')]})
+    manager = update({'SEVM002.jvd': [result('5', 1, 'ソクホウ'), result('5', 2, 'ソクホウ')]})
+    assert results(manager) == [(1, 'セイセキ', '7'), (2, 'ソクホウ', '5')]
+
+
+def test_delete(update):
+    """データ区分 0（削除）のレコードは該当する行を削除する（レース結果は馬番単位）"""
+    update({'RAVM001.jvd': [race('7', '成績')],
+            'SEVM001.jvd': [result('7', 1), result('7', 2)]})
+    manager = update({'RAVM002.jvd': [race('0', '')],
+                      'SEVM002.jvd': [result('0', 1)]})
+    assert races(manager) == []
+    assert results(manager) == [(2, 'ホース', '7')]
+
+
+@pytest.mark.parametrize('data_kubun', ['2', '4', '6', '9', 'A', 'B'])
+def test_not_deleted(update, data_kubun):
+    """0 以外のデータ区分（出馬表・速報成績・中止・地方・海外）は登録する"""
+    manager = update({'RAVM001.jvd': [race(data_kubun, 'レース')],
+                      'SEVM001.jvd': [result(data_kubun, 1)]})
+    assert races(manager) == [('レース', data_kubun)]
+    assert results(manager) == [(1, 'ホース', data_kubun)]
+
+
+def test_delete_order(update):
+    """同じ更新内の登録と削除はレコードの順に適用する"""
+    manager = update({'RAVM001.jvd': [race('7', '成績'), race('0', ''), race('1', '再登録')],
+                      'SEVM001.jvd': [result('1', 1), result('0', 1), result('1', 2), result('0', 2)]})
+    assert races(manager) == [('再登録', '1')]
+    assert results(manager) == []
+
+
+def test_delete_in_batch(make_manager):
+    """1つのバッチ内で同じキーの登録・削除・登録が続いても最後の状態の行になる"""
+    manager = make_manager()
+    records = [race('7', '成績'), result('7', 1), race('0', ''), result('0', 1),
+               race('1', '再登録'), result('1', 1, 'サイトウロク'), result('7', 2), result('0', 2)]
+    assert manager._save_batch_records([RecordParser.parse(data) for data in records]) == 0
+    assert races(manager) == [('再登録', '1')]
+    assert results(manager) == [(1, 'サイトウロク', '1')]
@@ -0,0 +1,120 @@
+"""
+保存済みのJV-Dataファイルの直接読み込み（files.py・JVDataManager.load_files）のテスト
+"""
+
+import zlib
+
+import pytest
+
+from jravan.files import open_mmap, parse_file, record_spans, records, scan_file
+from jravan.parser import parse_chunk
+from tests.conftest import make_record, race_key, run_with_timeout
+
+
+def spans(data: bytes, start: int = 0, stop=None) -> list:
+    buf = memoryview(data)
+    return [(begin, end) for begin, end in record_spans(buf, start, stop)]
+
+
+def lengths(items: list) -> list:
+    return [len(item) for item in items]
+
+
+@pytest.fixture
+def mixed() -> list:
+    # 仕様書の長さ・実データの長さ（仕様書より長い）・長さ未定義の種別・未知の種別
+    return [
+        make_record('RA', race_key=race_key(1)),
+        make_record('RA', race_key=race_key(2), length=1272),
+        make_record('SE', race_key=race_key(1), umaban=1),
+        make_record('YS', length=382),
+        b'ZZ' + b' ' * 40 + b'\r\n',
+        make_record('UM', length=1609),
+    ]
+
+
+def test_record_spans(mixed):
+    """レコード長（仕様書の長さと異なる場合はCRLF）で区切る"""
+    data = b''.join(mixed)
+    result = spans(data)
+    assert [end - begin for begin, end in result] == lengths(mixed)
+    assert [data[begin:end] for begin, end in result] == mixed
+
+
+def test_record_spans_range(mixed):
+    """開始・終了位置の範囲内だけを区切る。最後のレコードはCRLFがなくてもよい"""
+    data = b''.join(mixed)
+    first, second = len(mixed[0]), len(mixed[0]) + len(mixed[1])
+    assert spans(data, first, second) == [(first, second)]
+    
+    truncated = data[:-2]
+    assert spans(truncated)[-1] == (len(data) - len(mixed[-1]), len(truncated))
+
+
+def test_records(tmp_path, mixed):
+    """mmap したファイルのレコードを memoryview のスライスとして返す"""
+    path = tmp_path / 'RAVM001.jvd'
+    path.write_bytes(b''.join(mixed))
+    with open_mmap(str(path)) as buf:
+        views = list(records(buf))
+        assert all(isinstance(view, memoryview) for view in views)
+        assert [bytes(view) for view in views] == mixed
+        del views
+
+
+def test_scan_file(tmp_path, mixed):
+    """chunk_size 件ごとの範囲・レコード数・ハッシュ。範囲ごとの解析は全体の解析と同じ"""
+    path = tmp_path / 'RAVM001.jvd'
+    path.write_bytes(b''.join(mixed))
+    ranges, count, digest = scan_file(str(path), 4)
+    assert count == len(mixed)
+    assert ranges == [(0, sum(lengths(mixed[:4]))), (sum(lengths(mixed[:4])), path.stat().st_size)]
+    assert digest
+    
+    parsed = [parse_file(str(path), start, stop) for start, stop in ranges]
+    expected, errors, _ = parse_chunk(mixed)
+    assert sum((chunk for chunk, _, _ in parsed), []) == expected
+    assert sum(errors for _, errors, _ in parsed) == errors
+
+
+def test_scan_file_not_records(tmp_path):
+    """レコードを連結したファイルでない場合（圧縮されたファイルなど）は読み込まない"""
+    path = tmp_path / 'RAVM001.jvd'
+    path.write_bytes(zlib.compress(make_record('RA')))
+    assert scan_file(str(path), 4) == (None, 0, '')
+    
+    empty = tmp_path / 'RAVM002.jvd'
+    empty.write_bytes(b'')
+    assert scan_file(str(empty), 4)[:2] == ([(0, 0)], 0)
+
+
+def test_load_files(make_manager, capture):
+    """ファイルの直接読み込みは JV-Link 経由の取り込みと同じ行・チェックポイントになる"""
+    files = {
+        'RAVM001.jvd': [make_record('RA', race_key=race_key(i + 1), length=1272) for i in range(12)],
+        'SEVM001.jvd': [make_record('SE', race_key=race_key(i % 12 + 1), umaban=i // 12 + 1)
+                        for i in range(36)],
+    }
+    diff = capture('diff', files)
+    
+    def snapshot(manager):
+        # 登録日時・完了日時は比較しない
+        tables = {}
+        for table in ('races', 'file_checkpoints'):
+            cursor = manager.conn.execute(f"SELECT * FROM {table}")
+            columns = [d[0] for d in cursor.description]
+            tables[table] = sorted(tuple(v for c, v in zip(columns, row) if not c.endswith('_at'))
+                                   for row in cursor)
+        return tables
+    
+    manager = make_manager(diff)
+    manager.PARSE_CHUNK_SIZE = 5
+    assert run_with_timeout(lambda: manager.download_setup_data('RACE')) is True
+    replayed = snapshot(manager)
+    
+    manager.conn.execute("DELETE FROM races")
+    manager.conn.execute("DELETE FROM file_checkpoints")
+    manager.conn.commit()
+    assert run_with_timeout(lambda: manager.load_files(diff)) is True
+    assert snapshot(manager) == replayed
+    assert manager.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 36
@@ -0,0 +1,79 @@
+"""
+名称のインターン表（parser.InternTable）と辞書コード（parse_batch(dictionary=True)）のテスト
+"""
+
+import pytest
+
+from jravan import parser
+from jravan.parser import InternTable, RecordParser
+from tests.conftest import make_record, race_key, run_with_timeout, sample_record
+
+
+def test_intern():
+    """同じバイト列は同じ文字列オブジェクト。上限に達した後はデコードのみ"""
+    table = InternTable(max_size=2)
+    raw = 'ディープインパクト'.encode('shift-jis').ljust(36)
+    assert table[raw] == 'ディープインパクト'
+    assert table[bytes(raw)] is table[raw]
+    
+    table[b'B' * 8]
+    table[b'C' * 8]
+    assert len(table) == 2
+    assert b'C' * 8 not in table
+
+
+def test_parse_with_table():
+    """指定した表に名称を登録し、既定の表は使わない"""
+    data = make_record('SE', umaban=1, bamei='インターンテスト')
+    table = InternTable()
+    record = RecordParser.parse(data, table=table)
+    assert 'インターンテスト' in table.values()
+    assert 'インターンテスト' not in parser._intern.values()
+    assert RecordParser.parse(data, table=table)['bamei'] is record['bamei']
+    assert record == RecordParser.parse(data)
+
+
+def test_codes():
+    """辞書コードは表ごとの登録順の連番"""
+    table = InternTable()
+    assert [table.code(b'A' * 8), table.code(b'B' * 8), table.code(b'A' * 8)] == [0, 1, 0]
+    assert table.names == ['A' * 8, 'B' * 8]
+
+
+def test_dictionary_batches():
+    """同じ表を使う限り、バッチ・列をまたいで同じ値は同じコード"""
+    np = pytest.importorskip('numpy')
+    records = [sample_record('SE', seed) for seed in range(20)]
+    table = InternTable()
+    first, names = RecordParser.parse_batch('SE', records[:10], dictionary=True, table=table)
+    second, shared = RecordParser.parse_batch('SE', records[10:], dictionary=True, table=table)
+    assert shared is names is table.names
+    assert first['bamei'].dtype == np.int32
+    
+    values = np.array(names, dtype=object)
+    arr = np.concatenate([first, second])
+    for row, data in zip(arr, records):
+        record = RecordParser.parse(data)
+        assert values[row['bamei']] == record['bamei']
+        assert values[row['jockey']['name']] == record['jockey']['name']
+        assert values[row['trainer']['name']] == record['trainer']['name']
+    
+    # 値が同じならバッチ・列が違っても同じコード
+    codes = {}
+    for row, data in zip(arr, records):
+        record = RecordParser.parse(data)
+        for code, value in ((row['bamei'], record['bamei']),
+                            (row['owner']['name'], record['owner']['name'])):
+            assert codes.setdefault(value, code) == code
+    assert len(set(codes.values())) == len(codes)
+
+
+def test_run_scoped(make_manager, capture):
+    """取り込みは実行ごとの表を使い、既定の表は消去しない"""
+    parser._intern[b'X' * 8] = 'sentinel'
+    manager = make_manager(capture('diff', {
+        'SEVM001.jvd': [make_record('SE', race_key=race_key(), umaban=1, bamei='テスト')]}))
+    assert run_with_timeout(lambda: manager.update_data('20240101')) is True
+    assert manager.conn.execute("SELECT bamei FROM results").fetchone()[0] == 'テスト'
+    assert parser._intern[b'X' * 8] == 'sentinel'
+    assert 'テスト' not in parser._intern.values()
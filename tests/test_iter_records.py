@@ -0,0 +1,61 @@
+"""
+レコードを1件ずつ返す取得（JVDataManager.iter_records）のテスト
+"""
+
+import pytest
+
+from tests.conftest import make_record, race_key
+
+
+@pytest.fixture
+def manager(make_manager, capture):
+    """JV-Link の cancel / close の呼び出しを calls に記録する manager"""
+    manager = make_manager(capture('setup', {
+        'RAVM001.jvd': [make_record('RA', race_key=race_key(race=i + 1)) for i in range(12)],
+    }))
+    manager.calls = []
+    
+    def record(name: str):
+        method = getattr(manager.jvlink, name)
+        
+        def call():
+            manager.calls.append(name)
+            return method()
+        setattr(manager.jvlink, name, call)
+    
+    record('cancel')
+    record('close')
+    return manager
+
+
+def test_iter_records(manager):
+    """全件を解析して返し、読み終えたら JVClose のみ行う"""
+    records = list(manager.iter_records('RACE', '99999999999999', option=3))
+    assert [r['race_key']['race_num'] for r in records] == [f'{i + 1:02d}' for i in range(12)]
+    assert manager.calls == ['close']
+    assert not manager.jvlink.is_open
+
+
+def test_raw(manager):
+    """raw=True の場合は生レコード（次のレコードで上書きされる memoryview）を返す"""
+    records = [bytes(data) for data in manager.iter_records('RACE', raw=True)]
+    assert records == [make_record('RA', race_key=race_key(race=i + 1)) for i in range(12)]
+
+
+def test_closed_early(manager):
+    """途中で閉じたジェネレータは JVCancel してから JVClose する"""
+    records = manager.iter_records('RACE', '99999999999999', option=3)
+    assert next(records)['race_key']['race_num'] == '01'
+    assert manager.jvlink.is_open
+    records.close()
+    assert manager.calls[0] == 'cancel'
+    assert manager.calls[-1] == 'close'
+    assert not manager.jvlink.is_open
+
+
+def test_break(manager):
+    """for 文を抜けた場合も同じ"""
+    for record in manager.iter_records('RACE'):
+        break
+    assert manager.calls[0] == 'cancel'
+    assert manager.calls[-1] == 'close'
@@ -0,0 +1,97 @@
+"""
+ジャーナル（journal.Journal）と再解析（JVDataManager.reparse）のテスト
+"""
+
+import os
+
+import pytest
+
+from jravan.journal import Journal
+from tests.conftest import make_record, race_key, run_with_timeout
+
+
+def races(day: int, count: int = 12) -> list:
+    return [make_record('RA', race_key=race_key(race=i + 1, day=day),
+                        race_info__race_name=f'R{day}-{i + 1}') for i in range(count)]
+
+
+def results(day: int, count: int = 12) -> list:
+    return [make_record('SE', race_key=race_key(race=i + 1, day=day), umaban=1, bamei=f'H{i}')
+            for i in range(count)]
+
+
+@pytest.mark.parametrize('compression', ['zlib', 'lzma'])
+def test_round_trip(tmp_path, compression):
+    """追記したレコードを追記順・ファイル名付きで読み出せる（開き直した後の追記を含む）"""
+    path = str(tmp_path / 'journal')
+    with Journal(path, compression=compression) as journal:
+        journal.append(races(6), 'RAVM001.jvd')
+        journal.append(results(6), 'SEVM001.jvd')
+    with Journal(path, compression=compression) as journal:
+        journal.append(races(7), 'RAVM002.jvd')
+        
+        expected = ([(r, 'RAVM001.jvd') for r in races(6)]
+                    + [(r, 'SEVM001.jvd') for r in results(6)]
+                    + [(r, 'RAVM002.jvd') for r in races(7)])
+        assert list(journal.records()) == expected
+        assert [r for r, _ in journal.records(['SE'])] == results(6)
+        assert [r for r, _ in journal.records(filename='RAVM002.jvd')] == races(7)
+        # レースキーの範囲（前方一致）
+        assert [r for r, _ in journal.records(race_key_from='20240107')] == races(7)
+        assert [r for r, _ in journal.records(['RA'], race_key_to='20240106')] == races(6)
+
+
+def test_segments(tmp_path):
+    """SEGMENT_SIZE を超えると次のセグメントに追記し、続けて読み出せる"""
+    path = str(tmp_path / 'journal')
+    with Journal(path, segment_size=1024) as journal:
+        for day in range(1, 9):
+            journal.append(races(day), f'RAVM00{day}.jvd')
+        assert len({segment for segment, *_ in journal.blocks()}) > 1
+        assert [r for r, _ in journal.records()] == sum((races(day) for day in range(1, 9)), [])
+
+
+def test_interrupted_append(tmp_path):
+    """索引の記録前に中断したブロックの残骸（次のセグメントを含む）は読み出し位置に影響しない"""
+    path = str(tmp_path / 'journal')
+    with Journal(path, segment_size=1024) as journal:
+        for day in range(1, 4):
+            journal.append(races(day), f'RAVM00{day}.jvd')
+        segment, *_ = journal.blocks()[-1]
+    # 最後のセグメントの末尾と、セグメントを切り替えた直後の次のセグメントに残骸
+    with open(os.path.join(path, f'{segment:06d}.seg'), 'ab') as f:
+        f.write(b'JVJz' + b'\0' * 100)
+    with open(os.path.join(path, f'{segment + 1:06d}.seg'), 'wb') as f:
+        f.write(b'JVJz' + b'\0' * 100)
+    
+    with Journal(path, segment_size=1024) as journal:
+        for day in range(4, 9):
+            journal.append(races(day), f'RAVM00{day}.jvd')
+        assert [r for r, _ in journal.records()] == sum((races(day) for day in range(1, 9)), [])
+
+
+def test_reparse(make_manager, capture):
+    """ジャーナルからテーブルを作り直す（種別・レースキーの範囲を指定）"""
+    diff = capture('diff', {'RAVM001.jvd': races(6) + races(7), 'SEVM001.jvd': results(6)})
+    manager = make_manager(diff, journal=True)
+    assert run_with_timeout(lambda: manager.update_data('20240101')) is True
+    
+    def rows(table):
+        # 作り直した行の id・登録日時は変わるため比較しない
+        cursor = manager.conn.execute(f"SELECT * FROM {table}")
+        columns = [d[0] for d in cursor.description]
+        return sorted(tuple(v for c, v in zip(columns, row)
+                            if c not in ('id', 'created_at', 'updated_at')) for row in cursor)
+    saved_races, saved_results = rows('races'), rows('results')
+    assert len(saved_races) == 24 and len(saved_results) == 12
+    
+    manager.conn.execute("DELETE FROM races")
+    manager.conn.execute("DELETE FROM results")
+    manager.conn.commit()
+    assert run_with_timeout(lambda: manager.reparse(['RA'], race_key_from='20240107')) is True
+    assert rows('races') == saved_races[12:]
+    assert rows('results') == []
+    
+    assert run_with_timeout(lambda: manager.reparse()) is True
+    assert rows('races') == saved_races
+    assert rows('results') == saved_results
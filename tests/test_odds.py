@@ -0,0 +1,95 @@
+"""
+組番オッズ（O2〜O6）の解析と保存のテスト
+"""
+
+from array import array
+
+import pytest
+
+from jravan import batch
+from jravan.parser import RecordParser
+from tests.conftest import make_record, plain, race_key, run_with_timeout
+
+
+# 仕様書の組番オッズ（41バイト目から）: レコード長, 組数, 項目（名前, 長さ）, テーブル
+SPEC = {
+    'O2': (2042, 153, (('kumi', 4), ('odds', 6), ('ninki', 3)), 'odds_umaren'),
+    'O3': (2654, 153, (('kumi', 4), ('odds_low', 5), ('odds_high', 5), ('ninki', 3)), 'odds_wide'),
+    'O4': (4031, 306, (('kumi', 4), ('odds', 6), ('ninki', 3)), 'odds_umatan'),
+    'O5': (12293, 816, (('kumi', 6), ('odds', 6), ('ninki', 3)), 'odds_sanrenpuku'),
+    'O6': (83285, 4896, (('kumi', 6), ('odds', 7), ('ninki', 4)), 'odds_sanrentan'),
+}
+
+KEY = race_key(race=11)
+
+
+def odds_record(record_type: str, combinations: list, data_kubun: str = '1') -> bytes:
+    """組番ごとの値（項目の順。str はそのまま埋める）と票数合計を埋めたレコード"""
+    length, count, items, _ = SPEC[record_type]
+    size = sum(n for _, n in items)
+    buf = bytearray(make_record(record_type, data_kubun, race_key=KEY))
+    for i, values in enumerate(combinations):
+        offset = 40 + i * size
+        for (_, n), value in zip(items, values):
+            text = str(value).zfill(n) if isinstance(value, int) else value.ljust(n)
+            buf[offset:offset + n] = text.encode('ascii')
+            offset += n
+    buf[length - 13:length - 2] = b'00000123456'
+    return bytes(buf)
+
+
+def combinations(record_type: str, scale: int = 1) -> list:
+    """3組（2組目のオッズは取消等で変換できない）と空き1組"""
+    items = SPEC[record_type][2]
+    odds = [[(10 + i) * scale] * (len(items) - 2) for i in range(3)]
+    odds[1] = ['*' * n for _, n in items[1:-1]]
+    kumi = [102, 103, 203] if items[0][1] == 4 else [10203, 10204, 10304]
+    return [[k] + o + [i + 1] for i, (k, o) in enumerate(zip(kumi, odds))] + [['', '', '']]
+
+
+@pytest.mark.parametrize('record_type', sorted(SPEC))
+def test_parse(record_type):
+    """組番オッズは項目ごとの配列（空きの組は除外、変換できない値は -1）"""
+    record = RecordParser.parse(odds_record(record_type, combinations(record_type)))
+    names = [name for name, _ in SPEC[record_type][2]]
+    expected = {name: [] for name in names}
+    for values in combinations(record_type)[:3]:
+        for name, value in zip(names, values):
+            expected[name].append(value if isinstance(value, int) else -1)
+    assert plain(record['odds']) == expected
+    assert record['total_hyosu'] == 123456
+    assert record['race_key']['race_num'] == '11'
+
+
+@pytest.mark.parametrize('record_type', sorted(SPEC))
+def test_without_numpy(record_type, monkeypatch):
+    """NumPyがない場合は array.array で同じ値を返す"""
+    data = odds_record(record_type, combinations(record_type))
+    expected = RecordParser.parse(data)
+    
+    monkeypatch.setattr(batch, 'np', None)
+    record = RecordParser.parse(data)
+    assert all(isinstance(values, array) and values.typecode == 'q'
+               for values in record['odds'].values())
+    assert plain(record) == plain(expected)
+
+
+def test_save(make_manager, capture):
+    """組番ごとに (race_key, kumi) の行として保存し、変換できないオッズはNULL"""
+    def update(name: str, scale: int):
+        files = {f'{record_type}VM{name}.jvd':
+                 [odds_record(record_type, combinations(record_type, scale))]
+                 for record_type in SPEC}
+        manager = make_manager(capture(name, files))
+        assert run_with_timeout(lambda: manager.update_data('20240101')) is True
+        return manager
+    
+    update('001', 1)
+    manager = update('002', 2)
+    for record_type, (_, _, items, table) in SPEC.items():
+        columns = ', '.join(name for name, _ in items)
+        rows = [tuple(row) for row in manager.conn.execute(
+            f"SELECT race_key, {columns} FROM {table} ORDER BY kumi")]
+        expected = [tuple([KEY] + [None if isinstance(v, str) else v for v in values])
+                    for values in combinations(record_type, 2)[:3]]
+        assert rows == expected, table
@@ -0,0 +1,82 @@
+"""
+複数データ種別の並列取得（FetchOrchestrator）のテスト
+
+データ種別ごとのキャプチャ（{ディレクトリ}/{データ種別}）をワーカープロセスで再生する。
+"""
+
+import os
+from functools import partial
+
+import pytest
+
+from jravan.orchestrator import FetchOrchestrator, FetchTask
+from jravan.replay import ReplayJVLinkClient, spec_client
+from tests.conftest import make_record, race_key, run_with_timeout, sample_record
+
+
+class CrashingClient(ReplayJVLinkClient):
+    """3件目のレコードを読む前にワーカープロセスを異常終了させる"""
+    
+    def gets(self, buffer_size: int = 110000):
+        result = super().gets(buffer_size)
+        if result[0] > 0:
+            self.count = getattr(self, 'count', 0) + 1
+            if self.count == 3:
+                os._exit(3)
+        return result
+
+
+def client_factory(path: str, data_spec: str) -> ReplayJVLinkClient:
+    """MING のワーカーだけ異常終了するクライアント（ワーカープロセスへ渡すためモジュールの関数）"""
+    if data_spec == 'MING':
+        return CrashingClient(os.path.join(path, data_spec))
+    return spec_client(path, 0.0, data_spec)
+
+
+@pytest.fixture
+def specs(tmp_path, capture) -> str:
+    (tmp_path / 'specs').mkdir()
+    capture('specs/RACE', {
+        'RAVM001.jvd': [make_record('RA', race_key=race_key(race=i + 1)) for i in range(12)],
+        'SEVM001.jvd': [make_record('SE', race_key=race_key(race=i + 1), umaban=1)
+                        for i in range(12)],
+    })
+    capture('specs/BLOD', {'UMVM001.jvd': [sample_record('UM', seed) for seed in range(5)]})
+    capture('specs/MING', {'DMVM001.jvd': [sample_record('DM', seed) for seed in range(5)]})
+    return str(tmp_path / 'specs')
+
+
+def history(manager) -> dict:
+    return dict(manager.conn.execute("SELECT data_spec, status FROM process_history"))
+
+
+def test_run(make_manager, specs):
+    """データ種別ごとに取得して親プロセスで保存し、結果は取得内容ごと"""
+    manager = make_manager()
+    tasks = [FetchTask('RACE', 1, 'setup'), FetchTask('BLOD', 2, 'setup')]
+    orchestrator = FetchOrchestrator(manager, 2, partial(spec_client, specs, 0.0))
+    assert run_with_timeout(lambda: orchestrator.run(tasks), 60) == {
+        tasks[0]: True, tasks[1]: True}
+    assert manager.conn.execute("SELECT COUNT(*) FROM races").fetchone()[0] == 12
+    assert manager.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 12
+    assert manager.conn.execute("SELECT COUNT(*) FROM horses").fetchone()[0] == 5
+    assert history(manager) == {'RACE': 'SUCCESS', 'BLOD': 'SUCCESS'}
+
+
+def test_worker_exit(make_manager, specs):
+    """異常終了したワーカーはエラーとし、他のデータ種別の取得は続ける"""
+    manager = make_manager()
+    tasks = [FetchTask('MING', 2, 'setup'), FetchTask('RACE', 1, 'setup')]
+    orchestrator = FetchOrchestrator(manager, 1, partial(client_factory, specs))
+    results = run_with_timeout(lambda: orchestrator.run(tasks), 60)
+    assert results == {tasks[0]: False, tasks[1]: True}
+    assert orchestrator.progress['MING'].state == 'エラー'
+    assert history(manager) == {'MING': 'ERROR', 'RACE': 'SUCCESS'}
+    assert manager.conn.execute("SELECT COUNT(*) FROM races").fetchone()[0] == 12
+
+
+def test_duplicate_specs(make_manager):
+    """同じデータ種別の取得内容が複数ある場合は開始しない"""
+    orchestrator = FetchOrchestrator(make_manager())
+    with pytest.raises(ValueError, match='RACE'):
+        orchestrator.run([FetchTask('RACE'), FetchTask('BLOD'), FetchTask('RACE', mode='setup')])
@@ -0,0 +1,94 @@
+"""
+マルチプロセス解析（JVDataManager(parse_workers=N)）のテスト
+"""
+
+from collections import Counter
+
+import pytest
+
+from jravan import manager as manager_module
+from jravan.manager import JVDataManager
+from jravan.parser import RecordParser, parse_chunk
+from jravan.replay import ReplayJVLinkClient
+from tests.conftest import make_record, race_key, run_with_timeout, sample_record
+
+
+BAD = race_key(race=3, day=6)  # RAVM002.jvd の最初のチャンク
+
+TABLES = ('races', 'results', 'horses', 'odds_umaren', 'file_checkpoints')
+
+
+def broken_chunk(chunk, fields=None):
+    """BAD のレースを含むチャンクで失敗する parse_chunk（ワーカープロセスで実行）"""
+    if any(BAD.encode() in data for data in chunk):
+        raise RuntimeError("injected failure")
+    return parse_chunk(chunk, fields)
+
+
+@pytest.fixture
+def setup(capture) -> str:
+    return capture('setup', {
+        'RAVM001.jvd': [make_record('RA', race_key=race_key(race=i % 12 + 1, day=4 + i // 12))
+                        for i in range(24)],
+        'RAVM002.jvd': [make_record('RA', race_key=race_key(race=i % 12 + 1, day=6 + i // 12))
+                        for i in range(24)],
+        'SEVM001.jvd': [make_record('SE', race_key=race_key(race=i % 12 + 1, day=4),
+                                    umaban=i // 12 + 1) for i in range(36)],
+        'UMVM001.jvd': [sample_record('UM', seed) for seed in range(5)],
+        'O2VM001.jvd': [sample_record('O2', seed) for seed in range(3)],
+    })
+
+
+def snapshot(manager: JVDataManager) -> dict:
+    """保存した行（登録・更新・完了日時を除く）と最後の処理履歴"""
+    tables = {}
+    for table in TABLES:
+        cursor = manager.conn.execute(f"SELECT * FROM {table}")
+        columns = [d[0] for d in cursor.description]
+        tables[table] = sorted(tuple(v for c, v in zip(columns, row)
+                                     if not c.endswith('_at') and c != 'id')
+                               for row in cursor)
+    tables['history'] = tuple(manager.conn.execute(
+        "SELECT status, processed_count, error_count FROM process_history "
+        "ORDER BY id DESC LIMIT 1").fetchone())
+    return tables
+
+
+def run_setup(tmp_path, replay: str, name: str, **kwargs) -> dict:
+    manager = JVDataManager(str(tmp_path / f'{name}.db'), str(tmp_path / 'jvdata'),
+                            client=ReplayJVLinkClient(replay), journal=False, **kwargs)
+    try:
+        manager.PARSE_CHUNK_SIZE = 7
+        assert run_with_timeout(lambda: manager.download_setup_data('RACE'), 60) is True
+        return snapshot(manager)
+    finally:
+        manager.close()
+
+
+def test_same_rows(tmp_path, setup):
+    """ワーカープロセスで解析しても同じ行・チェックポイントになる"""
+    serial = run_setup(tmp_path, setup, 'serial')
+    assert serial['history'] == ('SUCCESS', 92, 0)
+    assert run_setup(tmp_path, setup, 'pool', parse_workers=2) == serial
+
+
+def test_rejected(tmp_path, capture, monkeypatch):
+    """ワーカープロセスで除外したレコードの件数も RecordParser.rejected に計上する"""
+    monkeypatch.setattr(RecordParser, 'rejected', Counter())
+    short = make_record('RA', race_key=race_key(race=1))[:200] + b'\r\n'
+    replay = capture('short', {
+        'RAVM001.jvd': [make_record('RA', race_key=race_key(race=2)), short, short]})
+    result = run_setup(tmp_path, replay, 'pool', parse_workers=2)
+    assert len(result['races']) == 1
+    assert RecordParser.rejected == {'RA': 2}
+
+
+def test_worker_error(tmp_path, setup, monkeypatch):
+    """ワーカーの例外はそのチャンクだけをエラーとし、そのファイルのチェックポイントは記録しない"""
+    monkeypatch.setattr(manager_module, 'parse_chunk', broken_chunk)
+    result = run_setup(tmp_path, setup, 'pool', parse_workers=2)
+    assert result['history'][0] == 'SUCCESS'
+    assert result['history'][2] == 1
+    assert [row[0] for row in result['file_checkpoints']] == [
+        'O2VM001.jvd', 'RAVM001.jvd', 'SEVM001.jvd', 'UMVM001.jvd']
+    assert len(result['races']) == 24 + 24 - 7
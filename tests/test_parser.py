@@ -0,0 +1,122 @@
+"""
+レコード解析（RecordParser.parse）のテスト
+
+tests/golden/parser.json は、レイアウト定義から解析関数を生成する前の
+パーサー（フィールドごとに mid_b2s / mid_b2i を呼び出す実装）で解析した結果。
+生成した解析関数が同じ辞書を返すことを確認する。
+"""
+
+import json
+import logging
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from jravan.layouts import LAYOUTS
+from jravan.parser import JVDataParser, RecordParser, _b2i, parse_chunk
+from tests.conftest import make_record, plain, sample_record
+
+
+GOLDEN = json.loads((Path(__file__).parent / 'golden' / 'parser.json').read_text(encoding='utf-8'))
+
+# 種別ごとの合成レコード
+#   typical   : 主な項目・繰り返し項目の先頭2要素に値がある
+#   blank     : 種別・データ区分以外が空白
+#   malformed : 数値項目に全角数字・不正なバイト・符号・空白をはさんだ数字などを含む
+CASES = [(record_type, case['case'], bytes.fromhex(case['record']), case['expected'])
+         for record_type, cases in GOLDEN.items() for case in cases]
+
+
+@pytest.mark.parametrize('record_type, case, record, expected', CASES,
+                         ids=[f'{c[0]}-{c[1]}' for c in CASES])
+def test_golden(record_type, case, record, expected):
+    """解析結果（項目の順序を含む）が従来のパーサーと同じ"""
+    result = RecordParser.parse(record)
+    assert result == expected
+    assert json.dumps(result, ensure_ascii=False) == json.dumps(expected, ensure_ascii=False)
+
+
+@pytest.mark.parametrize('record_type', sorted(RecordParser.PARSERS))
+def test_buffer(record_type):
+    """memoryview・bytearray（mmap したファイルのスライスなど）も bytes と同じ結果"""
+    data = sample_record(record_type, 1)
+    expected = plain(RecordParser.parse(data))
+    buf = bytearray(b'XX' + data + b'YY')
+    assert plain(RecordParser.parse(memoryview(data))) == expected
+    assert plain(RecordParser.parse(memoryview(buf)[2:-2])) == expected
+    assert plain(RecordParser.parse(bytearray(data))) == expected
+    fields = [LAYOUTS[record_type].fields[-1].name]
+    assert plain(RecordParser.parse(memoryview(data), fields)) == plain(
+        RecordParser.parse(data, fields))
+
+
+def test_buffer_other():
+    """種別が不明なレコードの raw_data は bytes"""
+    record = RecordParser.parse(memoryview(b'ZZ0123\r\n'))
+    assert record['record_type'] == 'ZZ'
+    assert record['raw_data'] == b'ZZ0123\r\n' and type(record['raw_data']) is bytes
+
+
+@pytest.mark.parametrize('raw, expected', [
+    (b'0123', 123),
+    (b'  45', 45),
+    (b'45  ', 45),
+    (b'    ', None),
+    (b'', None),
+    (b'-1', -1),
+    (b'1 2', None),
+    (b'**', None),
+    ('１２'.encode('shift-jis'), 12),  # 全角数字
+    (b'1\xff2', 12),  # Shift-JISとして不正なバイトは無視
+])
+def test_b2i(raw, expected):
+    """数値項目はバイト列から直接変換する（変換できない場合は従来と同じくデコードしてから変換）"""
+    assert _b2i(raw) == expected
+    assert _b2i(memoryview(raw)) == expected
+    assert JVDataParser.mid_b2i(b'XX' + raw, 3, len(raw)) == expected
+
+
+@pytest.fixture
+def rejected(monkeypatch) -> Counter:
+    counter = Counter()
+    monkeypatch.setattr(RecordParser, 'rejected', counter)
+    return counter
+
+
+def test_rejected(rejected, caplog):
+    """フィールドが収まらないレコード・末尾がCRLFでないレコードは除外して件数を数える"""
+    record = make_record('SE', umaban=1)
+    min_length = RecordParser.DISPATCH[b'SE'][2]
+    assert min_length <= len(record)
+    
+    with caplog.at_level(logging.WARNING, logger='jravan.parser'):
+        assert RecordParser.parse(record[:min_length - 3] + b'\r\n') is None
+        assert RecordParser.parse(record[:-2]) is None
+        assert RecordParser.parse(record[:-2] + b'  ') is None
+    assert rejected == {'SE': 3}
+    assert len(caplog.records) == 1  # 警告は種別ごとに最初の1件のみ
+    
+    assert RecordParser.parse(record[:min_length - 2] + b'\r\n')['umaban'] == 1
+    assert RecordParser.parse(record[:-2] + b' ' * 100 + b'\r\n')['umaban'] == 1
+    assert rejected == {'SE': 3}
+
+
+def test_not_checked(rejected):
+    """レコード長を定義していない種別・レイアウトのない種別は長さを検査しない"""
+    assert RecordParser.DISPATCH[b'O1'][2] is None
+    assert RecordParser.parse(b'O17' + b' ' * 10)['record_type'] == 'O1'
+    assert RecordParser.parse(b'ZZ123') == {
+        'record_type': 'ZZ', 'description': '不明', 'size': 5, 'raw_data': b'ZZ123'}
+    assert RecordParser.parse(b'R') is None
+    assert not rejected
+
+
+def test_parse_chunk(rejected):
+    """parse_chunk は解析結果・エラー件数・チャンク内で除外した件数を返す"""
+    rejected['RA'] = 5
+    short = make_record('RA')[:100] + b'\r\n'
+    records, errors, delta = parse_chunk([make_record('RA'), short, short, make_record('SE')])
+    assert [r['record_type'] for r in records] == ['RA', 'SE']
+    assert (errors, delta) == (0, {'RA': 2})
+    assert rejected == {'RA': 7}
@@ -0,0 +1,118 @@
+"""
+取り込みパイプライン（JVDataManager.process_data・pipeline.py）のテスト
+
+解析段・保存段で例外が発生しても取り込みが停止せず、エラーとして終了することを確認する。
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from jravan import pipeline
+from jravan.pipeline import BatchSizer, DownloadWaiter
+from tests.conftest import make_record, race_key, run_with_timeout
+
+
+def races(count: int) -> list:
+    return [make_record('RA', race_key=race_key(race=i % 12 + 1, day=i // 12 + 1))
+            for i in range(count)]
+
+
+@pytest.fixture
+def diff(capture) -> str:
+    # キューの上限（PIPELINE_QUEUE_SIZE チャンク）を超える件数
+    return capture('diff', {'RAVM001.jvd': races(60)})
+
+
+def test_parse_stage_failure(make_manager, diff, monkeypatch):
+    """解析段の例外で止まらず、update_data が False を返す"""
+    manager = make_manager(diff)
+    manager.PARSE_CHUNK_SIZE = 1
+    
+    def fail(*args, **kwargs):
+        raise RuntimeError("parse-stage failure")
+    monkeypatch.setattr(manager, '_detect_changes', fail)
+    
+    assert run_with_timeout(lambda: manager.update_data('20240101')) is False
+    status, = manager.conn.execute(
+        "SELECT status FROM process_history ORDER BY id DESC LIMIT 1").fetchone()
+    assert status == 'ERROR'
+    assert manager.get_completed_files() == set()
+
+
+def test_write_stage_failure(make_manager, diff, monkeypatch):
+    """保存段の例外で止まらず、process_data が例外を送出する"""
+    manager = make_manager(diff)
+    manager.PARSE_CHUNK_SIZE = 1
+    
+    def fail(*args, **kwargs):
+        raise RuntimeError("write-stage failure")
+    monkeypatch.setattr(manager, 'get_db_connection', fail)
+    
+    def run():
+        manager.jvlink.initialize()
+        manager.jvlink.open('DIFF')
+        with pytest.raises(RuntimeError, match='write-stage failure'):
+            manager.process_data(max_records=None, checkpoint=True)
+        return True
+    
+    assert run_with_timeout(run)
+
+
+def test_process_data(make_manager, diff):
+    """例外がなければ全件を保存する"""
+    manager = make_manager(diff)
+    manager.PARSE_CHUNK_SIZE = 7
+    assert run_with_timeout(lambda: manager.update_data('20240101')) is True
+    assert manager.conn.execute("SELECT COUNT(*) FROM races").fetchone()[0] == 60
+
+
+def test_download_waiter(monkeypatch):
+    """進捗がなければ待ち時間を倍々に伸ばし（上限 maximum）、進捗があれば initial に戻す"""
+    now = [0.0]
+    monkeypatch.setattr(pipeline, 'time', SimpleNamespace(monotonic=lambda: now[0]))
+    waiter = DownloadWaiter(initial=0.01, maximum=0.08)
+    
+    assert waiter.next_delay(0) == 0.0
+    assert [waiter.next_delay(0) for _ in range(5)] == [0.01, 0.02, 0.04, 0.08, 0.08]
+    assert waiter.rate is None
+    
+    # 0.05秒で1ファイル進んだ → 次のファイルの完了予測（0.05秒後）まで待つ
+    now[0] = 0.05
+    assert waiter.next_delay(1) == 0.0
+    assert waiter.rate == pytest.approx(20.0)
+    assert waiter.next_delay(1) == pytest.approx(0.05)
+    now[0] = 0.09
+    assert waiter.next_delay(1) == pytest.approx(0.02)
+    
+    # 予測より速く進めば待たずに読み込みを再開し、待ち時間も initial に戻る
+    now[0] = 0.1
+    assert waiter.next_delay(3) == 0.0
+    assert waiter.delay == 0.01
+    assert waiter.polls == 10
+
+
+def test_batch_sizer():
+    """保存時間が target 秒になる件数に近づける（前回の1/2〜2倍・minimum〜maximum の範囲）"""
+    sizer = BatchSizer(initial=100, target=0.2, minimum=10, maximum=1000)
+    sizer.update(100, 0.01)  # 2000件/0.2秒 → 2倍まで
+    assert sizer.size == 200
+    sizer.update(200, 10.0)  # 4件/0.2秒 → 1/2まで
+    assert sizer.size == 100
+    sizer.update(100, 0.4)
+    assert sizer.size == 50
+    sizer.update(0, 1.0)  # 空のバッチは無視
+    assert sizer.size == 50
+    
+    sizes = []
+    for _ in range(10):
+        sizer.update(sizer.size, 0.0)
+        sizes.append(sizer.size)
+    assert sizes[:5] == [100, 200, 400, 800, 1000]
+    assert sizes[-1] == 1000
+    
+    for _ in range(10):
+        previous = sizer.size
+        sizer.update(sizer.size, 100.0)
+        assert max(previous // 2, 10) == sizer.size
+    assert sizer.size == 10
@@ -0,0 +1,31 @@
+"""
+処理履歴（process_history）と更新開始日時（get_last_update_time）のテスト
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from tests.conftest import make_record, race_key, run_with_timeout
+
+
+JST = timezone(timedelta(hours=9))
+
+
+def test_last_update_time_jst(make_manager):
+    """処理履歴の終了日時（UTC）を日本時間にして返す"""
+    manager = make_manager()
+    process_id = manager.start_process_history('UPDATE', 'DIFF', '20240101000000')
+    manager.finish_process_history(process_id, 'SUCCESS', 0, 0)
+    manager.conn.execute("UPDATE process_history SET to_time = '2024-01-06 15:30:00'")
+    manager.conn.commit()
+    assert manager.get_last_update_time() == '20240107003000'
+
+
+def test_last_update_time_after_update(make_manager, capture):
+    """更新の直後は現在の日本時間"""
+    diff = capture('diff', {'RAVM001.jvd': [make_record('RA', race_key=race_key())]})
+    manager = make_manager(diff)
+    assert run_with_timeout(lambda: manager.update_data('20240101')) is True
+    
+    last = datetime.strptime(manager.get_last_update_time(), '%Y%m%d%H%M%S')
+    now = datetime.now(JST).replace(tzinfo=None)
+    assert timedelta(0) <= now - last < timedelta(minutes=1)
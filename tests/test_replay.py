@@ -0,0 +1,85 @@
+"""
+キャプチャの再生（ReplayJVLinkClient）と記録（RecordingJVLinkClient）のテスト
+"""
+
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from jravan import replay
+from jravan.replay import RecordingJVLinkClient, ReplayJVLinkClient
+from tests.conftest import make_record, race_key
+
+
+N = len(make_record('RA'))
+
+
+@pytest.fixture
+def files(capture) -> str:
+    return capture('diff', {
+        'RAVM001.jvd': [make_record('RA', race_key=race_key(race=1)),
+                        make_record('RA', race_key=race_key(race=2))],
+        'RAVM002.jvd': [make_record('RA', race_key=race_key(race=3))],
+    })
+
+
+def read_all(client) -> list:
+    """read の戻り値コードとファイル名（0 まで）"""
+    result = []
+    while True:
+        ret, data, filename = client.read()
+        result.append((ret, filename))
+        if ret == 0:
+            return result
+
+
+def test_download_interval(files, monkeypatch):
+    """ダウンロード前のファイルは -3、各ファイルの先頭で -1、全ファイル後に 0"""
+    now = [0.0]
+    monkeypatch.setattr(replay, 'time', SimpleNamespace(monotonic=lambda: now[0],
+                                                        sleep=time.sleep))
+    client = ReplayJVLinkClient(files, download_interval=1.0)
+    assert client.initialize() == 0
+    assert client.open('RACE')[:3] == (0, 2, 2)
+    
+    assert client.read()[0] == -3
+    assert client.status() == 0
+    now[0] = 1.0
+    assert client.status() == 1
+    assert [client.read()[::2] for _ in range(4)] == [
+        (-1, 'RAVM001.jvd'), (N, 'RAVM001.jvd'), (N, 'RAVM001.jvd'), (-3, '')]
+    
+    now[0] = 2.0
+    assert read_all(client) == [(-1, 'RAVM002.jvd'), (N, 'RAVM002.jvd'), (0, '')]
+    client.close()
+
+
+def test_downloaded(files):
+    """download_interval=0 の場合は -3 を返さない"""
+    client = ReplayJVLinkClient(files)
+    client.initialize()
+    assert client.open('RACE')[:3] == (0, 2, 0)
+    assert [ret for ret, _ in read_all(client)] == [-1, N, N, -1, N, 0]
+
+
+def test_recording(files, tmp_path):
+    """キャプチャはセッションごとに作り直し、再生すると同じレコードになる"""
+    out = str(tmp_path / 'capture')
+    client = RecordingJVLinkClient(ReplayJVLinkClient(files), out)
+    client.initialize()
+    for _ in range(2):
+        client.open('RACE')
+        read_all(client)
+        client.close()
+    
+    for name in ('RAVM001.jvd', 'RAVM002.jvd'):
+        with open(os.path.join(files, name), 'rb') as f, \
+                open(os.path.join(out, name), 'rb') as g:
+            assert g.read() == f.read()
+    
+    client = ReplayJVLinkClient(out)
+    client.initialize()
+    client.open('RACE')
+    assert [ret for ret, _ in read_all(client)] == [-1, N, N, -1, N, 0]
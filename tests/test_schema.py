@@ -0,0 +1,109 @@
+"""
+レイアウトから生成したテーブル（schema.py。マスタ・マイニング系）のテスト
+"""
+
+import pytest
+
+from jravan.layouts import LAYOUTS
+from jravan.parser import RecordParser
+from jravan.schema import SCHEMAS, TABLES
+from tests.conftest import run_with_timeout, sample_record
+
+
+def columns(manager, table: str) -> list:
+    return [row[1] for row in manager.conn.execute(f"PRAGMA table_info({table})")]
+
+
+def rows(manager, table: str, names: list) -> list:
+    return sorted(tuple(row) for row in manager.conn.execute(
+        f"SELECT {', '.join(names)} FROM {table}"))
+
+
+@pytest.fixture
+def update(make_manager, capture):
+    """レコード種別 → レコードのリストを1回の更新として取り込み、managerを返す"""
+    runs = 0
+    
+    def run(records: dict):
+        nonlocal runs
+        runs += 1
+        manager = make_manager(capture(f'diff{runs}', {
+            f'{record_type}VM{runs:03d}.jvd': items for record_type, items in records.items()}))
+        assert run_with_timeout(lambda: manager.update_data('20240101')) is True
+        return manager
+    return run
+
+
+def test_tables(make_manager):
+    """レイアウトのフィールドごとの列（グループは {グループ名}_{フィールド名}）と子テーブル"""
+    manager = make_manager()
+    assert columns(manager, 'jockeys')[:5] == [
+        'data_kubun', 'make_date', 'kisyu_code', 'del_kubun', 'issue_date']
+    assert columns(manager, 'jockeys')[-3:] == ['chokyosi_code', 'chokyosi_ryakusyo', 'updated_at']
+    assert columns(manager, 'time_mining')[:4] == ['data_kubun', 'make_date', 'race_key', 'make_hm']
+    assert columns(manager, 'time_mining_predictions') == [
+        'race_key', 'umaban', 'dm_time', 'dm_gosa_plus', 'dm_gosa_minus']
+    assert {table.name for table in TABLES} <= {
+        row[0] for row in manager.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def test_breeding_horse_reserved():
+    """繁殖馬マスタの予備（22〜29・40バイト目）は解析しない"""
+    data = bytearray(sample_record('HN'))
+    parsed = RecordParser.parse(bytes(data))
+    data[21:29] = b'XXXXXXXX'
+    data[39:40] = b'1'
+    assert RecordParser.parse(bytes(data)) == parsed
+    assert 'del_kubun' not in parsed
+    assert [f.name for f in LAYOUTS['HN'].fields][2:5] == ['hansyoku_num', 'ketto_num', 'bamei']
+
+
+@pytest.mark.parametrize('table', TABLES, ids=[table.record_type for table in TABLES])
+def test_save(update, table):
+    """解析結果の値を列に保存し、繰り返し項目は子テーブルの行にする（同じキーは後のレコード）"""
+    schema = SCHEMAS[table.record_type]
+    records = [sample_record(table.record_type, seed) for seed in range(3)]
+    manager = update({table.record_type: records})
+    
+    parsed = [RecordParser.parse(data) for data in records]
+    expected = {schema.key(record): schema.row(record) for record in parsed}
+    names = columns(manager, table.name)[:-1]
+    assert rows(manager, table.name, names) == sorted(expected.values())
+    for name, (_, _, child_rows) in zip(('predictions',), schema.children):
+        child = f'{table.name}_{name}'
+        width = len(table.primary_key) + 1
+        expected = {row[:width]: row for record in parsed for row in child_rows(record)}
+        assert rows(manager, child, columns(manager, child)) == sorted(expected.values())
+
+
+def test_children_replaced(update):
+    """同じ主キーのレコードを取り込み直すと子テーブルの行も置き換える"""
+    first = sample_record('DM', 1)
+    update({'DM': [first]})
+    
+    # 予想を先頭の1頭だけにする
+    second = bytearray(first)
+    second[46:301] = b' ' * 255
+    manager = update({'DM': [bytes(second)]})
+    expected = SCHEMAS['DM'].children[0][2](RecordParser.parse(bytes(second)))
+    assert len(expected) <= 1
+    assert rows(manager, 'time_mining_predictions',
+                columns(manager, 'time_mining_predictions')) == expected
+
+
+def test_unchanged_not_rewritten(make_manager):
+    """同じ主キーの行は値が変わった場合だけ更新する（変わらなければ書き込まない）"""
+    manager = make_manager()
+    data = sample_record('KS', 1)
+    manager._save_batch_records([RecordParser.parse(data)])
+    manager.conn.execute("UPDATE jockeys SET updated_at = '2000-01-01 00:00:00'")
+    
+    manager._save_batch_records([RecordParser.parse(data)])
+    assert manager.conn.execute("SELECT updated_at FROM jockeys").fetchone()[0] == '2000-01-01 00:00:00'
+    
+    changed = bytearray(data)
+    changed[41:75] = 'テスト騎手'.encode('shift-jis').ljust(34)
+    manager._save_batch_records([RecordParser.parse(bytes(changed))])
+    name, updated_at = manager.conn.execute("SELECT kisyu_name, updated_at FROM jockeys").fetchone()
+    assert name == 'テスト騎手'
+    assert updated_at != '2000-01-01 00:00:00'
@@ -0,0 +1,54 @@
+"""
+遅延デコードのレコードビュー（RecordParser.view）のテスト
+"""
+
+import pytest
+
+from jravan.layouts import LAYOUTS, Group
+from jravan.parser import RecordParser, RecordView
+from tests.conftest import make_record, plain, race_key, sample_record
+
+
+def value(item):
+    """ビューの項目値（入れ子のビューは辞書にする）"""
+    return item.to_dict() if hasattr(item, 'to_dict') else item
+
+
+@pytest.mark.parametrize('record_type', sorted(LAYOUTS))
+@pytest.mark.parametrize('seed', range(3))
+def test_fields(record_type, seed):
+    """各項目（グループ内の項目・繰り返し項目を含む）の値が parse と同じ"""
+    data = sample_record(record_type, seed)
+    view = RecordParser.view(data)
+    expected = RecordParser.parse(data)
+    
+    assert type(view).__name__ == f'{record_type}View'
+    assert (view.record_type, view.description) == (record_type, expected['description'])
+    for item in LAYOUTS[record_type].fields:
+        assert plain(value(view[item.name])) == plain(expected[item.name]), item.name
+        if isinstance(item, Group):
+            for f in item.fields:
+                assert getattr(getattr(view, item.name), f.name) == expected[item.name][f.name]
+    assert plain(view.to_dict()) == plain(expected)
+
+
+def test_cached():
+    """参照した項目はキャッシュし、参照していない項目は参照時のバッファからデコードする"""
+    buf = bytearray(make_record('SE', race_key=race_key(race=1), umaban=1, bamei='アイウ'))
+    view = RecordParser.view(buf)
+    assert view.umaban == 1
+    
+    buf[:] = make_record('SE', race_key=race_key(race=2), umaban=2, bamei='カキク')
+    assert view.umaban == 1
+    assert view['bamei'] == 'カキク'
+    assert view.race_key.race_num == '02'
+
+
+def test_other_records():
+    """レイアウトのない種別は種別だけを参照できるビュー、2バイト未満はNone"""
+    view = RecordParser.view(b'ZZ' + b' ' * 10)
+    assert type(view) is RecordView
+    assert (view.record_type, view.description, len(view)) == ('ZZ', '不明', 12)
+    with pytest.raises(KeyError):
+        view['race_key']
+    assert RecordParser.view(b'R') is None